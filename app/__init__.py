@@ -8,6 +8,7 @@ from flask_apscheduler import APScheduler
 from config import Config
 from datetime import datetime
 import json
+from app.utils import fastjson
 
 # Initialize Flask extensions
 db = SQLAlchemy()
@@ -26,7 +27,11 @@ def create_app(config_class=Config):
     migrate.init_app(app, db)
     login_manager.init_app(app)
     mail.init_app(app)
-    socketio.init_app(app)
+    
+    # Fan Socket.IO events out to the other workers if a message queue is configured
+    from app.services.socket_relay import message_queue_options
+    from app.services.live_events import WireJSON, client_schema
+    socketio.init_app(app, json=WireJSON, **message_queue_options(app.config))
     
     # Only initialize scheduler if it's not already running
     if not scheduler.running:
@@ -38,16 +43,31 @@ def create_app(config_class=Config):
     def fromjson_filter(value):
         if isinstance(value, str):
             try:
-                return json.loads(value)
-            except json.JSONDecodeError:
+                return fastjson.loads(value)
+            except ValueError:
                 return {}
         return value
     
+    @app.template_filter('timeago')
+    def timeago_filter(value):
+        if not value:
+            return ''
+        seconds = int((datetime.utcnow() - value).total_seconds())
+        if seconds < 60:
+            return 'just now'
+        for unit, size in (('day', 86400), ('hour', 3600), ('minute', 60)):
+            if seconds >= size:
+                count = seconds // size
+                return f'{count} {unit}{"s" if count != 1 else ""} ago'
+    
     # Add global functions to Jinja2 context
+    socket_events = client_schema()
+    
     @app.context_processor
     def utility_processor():
         return {
-            'now': datetime.utcnow
+            'now': datetime.utcnow,
+            'socket_events': socket_events
         }
     
     # Register blueprints
@@ -75,8 +95,26 @@ def create_app(config_class=Config):
     app.register_blueprint(wishlist_bp)
     app.register_blueprint(review_bp)
     
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Start background monitor
     from app.socket_events import start_background_monitor
     start_background_monitor(app)
     
+    # Keep the full-text index in step with auction and item changes
+    from app.services import search_engine  # registers the session hook
+    
+    # Push unread notification counts to the users' rooms after each commit
+    from app.services import unread_counts  # registers the session hooks
+    
+    # Keep every worker's cached set of customer rep ids current
+    from app.services import notifications  # registers the User mapper hooks
+    
+    # Start the workers for post-commit jobs
+    from app.services import auction_jobs  # registers the job handlers
+    from app.services.job_queue import job_queue
+    job_queue.start(app)
+    
     return app
\ No newline at end of file
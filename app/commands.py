@@ -0,0 +1,201 @@
+import click
+
+
+def register_commands(app):
+    """Register the maintenance commands with the Flask CLI."""
+
+    @app.cli.command('check-bid-summaries')
+    @click.option('--fix', is_flag=True, help='Rewrite drifted summaries from the bids table.')
+    def check_bid_summaries(fix):
+        """Check the stored current_price/bid_count/leader columns against the bids."""
+        from app.services.bid_summary import find_bid_summary_drift, fix_bid_summary_drift
+
+        drift = find_bid_summary_drift()
+        for auction, summary in drift:
+            stored = {column: getattr(auction, column) for column in summary}
+            click.echo(f'Auction {auction.id}: stored {stored}, expected {summary}')
+
+        if not drift:
+            click.echo('All auction bid summaries are consistent.')
+        elif fix:
+            fix_bid_summary_drift(drift)
+            click.echo(f'Fixed {len(drift)} auction(s).')
+        else:
+            click.echo(f'{len(drift)} auction(s) out of step; rerun with --fix to repair them.')
+            raise SystemExit(1)
+
+    @app.cli.command('rebuild-category-closure')
+    def rebuild_category_closure():
+        """Recompute the category_closure table from the category tree."""
+        from app import db
+        from app.models import CategoryClosure
+
+        with db.engine.begin() as connection:
+            count = CategoryClosure.rebuild(connection)
+        click.echo(f'Rebuilt category closure with {count} rows.')
+
+    @app.cli.command('check-query-plans')
+    @click.option('--min-rows', default=1000, show_default=True,
+                  help='Ignore full scans of tables with fewer rows than this.')
+    def check_query_plans(min_rows):
+        """EXPLAIN the queries of the main pages and fail if any reads a whole table."""
+        from app import db
+        from app.models import Auction, User
+        from app.utils.query_plans import check_routes, supports
+
+        if not supports(db.engine):
+            click.echo(f'Query plans of {db.engine.dialect.name} databases cannot be checked; skipped.')
+            return
+        user = User.query.order_by(User.id).first()
+        auction = Auction.query.order_by(Auction.id).first()
+        if user is None or auction is None:
+            click.echo('Need at least one user and one auction to check against.')
+            raise SystemExit(1)
+
+        problems = check_routes(app, user, auction, min_rows=min_rows)
+        for url, table, statement in problems:
+            click.echo(f'{url}: full scan of {table}')
+            click.echo(f'    {" ".join(statement.split())}')
+        if problems:
+            click.echo(f'{len(problems)} full table scan(s) found.')
+            raise SystemExit(1)
+        click.echo('No full table scans found.')
+
+    @app.cli.command('rebuild-attribute-index')
+    def rebuild_attribute_index():
+        """Recompute the item_attributes table from the items' JSON attributes."""
+        from app import db
+        from app.models import ItemAttribute
+
+        with db.engine.begin() as connection:
+            count = ItemAttribute.rebuild(connection)
+        click.echo(f'Indexed {count} item attribute(s).')
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index():
+        """Reindex the searchable text of every auction."""
+        from app.services.search_engine import search_engine
+
+        count = search_engine.rebuild()
+        click.echo(f'Indexed {count} auction(s).')
+
+    @app.cli.command('check-unread-counts')
+    @click.option('--fix', is_flag=True, help='Rewrite drifted counters from the notifications table.')
+    def check_unread_counts(fix):
+        """Check each user's stored unread notification counter against their notifications."""
+        from app.services.unread_counts import find_unread_count_drift, fix_unread_count_drift
+
+        drift = find_unread_count_drift()
+        for user, count in drift:
+            click.echo(f'User {user.id}: stored {user.unread_notifications}, expected {count}')
+
+        if not drift:
+            click.echo('All unread notification counters are consistent.')
+        elif fix:
+            fix_unread_count_drift(drift)
+            click.echo(f'Fixed {len(drift)} user(s).')
+        else:
+            click.echo(f'{len(drift)} user(s) out of step; rerun with --fix to repair them.')
+            raise SystemExit(1)
+
+    @app.cli.command('prune-notifications')
+    @click.option('--days', type=int, help='Delete read notifications older than this (default: NOTIFICATION_RETENTION_DAYS).')
+    @click.option('--compact-after', type=int, help='Compact repeats older than this many hours (default: NOTIFICATION_COMPACT_AFTER_HOURS).')
+    def prune_notifications(days, compact_after):
+        """Delete old read notifications and compact repeated ones, as the hourly job does."""
+        from datetime import timedelta
+        from app.services.notification_retention import run_retention
+
+        report = run_retention(
+            days if days is not None else app.config['NOTIFICATION_RETENTION_DAYS'],
+            timedelta(hours=compact_after if compact_after is not None else app.config['NOTIFICATION_COMPACT_AFTER_HOURS']),
+            app.config['NOTIFICATION_COMPACT_TYPES']
+        )
+        click.echo(f'Notification retention: {report}.')
+
+    @app.cli.command('bench-broadcasts')
+    @click.option('--members', default=1000, show_default=True, help='Clients in the auction room.')
+    @click.option('--repeat', default=50, show_default=True, help='Broadcasts of each kind to average over.')
+    def bench_broadcasts(members, repeat):
+        """Compare the bytes and CPU of each broadcast before and after the compact event format."""
+        from app.utils.broadcast_benchmark import run
+
+        click.echo(f'{"event":<16}{"bytes":>22}{"packets":>18}{"CPU ms":>20}')
+        for name, legacy, typed in run(members, repeat):
+            columns = [f'{before} -> {after}' for before, after in zip(legacy[:2], typed[:2])]
+            columns.append(f'{legacy[2] * 1000:.2f} -> {typed[2] * 1000:.2f}')
+            click.echo(f'{name:<16}{columns[0]:>22}{columns[1]:>18}{columns[2]:>20}')
+
+    def run_on_scratch_database(benchmark):
+        """Run benchmark() if the database is empty and empty it again afterwards."""
+        from app.utils import bench_data
+
+        if not bench_data.is_empty():
+            click.echo(bench_data.NOT_EMPTY, err=True)
+            raise SystemExit(1)
+        try:
+            return benchmark()
+        finally:
+            bench_data.clear()
+
+    def echo_report(report):
+        width = max(len(name) for name in report)
+        for name, value in report.items():
+            click.echo(f'{name:<{width}}  {value}')
+
+    @app.cli.command('bench-closing')
+    @click.option('--auctions', default=50000, show_default=True, help='Expired auctions to close.')
+    @click.option('--batch-size', default=500, show_default=True, help='Auctions closed per transaction.')
+    def bench_closing(auctions, batch_size):
+        """Time closing a wave of expired auctions, as close_scheduler does (needs an empty database)."""
+        from app.utils.closing_benchmark import run
+
+        echo_report(run_on_scratch_database(lambda: run(auctions, batch_size)))
+
+    @app.cli.command('bench-alerts')
+    @click.option('--alerts', default=100000, show_default=True, help='Alerts to seed.')
+    @click.option('--auctions', default=20, show_default=True, help='New auctions to match through the index.')
+    @click.option('--linear', default=3, show_default=True, help='Of those, how many to also match one alert at a time.')
+    def bench_alerts(alerts, auctions, linear):
+        """Time matching new auctions against the alert index and against every alert in turn (needs an empty database)."""
+        from app.utils.alert_benchmark import run
+
+        echo_report(run_on_scratch_database(lambda: run(alerts, auctions, linear)))
+
+    @app.cli.command('bench-search')
+    @click.option('--items', default=1000000, show_default=True, help='Items (each with an auction) to seed.')
+    @click.option('--query', 'queries', multiple=True, help='Query to time; may be repeated (default: a fixed mix).')
+    def bench_search(items, queries):
+        """Time full-text search against the old ILIKE scan (needs an empty database)."""
+        from app.utils.search_benchmark import QUERIES, run
+
+        setup, results = run_on_scratch_database(lambda: run(items, queries or QUERIES))
+        echo_report(setup)
+        click.echo(f'\n{"query":<20}{"index ms":>10}{"matches":>10}{"ILIKE ms":>12}{"matches":>10}')
+        for query, search_ms, total, ilike_ms, ilike_total in results:
+            click.echo(f'{query:<20}{search_ms:>10.1f}{total:>10}{ilike_ms:>12.1f}{ilike_total:>10}')
+
+    @app.cli.command('bench-suggestions')
+    @click.option('--auctions', default=200000, show_default=True, help='Active auctions (each with its own item) to seed.')
+    @click.option('--prefix', 'prefixes', multiple=True, help='Prefix to time; may be repeated (default: a fixed mix).')
+    @click.option('--repeat', default=1000, show_default=True, help='Suggestions per prefix to time.')
+    def bench_suggestions(auctions, prefixes, repeat):
+        """Time search suggestions from the prefix index against the old ILIKE queries (needs an empty database)."""
+        from app.utils.suggestion_benchmark import PREFIXES, run
+
+        setup, results = run_on_scratch_database(lambda: run(auctions, prefixes or PREFIXES, repeat))
+        echo_report(setup)
+        click.echo(f'\n{"prefix":<16}{"index median ms":>18}{"index p99 ms":>15}{"ILIKE median ms":>18}')
+        for prefix, median, p99, ilike in results:
+            click.echo(f'{prefix:<16}{median:>18.3f}{p99:>15.3f}{ilike:>18.1f}')
+
+    @app.cli.command('bench-attributes')
+    @click.option('--attributes', default=50, show_default=True, help='Attributes on the item.')
+    @click.option('--repeat', default=2000, show_default=True, help='Calls of each kind to average over.')
+    def bench_attributes(attributes, repeat):
+        """Compare reading item attributes with and without the parsed cache, and json with orjson."""
+        from app.utils.attribute_benchmark import run
+
+        for what, microseconds in run(attributes, repeat):
+            timing = f'{microseconds:.1f} us' if microseconds is not None else 'orjson not installed'
+            click.echo(f'{what:<36}{timing:>22}')
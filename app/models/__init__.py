@@ -1,6 +1,6 @@
 # First import all individual models
 from app.models.user import User
-from app.models.item import Item, Category
+from app.models.item import Item, Category, CategoryClosure, ItemAttribute
 from app.models.auction import Auction
 from app.models.bid import Bid
 from app.models.alert import Alert
@@ -8,6 +8,11 @@ from app.models.review import Review
 from app.models.wishlist import Wishlist
 from app.models.category_attributes import CategoryAttribute
 from app.models.question import Question, Answer
+from app.models.lease import Lease
+from app.models.socket_message import SocketMessage
+from app.models.outbox import OutboxJob
+from app.models.cache_version import CacheVersion
+from app.models.search import SearchPosting, SearchDocument
 
 # Define the __all__ list
-__all__ = ['User', 'Item', 'Category', 'Auction', 'Bid', 'Alert', 'Wishlist', 'Review', 'CategoryAttribute', 'Question', 'Answer']
\ No newline at end of file
+__all__ = ['User', 'Item', 'Category', 'CategoryClosure', 'ItemAttribute', 'Auction', 'Bid', 'Alert', 'Wishlist', 'Review', 'CategoryAttribute', 'Question', 'Answer', 'Lease', 'SocketMessage', 'OutboxJob', 'CacheVersion', 'SearchPosting', 'SearchDocument']
\ No newline at end of file
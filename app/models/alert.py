@@ -7,6 +7,9 @@ logger = logging.getLogger(__name__)
 
 class Alert(db.Model):
     __tablename__ = 'alerts'
+    __table_args__ = (
+        db.Index('ix_alerts_user_id', 'user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -23,21 +26,37 @@ class Alert(db.Model):
     def __repr__(self):
         return f'<Alert {self.id}>'
     
+    @staticmethod
+    def parse_keywords(keywords):
+        """Split a comma-separated keyword string into lowercase keywords."""
+        return [k.strip().lower() for k in keywords.split(',')]
+    
+    @staticmethod
+    def auction_search_text(auction):
+        """Lowercase text of an auction that alert keywords are matched against."""
+        search_text = [
+            auction.title.lower(),
+            auction.description.lower() if auction.description else '',
+            auction.item.name.lower(),
+            auction.item.description.lower() if auction.item.description else ''
+        ]
+        
+        # Add attributes to search text
+        if hasattr(auction.item, 'attributes'):
+            try:
+                attributes = auction.item.attributes
+                if isinstance(attributes, dict):
+                    search_text.extend(str(v).lower() for v in attributes.values())
+            except Exception as e:
+                logger.warning(f"Error processing item attributes: {str(e)}")
+        
+        return ' '.join(filter(None, search_text))
+    
     def matches_item(self, item, auction):
         """Check if an item matches the alert criteria"""
-        # Category check
-        if self.category_id and item.category_id != self.category_id:
-            parent_cat = item.category.parent_id
-            # Check parent categories too
-            while parent_cat:
-                if parent_cat == self.category_id:
-                    break
-                parent_cat_obj = Category.query.get(parent_cat)
-                if not parent_cat_obj:
-                    break
-                parent_cat = parent_cat_obj.parent_id
-            else:
-                return False
+        # Category check, parent categories included
+        if self.category_id and self.category_id not in Category.ancestor_ids(item.category_id):
+            return False
         
         # Keyword check
         if self.keywords:
@@ -62,40 +81,16 @@ class Alert(db.Model):
         if self.category_id:
             logger.debug(f"Checking category match: alert category {self.category_id} vs auction category {auction.item.category_id}")
             if auction.item.category_id != self.category_id:
-                # Get all parent categories
-                parent_categories = set()
-                current_cat = auction.item.category
-                while current_cat and current_cat.parent_id:
-                    parent_categories.add(current_cat.parent_id)
-                    current_cat = Category.query.get(current_cat.parent_id)
-                
-                if self.category_id not in parent_categories:
+                # Check parent categories too
+                if self.category_id not in Category.ancestor_ids(auction.item.category_id):
                     logger.debug("Category mismatch")
                     return False
         
         # Keyword check
         if self.keywords:
             logger.debug(f"Checking keywords: {self.keywords}")
-            keywords = [k.strip().lower() for k in self.keywords.split(',')]
-            
-            # Combine all searchable text
-            search_text = [
-                auction.title.lower(),
-                auction.description.lower() if auction.description else '',
-                auction.item.name.lower(),
-                auction.item.description.lower() if auction.item.description else ''
-            ]
-            
-            # Add attributes to search text
-            if hasattr(auction.item, 'attributes'):
-                try:
-                    attributes = auction.item.attributes
-                    if isinstance(attributes, dict):
-                        search_text.extend(str(v).lower() for v in attributes.values())
-                except Exception as e:
-                    logger.warning(f"Error processing item attributes: {str(e)}")
-            
-            search_text = ' '.join(filter(None, search_text))
+            keywords = self.parse_keywords(self.keywords)
+            search_text = self.auction_search_text(auction)
             
             if not any(k in search_text for k in keywords):
                 logger.debug("No keyword matches found")
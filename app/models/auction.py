@@ -1,10 +1,17 @@
 from datetime import datetime
 from app import db
-from sqlalchemy import event
 from app.models.item import Item
+from app.models.bid import Bid
 
 class Auction(db.Model):
     __tablename__ = 'auctions'
+    __table_args__ = (
+        db.Index('ix_auctions_is_active_end_time', 'is_active', 'end_time'),
+        db.Index('ix_auctions_end_time', 'end_time'),
+        db.Index('ix_auctions_item_id', 'item_id'),
+        db.Index('ix_auctions_seller_id_created_at', 'seller_id', 'created_at'),
+        db.Index('ix_auctions_winner_id', 'winner_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False)
@@ -27,10 +34,17 @@ class Auction(db.Model):
     winner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
     winner_notified = db.Column(db.Boolean, default=False)
     
+    # Bid summary, kept in step with the bids table by the bid paths
+    current_price = db.Column(db.Float, default=lambda context: context.get_current_parameters()['initial_price'])
+    bid_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    leading_bidder_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    leading_bid_id = db.Column(db.Integer, nullable=True)
+    
     # Relationships
     item = db.relationship('Item', back_populates='auctions')
     seller = db.relationship('User', foreign_keys=[seller_id], back_populates='auctions_sold')
     winner = db.relationship('User', foreign_keys=[winner_id], back_populates='auctions_won')
+    leading_bidder = db.relationship('User', foreign_keys=[leading_bidder_id])
     bids = db.relationship('Bid', back_populates='auction', lazy=True)
     questions = db.relationship('Question', back_populates='auction')
     auction_reviews = db.relationship('Review', back_populates='auction')
@@ -38,25 +52,20 @@ class Auction(db.Model):
     def __repr__(self):
         return f'<Auction {self.title}>'
     
-    @property
-    def current_price(self):
-        """Return the current highest bid amount or the initial price if no bids"""
-        if not self.bids:
-            return self.initial_price
-        return max(bid.amount for bid in self.bids) if self.bids else self.initial_price
+    @classmethod
+    def get_for_update(cls, id):
+        """Load an auction and lock its row until the end of the transaction"""
+        return cls.query.filter_by(id=id).with_for_update().populate_existing().first()
     
     @property
     def highest_bidder(self):
         """Return the user with the highest bid"""
-        if not self.bids:
-            return None
-        highest_bid = max(self.bids, key=lambda bid: bid.amount)
-        return highest_bid.bidder
+        return self.leading_bidder
     
     @property
     def num_bids(self):
         """Return the number of bids"""
-        return len(self.bids) if self.bids else 0
+        return self.bid_count or 0
     
     @property
     def is_reserve_met(self):
@@ -66,43 +75,43 @@ class Auction(db.Model):
     @property
     def is_ended(self):
         """Check if the auction has ended"""
-        now = datetime.utcnow()
-        if now >= self.end_time:
-            if self.is_active:
-                self.is_active = False
-                db.session.commit()
-            return True
-        return False
+        return datetime.utcnow() >= self.end_time
+    
+    def record_bid(self, bid):
+        """Fold a newly inserted (and flushed) bid into the bid summary"""
+        self.bid_count = (self.bid_count or 0) + 1
+        if self.leading_bid_id is None or bid.amount > self.current_price:
+            self.current_price = bid.amount
+            self.leading_bid_id = bid.id
+            self.leading_bidder_id = bid.bidder_id
+    
+    def refresh_bid_summary(self):
+        """Recompute the bid summary from the bids table, e.g. after a bid is removed"""
+        highest_bid = Bid.query.filter_by(auction_id=self.id).order_by(Bid.amount.desc(), Bid.id.asc()).first()
+        self.bid_count = Bid.query.filter_by(auction_id=self.id).count()
+        if highest_bid:
+            self.current_price = highest_bid.amount
+            self.leading_bid_id = highest_bid.id
+            self.leading_bidder_id = highest_bid.bidder_id
+        else:
+            self.current_price = self.initial_price
+            self.leading_bid_id = None
+            self.leading_bidder_id = None
     
     def next_valid_bid_amount(self):
         """Calculate the minimum valid bid amount"""
         return self.current_price + self.min_increment
     
     def determine_winner(self):
-        """Determine the winner of the auction"""
-        if not self.is_ended:
-            return None
-            
-        if not self.bids:
-            self.is_active = False
-            db.session.commit()
+        """Return the user who wins the auction, or None if it is still running or the reserve was not met.
+        
+        This only reads the bid summary; closing the auction is done by
+        app.services.auction_closing.finalize_auction.
+        """
+        if not self.is_ended or not self.bid_count:
             return None
-            
-        highest_bid = max(self.bids, key=lambda bid: bid.amount)
-        if highest_bid.amount >= self.secret_min_price:
-            self.winner_id = highest_bid.bidder_id
-            self.is_active = False
-            db.session.commit()
-            return self.winner
-        return None
-    
-    def check_status(self):
-        """Check and update auction status"""
-        if self.is_ended and self.is_active:
-            self.is_active = False
-            winner = self.determine_winner()
-            db.session.commit()
-            return winner
+        if self.current_price >= self.secret_min_price:
+            return self.leading_bidder
         return None
     
     def get_bid_history(self):
@@ -120,12 +129,3 @@ class Auction(db.Model):
             Auction.is_active == True,
             Auction.end_time > datetime.utcnow()
         ).limit(limit).all()
-
-# Add event listener to automatically check status when loading auction
-@event.listens_for(Auction, 'load')
-def check_auction_status(target, context):
-    """Check auction status when loading from database"""
-    if target.is_active and datetime.utcnow() >= target.end_time:
-        target.is_active = False
-        target.determine_winner()
-        db.session.commit()
\ No newline at end of file
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class Bid(db.Model):
     __tablename__ = 'bids'
+    __table_args__ = (
+        db.Index('ix_bids_auction_id_amount', 'auction_id', db.desc('amount'), 'id'),
+        db.Index('ix_bids_bidder_id_created_at', 'bidder_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     auction_id = db.Column(db.Integer, db.ForeignKey('auctions.id'), nullable=False)
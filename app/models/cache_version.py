@@ -0,0 +1,15 @@
+from app import db
+
+class CacheVersion(db.Model):
+    """Version counter for data cached in every worker's memory.
+
+    Whoever changes the underlying data bumps the counter; each worker
+    reloads its copy once it sees a version it hasn't loaded.
+    """
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<CacheVersion {self.name} v{self.version}>'
@@ -1,12 +1,18 @@
 from datetime import datetime
 from app import db
+from sqlalchemy import delete, event, inspect, insert, select
 from flask_wtf import FlaskForm
 from wtforms import StringField, IntegerField, DecimalField, SelectField, DateField
 from wtforms.validators import InputRequired
 import json
+import re
+from app.utils import fastjson
 
 class Category(db.Model):
     __tablename__ = 'categories'
+    __table_args__ = (
+        db.Index('ix_categories_parent_id', 'parent_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64), nullable=False)
@@ -21,10 +27,117 @@ class Category(db.Model):
     
     def __repr__(self):
         return f'<Category {self.name}>'
+    
+    @staticmethod
+    def subtree_ids_select(category_id):
+        """SELECT of the ids of a category and all its descendants, for use in IN filters."""
+        return select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id == category_id)
+    
+    @staticmethod
+    def subtree_ids(category_id):
+        """Ids of a category and all its descendants."""
+        return [row[0] for row in db.session.execute(Category.subtree_ids_select(category_id))]
+    
+    @staticmethod
+    def ancestor_ids(category_id):
+        """Ids of a category and all its ancestors."""
+        return {row[0] for row in db.session.execute(
+            select(CategoryClosure.ancestor_id).where(CategoryClosure.descendant_id == category_id)
+        )}
+    
+    def get_all_subcategories(self):
+        """Get all subcategories at any depth, nearest first"""
+        return Category.query.join(
+            CategoryClosure, CategoryClosure.descendant_id == Category.id
+        ).filter(
+            CategoryClosure.ancestor_id == self.id,
+            CategoryClosure.depth > 0
+        ).order_by(CategoryClosure.depth, Category.id).all()
+
+
+class CategoryClosure(db.Model):
+    """Every (ancestor, descendant) pair of the category tree, including each category with itself.
+
+    Kept in step with categories by the mapper events below, so a subtree
+    or ancestor lookup is one indexed query instead of a walk.
+    """
+    __tablename__ = 'category_closure'
+    
+    ancestor_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True)
+    descendant_id = db.Column(db.Integer, db.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True, index=True)
+    depth = db.Column(db.Integer, nullable=False)
+    
+    @classmethod
+    def rebuild(cls, connection):
+        """Recompute the whole table from categories.parent_id."""
+        parents = dict(connection.execute(select(Category.id, Category.parent_id)).all())
+        rows = []
+        for category_id in parents:
+            ancestor, depth, seen = category_id, 0, set()
+            while ancestor is not None and ancestor not in seen:
+                seen.add(ancestor)
+                rows.append({'ancestor_id': ancestor, 'descendant_id': category_id, 'depth': depth})
+                ancestor, depth = parents.get(ancestor), depth + 1
+        connection.execute(delete(cls))
+        if rows:
+            connection.execute(insert(cls), rows)
+        return len(rows)
+
+
+closure = CategoryClosure.__table__
+
+
+@event.listens_for(Category, 'after_insert')
+def add_category_to_closure(mapper, connection, target):
+    connection.execute(insert(closure).values(ancestor_id=target.id, descendant_id=target.id, depth=0))
+    if target.parent_id:
+        connection.execute(insert(closure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            select(closure.c.ancestor_id, target.id, closure.c.depth + 1)
+            .where(closure.c.descendant_id == target.parent_id)
+        ))
+
+
+@event.listens_for(Category, 'after_update')
+def move_category_in_closure(mapper, connection, target):
+    if not inspect(target).attrs.parent_id.history.has_changes():
+        return
+    
+    subtree = connection.execute(
+        select(closure.c.descendant_id, closure.c.depth).where(closure.c.ancestor_id == target.id)
+    ).all()
+    subtree_ids = [row[0] for row in subtree]
+    if target.parent_id in subtree_ids:
+        raise ValueError('A category cannot be moved under itself or one of its subcategories')
+    
+    # Detach the subtree from its old ancestors, then hang it under the new ones
+    connection.execute(delete(closure).where(
+        closure.c.descendant_id.in_(subtree_ids),
+        closure.c.ancestor_id.notin_(subtree_ids)
+    ))
+    if target.parent_id:
+        ancestors = connection.execute(
+            select(closure.c.ancestor_id, closure.c.depth).where(closure.c.descendant_id == target.parent_id)
+        ).all()
+        connection.execute(insert(closure), [
+            {'ancestor_id': ancestor_id, 'descendant_id': descendant_id, 'depth': up + down + 1}
+            for ancestor_id, up in ancestors
+            for descendant_id, down in subtree
+        ])
+
+
+@event.listens_for(Category, 'before_delete')
+def remove_category_from_closure(mapper, connection, target):
+    connection.execute(delete(closure).where(
+        (closure.c.ancestor_id == target.id) | (closure.c.descendant_id == target.id)
+    ))
 
 
 class Item(db.Model):
     __tablename__ = 'items'
+    __table_args__ = (
+        db.Index('ix_items_category_id', 'category_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -42,15 +155,26 @@ class Item(db.Model):
     
     @property
     def attribute_values(self):
-        """Get the attribute values as a dictionary"""
-        if self.attributes:
-            return json.loads(self.attributes)
-        return {}
+        """Get the attribute values as a dictionary.
+        
+        The JSON is parsed once and the result kept until the attributes
+        column changes, so treat the dictionary as read-only and go through
+        the setter or set_attribute_value to change it.
+        """
+        if not self.attributes:
+            return {}
+        cached = self.__dict__.get('_parsed_attributes')
+        if cached is None or cached[0] != self.attributes:
+            cached = (self.attributes, fastjson.loads(self.attributes))
+            self._parsed_attributes = cached
+        return cached[1]
     
     @attribute_values.setter
     def attribute_values(self, values):
         """Set the attribute values from a dictionary"""
-        self.attributes = json.dumps(values)
+        values = dict(values)
+        self.attributes = fastjson.dumps(values)
+        self._parsed_attributes = (self.attributes, values)
     
     def get_attribute_value(self, name, default=None):
         """Get a specific attribute value"""
@@ -58,7 +182,7 @@ class Item(db.Model):
     
     def set_attribute_value(self, name, value):
         """Set a specific attribute value"""
-        values = self.attribute_values
+        values = dict(self.attribute_values)
         values[name] = value
         self.attribute_values = values
     
@@ -67,12 +191,13 @@ class Item(db.Model):
         if not self.category:
             return False, "Item must belong to a category"
         
+        values = self.attribute_values
         for attr in self.category.attributes:
-            if attr.required and attr.name not in self.attribute_values:
+            if attr.required and attr.name not in values:
                 return False, f"Required attribute '{attr.display_name}' is missing"
             
-            if attr.name in self.attribute_values:
-                value = self.attribute_values[attr.name]
+            if attr.name in values:
+                value = values[attr.name]
                 
                 if attr.attribute_type == 'number':
                     try:
@@ -84,4 +209,137 @@ class Item(db.Model):
                     if value not in attr.options_list:
                         return False, f"Invalid value for attribute '{attr.display_name}'"
         
-        return True, None
\ No newline at end of file
+        return True, None
+
+
+class ItemAttribute(db.Model):
+    """Typed copy of one attribute of an item, so items can be filtered on attributes in SQL.
+
+    Item.attributes stays the source of truth; the mapper events below
+    rewrite an item's rows whenever that JSON changes. Names and text
+    values are stored lowercased, and values that start with a number
+    (e.g. '256' or '256GB') also get value_number for range filters.
+    """
+    __tablename__ = 'item_attributes'
+    __table_args__ = (
+        db.Index('ix_item_attributes_name_text', 'name', 'value_text', 'item_id'),
+        db.Index('ix_item_attributes_name_number', 'name', 'value_number', 'item_id'),
+    )
+    
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id', ondelete='CASCADE'), primary_key=True)
+    name = db.Column(db.String(64), primary_key=True)
+    value_text = db.Column(db.String(255), nullable=False)
+    value_number = db.Column(db.Float)
+    
+    NUMBER = re.compile(r'^\s*(-?\d+(?:\.\d+)?)')
+    FILTER = re.compile(r'^\s*([^=<>!]+?)\s*(>=|<=|!=|=|>|<)\s*(.*?)\s*$')
+    
+    def __repr__(self):
+        return f'<ItemAttribute {self.name}={self.value_text} of item {self.item_id}>'
+    
+    @staticmethod
+    def number(value):
+        """The number a value starts with, or None."""
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        match = ItemAttribute.NUMBER.match(str(value))
+        return float(match.group(1)) if match else None
+    
+    @staticmethod
+    def rows_for(item_id, attributes):
+        """Index rows for an item's attributes JSON."""
+        try:
+            values = fastjson.loads(attributes) if attributes else {}
+        except ValueError:
+            return []
+        if not isinstance(values, dict):
+            return []
+        rows = {}
+        for name, value in values.items():
+            key = str(name).strip().lower()[:64]
+            if not key or value is None or isinstance(value, (dict, list)):
+                continue
+            rows[key] = {
+                'item_id': item_id,
+                'name': key,
+                'value_text': str(value).strip().lower()[:255],
+                'value_number': ItemAttribute.number(value)
+            }
+        return list(rows.values())
+    
+    @classmethod
+    def rebuild(cls, connection, batch_size=1000):
+        """Recompute the whole table from items.attributes."""
+        connection.execute(delete(cls))
+        count, last_id = 0, 0
+        while True:
+            items = connection.execute(
+                select(Item.id, Item.attributes).where(Item.id > last_id).order_by(Item.id).limit(batch_size)
+            ).all()
+            if not items:
+                break
+            rows = [row for item_id, attributes in items for row in cls.rows_for(item_id, attributes)]
+            if rows:
+                connection.execute(insert(cls), rows)
+            count += len(rows)
+            last_id = items[-1][0]
+        return count
+    
+    @staticmethod
+    def parse_filters(text):
+        """Parse 'brand=Apple, storage>=256' into (name, operator, value) triples; bad parts are skipped."""
+        filters = []
+        for part in (text or '').split(','):
+            match = ItemAttribute.FILTER.match(part)
+            if match and match.group(3):
+                filters.append((match.group(1).lower(), match.group(2), match.group(3)))
+        return filters
+    
+    @staticmethod
+    def filter_clause(name, operator, value):
+        """Condition on Item.id for one attribute filter, answered from the composite indexes."""
+        number = ItemAttribute.number(value)
+        if operator in ('>', '>=', '<', '<='):
+            if number is None:
+                return db.false()
+            column = ItemAttribute.value_number
+            condition = {'>': column > number, '>=': column >= number, '<': column < number, '<=': column <= number}[operator]
+        elif number is not None and ItemAttribute.NUMBER.match(value).group(0).strip() == value.strip():
+            # A plain number also matches '256GB' or '256.0'
+            condition = ItemAttribute.value_number == number
+        else:
+            condition = ItemAttribute.value_text == value.strip().lower()
+        
+        matching = select(ItemAttribute.item_id).where(ItemAttribute.name == name, condition)
+        if operator == '!=':
+            return Item.id.notin_(matching)
+        return Item.id.in_(matching)
+
+
+item_attributes = ItemAttribute.__table__
+
+
+def _write_item_attributes(connection, target):
+    connection.execute(delete(item_attributes).where(item_attributes.c.item_id == target.id))
+    rows = ItemAttribute.rows_for(target.id, target.attributes)
+    if rows:
+        connection.execute(insert(item_attributes), rows)
+
+
+@event.listens_for(Item, 'after_insert')
+def add_item_attributes(mapper, connection, target):
+    if target.attributes:
+        _write_item_attributes(connection, target)
+
+
+@event.listens_for(Item, 'after_update')
+def update_item_attributes(mapper, connection, target):
+    if inspect(target).attrs.attributes.history.has_changes():
+        _write_item_attributes(connection, target)
+
+
+@event.listens_for(Item, 'before_delete')
+def remove_item_attributes(mapper, connection, target):
+    connection.execute(delete(item_attributes).where(item_attributes.c.item_id == target.id))
@@ -0,0 +1,18 @@
+from datetime import datetime
+from app import db
+
+class Lease(db.Model):
+    """A named, time-limited claim held by one process in the cluster.
+
+    Used for leader election: whichever process holds the row's lease runs
+    the singleton background work (e.g. closing auctions) until it expires.
+    """
+    __tablename__ = 'leases'
+    
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Lease {self.name} held by {self.holder} until {self.expires_at}>'
@@ -1,9 +1,47 @@
 from app import db
+from collections import Counter, defaultdict
 from datetime import datetime
+from sqlalchemy import delete, event, func, insert, update
+from sqlalchemy.orm import object_session
+from app.models.user import User
+
+# session.info key holding the ids of the users whose unread count changed
+UNREAD_CHANGED = 'unread_notifications_changed'
+
+
+def _unread_changed(session, user_ids):
+    session.info.setdefault(UNREAD_CHANGED, set()).update(user_ids)
+
+
+def adjust_unread(connection, session, deltas):
+    """Add each delta ({user id: change}) to the users' unread counters; one UPDATE per distinct delta.
+
+    Whatever changes the unread notifications outside the ORM calls this
+    in the same transaction, so the counters stay exact.
+    """
+    users = User.__table__
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        connection.execute(
+            update(users)
+            .where(users.c.id.in_(user_ids))
+            .values(unread_notifications=users.c.unread_notifications + delta)
+        )
+        _unread_changed(session, user_ids)
+
 
 class Notification(db.Model):
     """Model for user notifications."""
     __tablename__ = 'notifications'
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notifications_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        db.Index('ix_notifications_reference_id', 'reference_id'),
+        db.Index('ix_notifications_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -12,6 +50,10 @@ class Notification(db.Model):
     reference_id = db.Column(db.Integer)  # ID of related entity (e.g., auction_id, question_id)
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # When the notification last repeated (see coalesce); created_at otherwise
+    updated_at = db.Column(db.DateTime, default=lambda context: context.get_current_parameters()['created_at'])
+    # How many notifications this row stands for once repeats are compacted
+    repeat_count = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationships
     user = db.relationship('User', back_populates='notifications', lazy=True)
@@ -24,18 +66,145 @@ class Notification(db.Model):
         self.is_read = False
     
     def mark_as_read(self):
-        """Mark the notification as read."""
-        self.is_read = True
+        """Mark the notification as read.
+
+        The conditional UPDATE only matches while the row is unread, so the
+        owner's counter drops once however many requests race to mark it.
+        """
+        if self.is_read:
+            return
+        result = db.session.execute(
+            update(Notification)
+            .where(Notification.id == self.id, Notification.is_read == False)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.expire(self, ['is_read'])
+        if result.rowcount:
+            adjust_unread(db.session.connection(), db.session, {self.user_id: -result.rowcount})
+    
+    @classmethod
+    def mark_all_read(cls, user_id, chunk_size=1000):
+        """Mark all notifications as read for a user. Returns the number marked.
+
+        Works through them chunk_size rows at a time and commits each chunk,
+        so a large inbox never holds its row locks for long.
+        """
+        total = 0
+        while True:
+            ids = [row[0] for row in db.session.query(cls.id).filter(
+                cls.user_id == user_id, cls.is_read == False
+            ).limit(chunk_size)]
+            if not ids:
+                break
+            result = db.session.execute(
+                update(cls)
+                .where(cls.id.in_(ids), cls.is_read == False)
+                .values(is_read=True)
+                .execution_options(synchronize_session=False)
+            )
+            # Subtract what was marked rather than zeroing, so a notification
+            # inserted concurrently still counts once it commits
+            adjust_unread(db.session.connection(), db.session, {user_id: -result.rowcount})
+            db.session.commit()
+            total += result.rowcount
+            if len(ids) < chunk_size:
+                break
+        return total
     
     @classmethod
-    def mark_all_read(cls, user_id):
-        """Mark all notifications as read for a user."""
-        cls.query.filter_by(user_id=user_id, is_read=False).update({'is_read': True})
+    def clear_all(cls, user_id, chunk_size=1000):
+        """Delete all notifications of a user, committing every chunk_size rows. Returns the number deleted."""
+        total = 0
+        while True:
+            ids = [row[0] for row in db.session.query(cls.id).filter(cls.user_id == user_id).limit(chunk_size)]
+            if not ids:
+                break
+            total += cls.delete_where(cls.id.in_(ids))
+            db.session.commit()
+            if len(ids) < chunk_size:
+                break
+        return total
+    
+    @classmethod
+    def delete_where(cls, *criteria):
+        """Delete the notifications matching criteria and uncount the unread ones. Returns the number deleted.
+
+        Unread rows are deleted user by user before the rest, so the row
+        counts of the DELETEs say exactly how many unread notifications each
+        user lost, even while some are being marked read meanwhile.
+        """
+        deltas = Counter()
+        while True:
+            # Again if unread rows were added meanwhile; until a pass finds none to delete
+            user_ids = [row[0] for row in db.session.query(cls.user_id).filter(*criteria, cls.is_read == False).distinct()]
+            unread_removed = 0
+            for user_id in user_ids:
+                removed = db.session.execute(
+                    delete(cls).where(*criteria, cls.user_id == user_id, cls.is_read == False)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                deltas[user_id] -= removed
+                unread_removed += removed
+            if not unread_removed:
+                break
+        read_removed = db.session.execute(
+            delete(cls).where(*criteria, cls.is_read == True).execution_options(synchronize_session=False)
+        ).rowcount
+        adjust_unread(db.session.connection(), db.session, deltas)
+        return read_removed - sum(deltas.values())
+    
+    @classmethod
+    def insert_many(cls, rows):
+        """Insert notification rows (dicts of user_id, type, message, reference_id) with one statement."""
+        if not rows:
+            return
+        db.session.execute(insert(cls), rows)
+        adjust_unread(db.session.connection(), db.session, Counter(row['user_id'] for row in rows))
+    
+    @classmethod
+    def coalesce(cls, user_id, type, message, reference_id, window, now=None):
+        """Notify a user, folding into their unread notification of the same type and reference repeated within the last window.
+
+        The folded notification takes the new message, moves updated_at to
+        now and counts one more repeat, so a burst reads as one (still
+        unread) entry. Its created_at stays put, so it keeps its place in
+        the inbox and its age for retention. Returns the new Notification,
+        or None if it was folded.
+        """
+        now = now or datetime.utcnow()
+        result = db.session.execute(
+            update(cls)
+            .where(
+                cls.user_id == user_id,
+                cls.is_read == False,
+                cls.updated_at >= now - window,
+                cls.type == type,
+                cls.reference_id == reference_id
+            )
+            .values(message=message, updated_at=now, repeat_count=cls.repeat_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            return None
+        notification = cls(user_id=user_id, type=type, message=message, reference_id=reference_id)
+        notification.created_at = notification.updated_at = now
+        db.session.add(notification)
+        return notification
     
     @classmethod
     def get_unread_count(cls, user_id):
         """Get the count of unread notifications for a user."""
-        return cls.query.filter_by(user_id=user_id, is_read=False).count()
+        return db.session.query(User.unread_notifications).filter(User.id == user_id).scalar() or 0
+    
+    @classmethod
+    def count_unread(cls):
+        """{user id: unread notifications} counted from the notifications table."""
+        return dict(
+            db.session.query(cls.user_id, func.count())
+            .filter(cls.is_read == False)
+            .group_by(cls.user_id)
+        )
     
     @classmethod
     def create_bid_notification(cls, user_id, auction_id, bid_amount):
@@ -90,5 +259,19 @@ class Notification(db.Model):
             'message': self.message,
             'is_read': self.is_read,
             'created_at': self.created_at.isoformat(),
-            'reference_id': self.reference_id
-        } 
\ No newline at end of file
+            'updated_at': (self.updated_at or self.created_at).isoformat(),
+            'reference_id': self.reference_id,
+            'repeat_count': self.repeat_count
+        }
+
+
+@event.listens_for(Notification, 'after_insert')
+def count_new_notification(mapper, connection, target):
+    if not target.is_read:
+        adjust_unread(connection, object_session(target), {target.user_id: 1})
+
+
+@event.listens_for(Notification, 'before_delete')
+def uncount_deleted_notification(mapper, connection, target):
+    if not target.is_read:
+        adjust_unread(connection, object_session(target), {target.user_id: -1})
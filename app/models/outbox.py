@@ -0,0 +1,29 @@
+from datetime import datetime
+from app import db
+
+class OutboxJob(db.Model):
+    """A side effect to run after the transaction that created it commits.
+
+    Written in the same transaction as the change it belongs to, so the job
+    exists exactly when the change does and survives restarts until a
+    worker has run it.
+    """
+    __tablename__ = 'outbox_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON arguments for the job's handler
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'running', 'done', 'failed'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    available_at = db.Column(db.DateTime, default=datetime.utcnow)  # not run before this time
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (
+        db.Index('ix_outbox_jobs_status_available_at', 'status', 'available_at'),
+    )
+    
+    def __repr__(self):
+        return f'<OutboxJob {self.id} {self.kind} {self.status}>'
@@ -3,6 +3,11 @@ from app import db
 
 class Question(db.Model):
     __tablename__ = 'questions'
+    __table_args__ = (
+        db.Index('ix_questions_status_created_at', 'status', 'created_at'),
+        db.Index('ix_questions_auction_id', 'auction_id'),
+        db.Index('ix_questions_user_id_created_at', 'user_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -30,6 +35,9 @@ class Question(db.Model):
 
 class Answer(db.Model):
     __tablename__ = 'answers'
+    __table_args__ = (
+        db.Index('ix_answers_question_id_created_at', 'question_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
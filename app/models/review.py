@@ -3,6 +3,10 @@ from app import db
 
 class Review(db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_reviews_seller_id_created_at', 'seller_id', 'created_at'),
+        db.Index('ix_reviews_auction_id', 'auction_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     auction_id = db.Column(db.Integer, db.ForeignKey('auctions.id'), nullable=False)
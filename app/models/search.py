@@ -0,0 +1,23 @@
+from app import db
+
+class SearchPosting(db.Model):
+    """One term of an auction's searchable text and how often it occurs there."""
+    __tablename__ = 'search_postings'
+    
+    term = db.Column(db.String(64), primary_key=True)
+    auction_id = db.Column(db.Integer, primary_key=True, index=True)
+    tf = db.Column(db.Integer, nullable=False)  # weighted term frequency
+    
+    def __repr__(self):
+        return f'<SearchPosting {self.term} in {self.auction_id}>'
+
+
+class SearchDocument(db.Model):
+    """Length of each indexed auction's text, for BM25 length normalisation."""
+    __tablename__ = 'search_documents'
+    
+    auction_id = db.Column(db.Integer, primary_key=True)
+    length = db.Column(db.Integer, nullable=False)
+    
+    def __repr__(self):
+        return f'<SearchDocument {self.auction_id} ({self.length} terms)>'
@@ -0,0 +1,18 @@
+from datetime import datetime
+from app import db
+
+class SocketMessage(db.Model):
+    """A Socket.IO message relayed between worker processes through the database."""
+    __tablename__ = 'socketio_messages'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    channel = db.Column(db.String(64), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    __table_args__ = (
+        db.Index('ix_socketio_messages_channel_id', 'channel', 'id'),
+    )
+    
+    def __repr__(self):
+        return f'<SocketMessage {self.id} on {self.channel}>'
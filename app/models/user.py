@@ -13,6 +13,8 @@ class User(UserMixin, db.Model):
     is_admin = db.Column(db.Boolean, default=False)
     is_customer_rep = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Kept in step by the Notification model; see Notification.insert_many
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     auctions_sold = db.relationship('Auction', foreign_keys='Auction.seller_id', back_populates='seller', lazy=True)
@@ -40,7 +42,13 @@ class User(UserMixin, db.Model):
     
     def get_unread_notifications(self):
         """Get all unread notifications for the user."""
-        return [notif for notif in self.notifications if not notif.is_read]
+        from app.models.notification import Notification
+        return Notification.query.filter_by(user_id=self.id, is_read=False)\
+            .order_by(Notification.created_at.desc()).all()
+    
+    def unread_notification_count(self):
+        """Number of unread notifications, from the stored counter."""
+        return self.unread_notifications or 0
     
     def get_auction_history(self):
         """Get all auctions where the user has placed bids."""
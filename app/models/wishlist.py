@@ -3,6 +3,10 @@ from app import db
 
 class Wishlist(db.Model):
     __tablename__ = 'wishlists'
+    __table_args__ = (
+        db.Index('ix_wishlists_user_id_item_id', 'user_id', 'item_id'),
+        db.Index('ix_wishlists_item_id', 'item_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
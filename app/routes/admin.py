@@ -14,6 +14,8 @@ import csv
 import pandas as pd
 from flask import send_file
 import json
+from app.services.job_queue import job_queue
+from app.services.category_tree import category_tree
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
 # Custom decorator to check if the user is an admin
@@ -49,6 +51,13 @@ def dashboard():
                           recent_users=recent_users,
                           recent_auctions=recent_auctions)
 
+@admin_bp.route('/metrics/jobs')
+@login_required
+@admin_required
+def job_metrics():
+    """Depth and lag of the background job queue."""
+    return jsonify(job_queue.metrics())
+
 @admin_bp.route('/reports')
 @login_required
 @admin_required
@@ -173,6 +182,7 @@ def create_category():
         
         db.session.add(category)
         db.session.commit()
+        category_tree.invalidate()
         
         flash('Category created successfully', 'success')
         return redirect(url_for('admin.manage_categories'))
@@ -711,7 +721,10 @@ def delete_user(user_id):
     
     # Delete user's data
     Auction.query.filter_by(seller_id=user_id).delete()
+    bid_auction_ids = [row[0] for row in db.session.query(Bid.auction_id).filter_by(bidder_id=user_id).distinct()]
     Bid.query.filter_by(bidder_id=user_id).delete()
+    for auction in Auction.query.filter(Auction.id.in_(bid_auction_ids)).all():
+        auction.refresh_bid_summary()
     Review.query.filter_by(reviewer_id=user_id).delete()
     Review.query.filter_by(seller_id=user_id).delete()
     
@@ -749,7 +762,11 @@ def delete_bid(bid_id):
         flash('Cannot delete bids from admin users.', 'danger')
         return redirect(url_for('admin.manage_users'))
     
+    # Lock the auction so its bid summary is recomputed against a stable set of bids
+    auction = Auction.get_for_update(bid.auction_id)
     db.session.delete(bid)
+    db.session.flush()
+    auction.refresh_bid_summary()
     db.session.commit()
     
     flash('Bid deleted successfully.', 'success')
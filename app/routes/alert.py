@@ -3,6 +3,8 @@ from flask_login import login_required, current_user
 from app import db
 from app.models import Alert, Category, Auction
 from datetime import datetime
+from app.services.alert_index import alert_index
+from app.services.category_tree import category_tree
 
 alert_bp = Blueprint('alert', __name__, url_prefix='/alert')
 
@@ -13,7 +15,7 @@ def manage():
     alerts = Alert.query.filter_by(user_id=current_user.id).all()
     
     # Get all categories for the dropdown
-    categories = Category.query.all()
+    categories = category_tree.all()
     
     return render_template('alert/manage.html', alerts=alerts, categories=categories)
 
@@ -46,6 +48,7 @@ def create():
     
     db.session.add(alert)
     db.session.commit()
+    alert_index.update(alert)
     
     flash('Alert created successfully', 'success')
     return redirect(url_for('alert.manage'))
@@ -62,6 +65,7 @@ def delete(id):
     
     db.session.delete(alert)
     db.session.commit()
+    alert_index.remove(id)
     
     flash('Alert deleted successfully', 'success')
     return redirect(url_for('alert.manage'))
@@ -79,6 +83,7 @@ def toggle(id):
     # Toggle the active status
     alert.is_active = not alert.is_active
     db.session.commit()
+    alert_index.update(alert)
     
     status = 'activated' if alert.is_active else 'deactivated'
     flash(f'Alert {status} successfully', 'success')
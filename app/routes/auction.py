@@ -1,11 +1,22 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify
 from flask_login import login_required, current_user
 from app import db, socketio
-from app.models import Auction, Item, Bid, Category, Alert, User, Question, Answer, Review
+from app.models import Auction, Item, ItemAttribute, Bid, Category, Alert, User, Question, Answer, Review
 from app.models.notification import Notification
 from datetime import datetime, timedelta
+from functools import partial
 from sqlalchemy import func, and_, or_
 from app.tasks import send_notification_email
+from app.services.bidding import AutoBidder, resolve_proxy_bids
+from app.services.auction_closing import finalize_auction
+from app.services.close_scheduler import close_scheduler
+from app.services.job_queue import job_queue
+from app.services.live_events import BID_UPDATE, NEW_ANSWER, NEW_BID, NOTIFICATION
+from app.services.notifications import notify_reps
+from app.services.category_tree import category_tree
+from app.services.search_engine import search_engine
+from app.services.search_facets import facet_counts
+from app.services.suggestions import suggestion_index
 from werkzeug.utils import secure_filename
 import os
 from flask import current_app
@@ -18,7 +29,7 @@ auction_bp = Blueprint('auction', __name__, url_prefix='/auction')
 
 def emit_notification(user_id, notification_data):
     """Emit a notification to a specific user."""
-    socketio.emit('notification', notification_data, room=f'user_{user_id}')
+    NOTIFICATION.emit(f'user_{user_id}', **notification_data)
 
 def allowed_file(filename):
     """Check if the file extension is allowed."""
@@ -39,41 +50,41 @@ def browse():
     category_id = request.args.get('category_id', type=int)
     min_price = request.args.get('min_price', type=float)
     max_price = request.args.get('max_price', type=float)
+    price_below = request.args.get('price_below', type=float)
     status = request.args.get('status', 'active')
     sort_by = request.args.get('sort', 'end_time_asc')
     search_query = request.args.get('q', '')
+    attribute_filter = request.args.get('attr', '').strip()
+    attribute_filters = ItemAttribute.parse_filters(attribute_filter)
     
     # Base query and current time
     current_time = datetime.utcnow()
     query = Auction.query.join(Item, Auction.item_id == Item.id)
     
-    # Search query
+    # Search query; auctions must contain every word
     if search_query:
-        query = query.filter(
-            or_(
-                Auction.title.ilike(f'%{search_query}%'),
-                Auction.description.ilike(f'%{search_query}%'),
-                Item.name.ilike(f'%{search_query}%'),
-                Item.description.ilike(f'%{search_query}%')
-            )
-        )
+        query, score = search_engine.filter(query, search_query)
+        if score is None:
+            query = query.filter(db.false())
     
     # Category and subcategories filter
     if category_id:
-        category = Category.query.get_or_404(category_id)
-        category_ids = [category.id]
-        def get_subcats(cat):
-            for sub in Category.query.filter_by(parent_id=cat.id).all():
-                category_ids.append(sub.id)
-                get_subcats(sub)
-        get_subcats(category)
-        query = query.filter(Item.category_id.in_(category_ids))
+        if category_tree.get(category_id) is None:
+            abort(404)
+        query = query.filter(Item.category_id.in_(Category.subtree_ids_select(category_id)))
+    
+    # Item attribute filters, e.g. brand=Apple, storage>=256
+    for name, operator, value in attribute_filters:
+        query = query.filter(ItemAttribute.filter_clause(name, operator, value))
     
     # Price filters
     if min_price is not None:
         query = query.filter(Auction.initial_price >= min_price)
     if max_price is not None:
         query = query.filter(Auction.initial_price <= max_price)
+    # Upper bound of a price facet bucket, which excludes it
+    if price_below is not None:
+        query = query.filter(Auction.initial_price < price_below)
         
     # Status filter
     if status == 'active':
@@ -93,89 +104,29 @@ def browse():
         query = query.order_by(Auction.created_at.desc())
     elif sort_by == 'oldest':
         query = query.order_by(Auction.created_at.asc())
-    # For price and bid sorting, we'll need to handle it after the query since they're properties
+    elif sort_by == 'price_asc':
+        query = query.order_by(Auction.current_price.asc(), Auction.id.asc())
+    elif sort_by == 'price_desc':
+        query = query.order_by(Auction.current_price.desc(), Auction.id.asc())
+    elif sort_by == 'bids_asc':
+        query = query.order_by(Auction.bid_count.asc(), Auction.id.asc())
+    elif sort_by == 'bids_desc':
+        query = query.order_by(Auction.bid_count.desc(), Auction.id.asc())
     
     # Pagination
     page = request.args.get('page', 1, type=int)
     per_page = 16
+    auctions = query.paginate(page=page, per_page=per_page, error_out=False)
     
-    # For price and bid count sorting, we need to retrieve all matching auctions first
-    # then sort them manually and paginate the results
-    if sort_by in ['price_asc', 'price_desc', 'bids_asc', 'bids_desc']:
-        all_matching_auctions = query.all()
-        
-        # Apply manual sorting
-        if sort_by == 'price_asc':
-            all_matching_auctions.sort(key=lambda x: x.current_price)
-        elif sort_by == 'price_desc':
-            all_matching_auctions.sort(key=lambda x: x.current_price, reverse=True)
-        elif sort_by == 'bids_asc':
-            all_matching_auctions.sort(key=lambda x: x.num_bids)
-        elif sort_by == 'bids_desc':
-            all_matching_auctions.sort(key=lambda x: x.num_bids, reverse=True)
-        
-        # Manual pagination
-        total = len(all_matching_auctions)
-        start = (page - 1) * per_page
-        end = min(start + per_page, total)
-        
-        # Create a manual pagination object
-        class ManualPagination:
-            def __init__(self, items, page, per_page, total):
-                self.items = items
-                self.page = page
-                self.per_page = per_page
-                self.total = total
-                
-            @property
-            def pages(self):
-                return max(1, self.total // self.per_page + (1 if self.total % self.per_page > 0 else 0))
-                
-            @property
-            def has_prev(self):
-                return self.page > 1
-                
-            @property
-            def has_next(self):
-                return self.page < self.pages
-                
-            @property
-            def prev_num(self):
-                return self.page - 1
-                
-            @property
-            def next_num(self):
-                return self.page + 1
-                
-            def iter_pages(self, left_edge=2, left_current=2, right_current=3, right_edge=2):
-                last = 0
-                for num in range(1, self.pages + 1):
-                    if num <= left_edge or \
-                       (num > self.page - left_current - 1 and num < self.page + right_current) or \
-                       num > self.pages - right_edge:
-                        if last + 1 != num:
-                            yield None
-                        yield num
-                        last = num
-        
-        auctions = ManualPagination(
-            all_matching_auctions[start:end],
-            page,
-            per_page,
-            total
-        )
-    else:
-        # Use SQLAlchemy's pagination for other sorting methods
-        auctions = query.paginate(page=page, per_page=per_page, error_out=False)
-    
-    # Top-level categories for sidebar
-    categories = Category.query.filter_by(parent_id=None).all()
+    # Top-level categories for sidebar, with result counts for each filter option
+    categories = category_tree.roots()
+    facets = facet_counts(search_query, category_id, min_price, max_price, status, attribute_filters, price_below)
     
-    return render_template('auction/browse.html', auctions=auctions,
+    return render_template('auction/browse.html', auctions=auctions, facets=facets,
                            categories=categories, category_id=category_id,
-                           min_price=min_price, max_price=max_price,
+                           min_price=min_price, max_price=max_price, price_below=price_below,
                            status=status, sort_by=sort_by,
-                           search_query=search_query)
+                           search_query=search_query, attribute_filter=attribute_filter)
 
 @auction_bp.route('/create', methods=['GET', 'POST'])
 @login_required
@@ -269,75 +220,20 @@ def create():
             is_active=True  # Ensure auction starts as active
         )
         
-        # Save both item and auction
+        # Save both item and auction; the notifications are sent by a background job
         db.session.add(auction)
+        db.session.flush()
+        job = job_queue.enqueue('auction_created', auction_id=auction.id)
         db.session.commit()
+        close_scheduler.schedule(auction.id, auction.end_time)
+        suggestion_index.add(auction)
+        job_queue.submit(job)
         
-        # Notify customer reps about new auction
-        customer_reps = User.query.filter_by(is_customer_rep=True).all()
-        for rep in customer_reps:
-            notification = Notification.create_new_auction_notification(auction.id, rep.id)
-            db.session.add(notification)
-        
-        # Send a single notification to all customer reps 
-        socketio.emit('notification', {
-            'title': 'New Auction Posted',
-            'message': f'New auction: "{auction.title}"',
-            'type': 'new_auction',
-            'link': f'/auction/{auction.id}'
-        }, room='customer_reps')
-        
-        # Check for matching alerts
-        alerts = Alert.query.filter_by(is_active=True).all()
-        logger = logging.getLogger(__name__)
-        logger.info(f"Found {len(alerts)} active alerts to check for auction {auction.id}")
-        
-        for alert in alerts:
-            try:
-                logger.info(f"Checking alert {alert.id} (keywords: {alert.keywords}, category: {alert.category_id}) against auction {auction.id}")
-                if alert.matches_auction(auction):
-                    logger.info(f"Alert {alert.id} matches auction {auction.id}")
-                    notification = Notification(
-                        user_id=alert.user_id,
-                        type='alert_match',
-                        message=f'New auction matches your alert: "{auction.title}"',
-                        reference_id=auction.id
-                    )
-                    db.session.add(notification)
-                    
-                    # Send real-time notification directly with socketio.emit
-                    socketio.emit('notification', {
-                        'title': 'Alert Match',
-                        'message': notification.message,
-                        'type': notification.type,
-                        'link': f'/auction/{auction.id}'
-                    }, room=f'user_{alert.user_id}')
-                    
-                    # Also emit a specific alert match event that client code can listen for
-                    socketio.emit('new_auction_alert', {
-                        'auction_id': auction.id,
-                        'auction_title': auction.title,
-                        'message': notification.message
-                    }, room=f'user_{alert.user_id}')
-                    
-                    logger.info(f"Real-time notification sent to user {alert.user_id}")
-                else:
-                    logger.info(f"Alert {alert.id} does NOT match auction {auction.id}")
-            except Exception as e:
-                logger.error(f"Error processing alert {alert.id}: {str(e)}")
-                continue
-        
-        db.session.commit()
         flash('Auction created successfully!', 'success')
         return redirect(url_for('auction.view', id=auction.id))
     
     # GET request - show the create form with categories
-    categories = Category.query.filter_by(parent_id=None).all()
-    # Eager load subcategories to avoid N+1 queries
-    for category in categories:
-        _ = [s for s in category.subcategories]  # Force load subcategories
-        for subcategory in category.subcategories:
-            _ = [s for s in subcategory.subcategories]  # Force load sub-subcategories
+    categories = category_tree.roots()
     return render_template('auction/create.html', categories=categories)
 
 @auction_bp.route('/<int:id>')
@@ -345,44 +241,9 @@ def view(id):
     """View auction details."""
     auction = Auction.query.get_or_404(id)
     
-    # Check auction status
-    winner = auction.check_status()
-    if winner and not auction.winner_notified:
-        # Send notification to winner
-        notification = Notification(
-            user_id=winner.id,
-            type='auction_won',
-            message=f'Congratulations! You have won the auction for "{auction.title}"!',
-            reference_id=auction.id
-        )
-        db.session.add(notification)
-        
-        # Send notification to seller
-        seller_notification = Notification(
-            user_id=auction.seller_id,
-            type='auction_ended',
-            message=f'Your auction "{auction.title}" has ended. The winner is {winner.username}.',
-            reference_id=auction.id
-        )
-        db.session.add(seller_notification)
-        
-        auction.winner_notified = True
-        db.session.commit()
-        
-        # Send real-time notifications
-        socketio.emit('notification', {
-            'title': 'Auction Won',
-            'message': notification.message,
-            'type': notification.type,
-            'link': url_for('auction.view', id=auction.id)
-        }, room=f'user_{winner.id}')
-        
-        socketio.emit('notification', {
-            'title': 'Auction Ended',
-            'message': seller_notification.message,
-            'type': seller_notification.type,
-            'link': url_for('auction.view', id=auction.id)
-        }, room=f'user_{auction.seller_id}')
+    # Close the auction if its end time has passed (a no-op once it is closed)
+    if auction.is_active and auction.is_ended:
+        finalize_auction(auction)
     
     bids = auction.get_bid_history()
     is_ended = auction.is_ended
@@ -401,7 +262,10 @@ def view(id):
 @login_required
 def place_bid(id):
     """Handle manual and automatic (proxy) bids."""
-    auction = Auction.query.get_or_404(id)
+    # Lock the auction row so validation and the bid summary update see the same price
+    auction = Auction.get_for_update(id)
+    if not auction:
+        abort(404)
     now = datetime.utcnow()
     if not auction.is_active or auction.end_time <= now:
         flash('This auction has ended.', 'danger')
@@ -425,6 +289,8 @@ def place_bid(id):
         flash('Auto-bid limit must exceed your bid.', 'danger')
         return redirect(url_for('auction.view', id=id))
 
+    # Everyone who leads during this request, in order
+    leaders = [auction.leading_bidder_id]
     bid = Bid(
         auction_id=id,
         bidder_id=current_user.id,
@@ -433,34 +299,43 @@ def place_bid(id):
         is_auto_bid=False
     )
     db.session.add(bid)
+    db.session.flush()
+    auction.record_bid(bid)
     db.session.commit()
+    leaders.append(auction.leading_bidder_id)
 
     # Emit new bid event
-    socketio.emit('new_bid', {
-        'bid_id': bid.id,
-        'auction_id': auction.id,
-        'bidder_username': current_user.username,
-        'amount': bid_amount,
-        'created_at': bid.created_at.isoformat(),
-        'is_auto_bid': False,
-        'is_customer_rep': current_user.is_customer_rep
-    }, room=f'auction_{id}')
+    NEW_BID.emit(
+        f'auction_{id}',
+        bid_id=bid.id,
+        auction_id=auction.id,
+        bidder_username=current_user.username,
+        amount=bid_amount,
+        created_at=bid.created_at,
+        is_auto_bid=False,
+        is_customer_rep=current_user.is_customer_rep,
+        total_bids=auction.bid_count
+    )
 
     # Process automatic bidding
-    process_auto_bidding(auction)
+    leaders.extend(process_auto_bidding(auction))
     
     # Notify other bidders
-    notify_other_bidders(auction, bid)
+    notify_other_bidders(auction, leaders)
     
     flash('Your bid has been placed.', 'success')
     return redirect(url_for('auction.view', id=id))
 
 def process_auto_bidding(auction):
-    """Process automatic bidding (proxy bidding) for an auction."""
-    # Get current highest bid
-    highest_bid = Bid.query.filter_by(auction_id=auction.id).order_by(Bid.amount.desc()).first()
-    if not highest_bid:
-        return
+    """Process automatic bidding (proxy bidding) for an auction.
+    
+    The proxy bids are committed before any of their socket events are
+    sent. Returns the leader after each proxy bid placed, in order.
+    """
+    # Re-lock the auction; its bid summary holds the current highest bid
+    auction = Auction.get_for_update(auction.id)
+    if not auction or not auction.bid_count:
+        return []
 
     # Get all unique users with auto-bids for this auction, taking their highest auto_bid_limit
     auto_bidders = (
@@ -473,155 +348,147 @@ def process_auto_bidding(auction):
             Bid.auto_bid_limit.isnot(None)
         )
         .group_by(Bid.bidder_id)
-        .order_by(func.max(Bid.auto_bid_limit).desc())
+        .order_by(func.max(Bid.auto_bid_limit).desc(), func.min(Bid.id).asc())
         .all()
     )
     
-    if not auto_bidders:
-        return
+    # Resolve the whole bidding war at once and place only the bids that decide it
+    proxy_bids = resolve_proxy_bids(
+        auction.current_price,
+        auction.leading_bidder_id,
+        [AutoBidder(row.bidder_id, row.max_limit) for row in auto_bidders],
+        auction.min_increment
+    )
+    if not proxy_bids:
+        db.session.commit()
+        return []
     
-    # Determine the two highest auto-bidders
-    if len(auto_bidders) >= 2:
-        # Get the bidder with the highest limit
-        highest_auto_bidder = auto_bidders[0]
-        second_highest_auto_bidder = auto_bidders[1]
-        
-        # If the highest auto-bidder isn't the current highest bidder, they should outbid
-        if highest_auto_bidder.bidder_id != highest_bid.bidder_id:
-            # Find the bidder's actual bid record that has this auto_bid_limit
-            bidder_auto_bid = Bid.query.filter_by(
-                auction_id=auction.id,
-                bidder_id=highest_auto_bidder.bidder_id,
-                auto_bid_limit=highest_auto_bidder.max_limit
-            ).first()
-            
-            if bidder_auto_bid:
-                # Calculate the minimum amount needed to outbid the current highest bid
-                new_amount = min(
-                    highest_auto_bidder.max_limit,
-                    highest_bid.amount + auction.min_increment
-                )
-                
-                # Place the auto-bid
-                place_auto_bid(auction, bidder_auto_bid, new_amount)
-                
-                # Recursively call auto-bidding again in case further auto-bids need to trigger
-                process_auto_bidding(auction)
-                
-        # If the highest auto-bidder is already winning but second highest has a higher limit
-        # than the current bid, the second highest should bid up to their limit
-        elif highest_auto_bidder.bidder_id == highest_bid.bidder_id and second_highest_auto_bidder:
-            # Find the second bidder's actual bid record
-            second_bidder_auto_bid = Bid.query.filter_by(
-                auction_id=auction.id,
-                bidder_id=second_highest_auto_bidder.bidder_id,
-                auto_bid_limit=second_highest_auto_bidder.max_limit
-            ).first()
-            
-            if second_bidder_auto_bid and second_highest_auto_bidder.max_limit > highest_bid.amount:
-                # Calculate the minimum amount needed to outbid the current highest bid
-                new_amount = min(
-                    second_highest_auto_bidder.max_limit,
-                    highest_bid.amount + auction.min_increment
-                )
-                
-                # Place the auto-bid
-                place_auto_bid(auction, second_bidder_auto_bid, new_amount)
-                
-                # Recursively call auto-bidding again
-                process_auto_bidding(auction)
+    leaders = []
+    pending = []
+    for proxy_bid in proxy_bids:
+        pending.extend(place_auto_bid(auction, proxy_bid.bidder_id, proxy_bid.limit, proxy_bid.amount))
+        leaders.append(auction.leading_bidder_id)
+    
+    db.session.commit()
+    
+    # Only tell clients once the bids are durable
+    for send in pending:
+        send()
+    return leaders
 
-def place_auto_bid(auction, original_bid, new_amount):
-    """Helper function to place an auto-bid and send notifications"""
+def place_auto_bid(auction, bidder_id, auto_bid_limit, new_amount):
+    """Helper function to place an auto-bid and store its notifications.
+    
+    The caller is responsible for committing the session and then calling
+    each of the returned functions, which send the socket events.
+    """
     # Get the bidder to ensure they exist
-    bidder = User.query.get(original_bid.bidder_id)
+    bidder = User.query.get(bidder_id)
     if not bidder:
-        return  # Skip if bidder doesn't exist
+        return []  # Skip if bidder doesn't exist
         
     new_bid = Bid(
         auction_id=auction.id,
-        bidder_id=original_bid.bidder_id,
+        bidder_id=bidder_id,
         amount=new_amount,
-        auto_bid_limit=original_bid.auto_bid_limit,
+        auto_bid_limit=auto_bid_limit,
         is_auto_bid=True
     )
     db.session.add(new_bid)
     db.session.flush()  # Get the ID and created_at without committing
+    auction.record_bid(new_bid)
     
-    # Emit new auto-bid event
-    socketio.emit('new_bid', {
-        'bid_id': new_bid.id,
-        'auction_id': auction.id,
-        'bidder_username': bidder.username,
-        'amount': new_amount,
-        'created_at': new_bid.created_at.isoformat() if new_bid.created_at else datetime.utcnow().isoformat(),
-        'is_auto_bid': True,
-        'is_customer_rep': bidder.is_customer_rep
-    }, room=f'auction_{auction.id}')
-    
-    # Create notification for auto-bid
-    notification = Notification(
-        user_id=original_bid.bidder_id,
-        type='auto_bid',
-        message=f'Your auto-bid of ${new_amount:.2f} was placed on auction "{auction.title}"',
-        reference_id=auction.id
+    # New auto-bid event
+    pending = [partial(
+        NEW_BID.emit,
+        f'auction_{auction.id}',
+        bid_id=new_bid.id,
+        auction_id=auction.id,
+        bidder_username=bidder.username,
+        amount=new_amount,
+        created_at=new_bid.created_at or datetime.utcnow(),
+        is_auto_bid=True,
+        is_customer_rep=bidder.is_customer_rep,
+        total_bids=auction.bid_count
+    )]
+    
+    # Create notification for auto-bid; a burst of auto-bids shows as one
+    message = f'Your auto-bid of ${new_amount:.2f} was placed on auction "{auction.title}"'
+    Notification.coalesce(
+        bidder_id, 'auto_bid', message, auction.id,
+        window=timedelta(seconds=current_app.config['NOTIFICATION_DEBOUNCE_SECONDS'])
     )
-    db.session.add(notification)
     
-    # Send real-time notification
-    socketio.emit('user_notification', {
+    # Real-time notification
+    pending.append(partial(socketio.emit, 'user_notification', {
         'title': 'Auto-bid Placed',
-        'message': notification.message,
+        'message': message,
         'type': 'info',
         'link': url_for('auction.view', id=auction.id)
-    }, room=f'user_{original_bid.bidder_id}')
+    }, room=f'user_{bidder_id}'))
     
     # Notify if auto-bid limit is reached
-    if new_amount >= original_bid.auto_bid_limit:
+    if new_amount >= auto_bid_limit:
         notification = Notification(
-            user_id=original_bid.bidder_id,
+            user_id=bidder_id,
             type='auto_bid_limit',
-            message=f'Your auto-bid limit of ${original_bid.auto_bid_limit:.2f} has been reached for auction "{auction.title}"',
+            message=f'Your auto-bid limit of ${auto_bid_limit:.2f} has been reached for auction "{auction.title}"',
             reference_id=auction.id
         )
         db.session.add(notification)
         
-        # Send real-time notification
-        socketio.emit('user_notification', {
+        # Real-time notification
+        pending.append(partial(socketio.emit, 'user_notification', {
             'title': 'Auto-bid Limit Reached',
             'message': notification.message,
             'type': 'warning',
             'link': url_for('auction.view', id=auction.id)
-        }, room=f'user_{original_bid.bidder_id}')
+        }, room=f'user_{bidder_id}'))
     
-    db.session.commit()
+    return pending
 
-def notify_other_bidders(auction, new_bid):
-    """Notify other bidders about new bids."""
-    other_bidders = set()
-    for bid in auction.bids:
-        if bid.bidder_id != new_bid.bidder_id:
-            other_bidders.add(bid.bidder)
-    
-    for bidder in other_bidders:
-        # Create notification
-        notification = Notification(
-            user_id=bidder.id,
-            type='outbid',
-            message=f'You have been outbid on auction "{auction.title}". New bid: ${new_bid.amount:.2f}',
-            reference_id=auction.id
-        )
-        db.session.add(notification)
-        
-        # Send real-time notification
-        socketio.emit('user_notification', {
-            'title': 'You Have Been Outbid',
-            'message': notification.message,
-            'type': 'warning',
-            'link': url_for('auction.view', id=auction.id)
-        }, room=f'user_{bidder.id}')
+def notify_other_bidders(auction, leaders, **update):
+    """Tell the room the new price and every bidder who lost the lead that they were outbid.
+
+    leaders is everyone who led during the request, in order: the leader
+    before it, after the new bid and after each proxy bid. Called once the
+    bid and any proxy bids it set off are committed. Only losing the lead is
+    worth a stored notification; everyone else watching gets one bid_update
+    event for the room, with any further BID_UPDATE fields given in update.
+    Repeated outbid notifications within NOTIFICATION_DEBOUNCE_SECONDS are
+    merged into the unread one.
+    """
+    db.session.refresh(auction)
+    BID_UPDATE.emit(
+        f'auction_{auction.id}',
+        auction_id=auction.id,
+        current_price=auction.current_price,
+        next_min_bid=auction.next_valid_bid_amount(),
+        num_bids=auction.bid_count,
+        highest_bidder_id=auction.leading_bidder_id,
+        **update
+    )
+    
+    outbid = [
+        user_id for user_id in dict.fromkeys(leaders)
+        if user_id is not None and user_id != auction.leading_bidder_id
+    ]
+    if not outbid:
+        return
     
+    message = f'You have been outbid on auction "{auction.title}". New bid: ${auction.current_price:.2f}'
+    window = timedelta(seconds=current_app.config['NOTIFICATION_DEBOUNCE_SECONDS'])
+    for user_id in outbid:
+        Notification.coalesce(user_id, 'outbid', message, auction.id, window=window)
     db.session.commit()
+    
+    # Send real-time notification
+    socketio.emit('user_notification', {
+        'title': 'You Have Been Outbid',
+        'message': message,
+        'type': 'warning',
+        'link': url_for('auction.view', id=auction.id)
+    }, room=[f'user_{user_id}' for user_id in outbid])
 
 @auction_bp.route('/<int:id>/history')
 def bid_history(id):
@@ -689,9 +556,14 @@ def end_auction(id):
         flash('Auction is already ended.', 'warning')
         return redirect(url_for('auction.view', id=id))
         
-    auction.is_active = False
     auction.end_time = datetime.utcnow()
-    winner = auction.determine_winner()
+    db.session.commit()
+    close_scheduler.cancel(auction.id)
+    suggestion_index.remove(auction.id)
+    if not finalize_auction(auction):
+        flash('Auction is already ended.', 'warning')
+        return redirect(url_for('auction.view', id=id))
+    winner = auction.winner
     
     if winner:
         send_notification_email(
@@ -735,10 +607,7 @@ def ask_question(auction_id):
     db.session.commit()
     
     # Notify customer reps about the new question
-    customer_reps = User.query.filter_by(is_customer_rep=True).all()
-    for rep in customer_reps:
-        notification = Notification.create_question_notification(question.id, auction_id, rep.id)
-        db.session.add(notification)
+    notify_reps('new_question', f"New question posted on auction {auction_id}", question.id)
     
     # Send notification to all customer reps
     socketio.emit('new_question', {
@@ -795,22 +664,31 @@ def answer_question(question_id):
     notification = Notification.create_answer_notification(answer.id, question_id, question.user_id)
     db.session.add(notification)
     try:
-        socketio.emit('notification', {
-            'title': 'Question Answered',
-            'message': f'Your question has been answered on auction: "{question.auction.title}"',
-            'type': 'question_answered',
-            'link': f'/auction/{question.auction_id}'
-        }, room=f'user_{question.user_id}')
+        NOTIFICATION.emit(
+            f'user_{question.user_id}',
+            title='Question Answered',
+            message=f'Your question has been answered on auction: "{question.auction.title}"',
+            type='question_answered',
+            link=f'/auction/{question.auction_id}'
+        )
     except Exception as e:
         logger.error(f"Failed to send real-time notification to user {question.user_id}: {str(e)}")
     
-    # Emit socket event
-    socketio.emit('new_answer', {
-        'answer_id': answer.id,
-        'question_id': question_id,
-        'auction_id': question.auction_id,
-        'user_id': current_user.id
-    })
+    # Tell the auction's room
+    NEW_ANSWER.emit(
+        f'auction_{question.auction_id}',
+        answer_id=answer.id,
+        question_id=question_id,
+        auction_id=question.auction_id,
+        auction_title=question.auction.title,
+        user_id=current_user.id,
+        question_user_id=question.user_id,
+        question_status=question.status,
+        answer_text=answer.answer_text,
+        answer_username=current_user.username,
+        answerer_is_rep=current_user.is_customer_rep,
+        answer_timestamp=answer.created_at
+    )
     
     db.session.commit()
     flash('Your answer has been posted', 'success')
@@ -831,15 +709,7 @@ def create_question(auction_id):
     db.session.add(question)
     
     # Create notification for customer representatives
-    customer_reps = User.query.filter_by(is_customer_rep=True).all()
-    for rep in customer_reps:
-        notification = Notification(
-            user_id=rep.id,
-            type='new_question',
-            message=f'New question posted for auction: {auction.title}',
-            reference_id=auction.id
-        )
-        db.session.add(notification)
+    notify_reps('new_question', f'New question posted for auction: {auction.title}', auction.id)
     
     db.session.commit()
     
@@ -895,17 +765,19 @@ def create_answer(auction_id, question_id):
     db.session.commit()
     
     # Emit socket event with updated question data
-    socketio.emit('new_answer', {
-        'answer_id': answer.id,
-        'question_id': question_id,
-        'auction_id': auction_id,
-        'user_id': current_user.id,
-        'question_user_id': question.user_id,
-        'answer_text': answer.answer_text,
-        'answer_username': current_user.username,
-        'answer_timestamp': answer.created_at.isoformat(),
-        'question_status': question.status
-    }, room=f'auction_{auction_id}')
+    NEW_ANSWER.emit(
+        f'auction_{auction_id}',
+        answer_id=answer.id,
+        question_id=question_id,
+        auction_id=auction_id,
+        user_id=current_user.id,
+        question_user_id=question.user_id,
+        answer_text=answer.answer_text,
+        answer_username=current_user.username,
+        answerer_is_rep=current_user.is_customer_rep,
+        answer_timestamp=answer.created_at,
+        question_status=question.status
+    )
     
     return jsonify({
         'success': True,
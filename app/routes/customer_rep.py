@@ -1,10 +1,14 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, abort, jsonify
 from flask_login import login_required, current_user
-from app import db, socketio
+from app import db
 from app.models import User, Auction, Bid, Question, Answer, Review, Alert
 from app.models.notification import Notification
 from datetime import datetime,timezone
 from functools import wraps
+from app.services.close_scheduler import close_scheduler
+from app.services.live_events import NEW_ANSWER, NOTIFICATION
+from app.services.alert_index import alert_index
+from app.services.suggestions import suggestion_index
 
 customer_rep_bp = Blueprint('customer_rep', __name__, url_prefix='/customer_rep')
 
@@ -75,20 +79,25 @@ def delete_user(id):
         # Delete all related data
         # Delete user's auctions
         Auction.query.filter_by(seller_id=id).delete()
-        # Delete user's bids
+        # Delete user's bids and recompute the bid summary of the auctions they bid on
+        bid_auction_ids = [row[0] for row in db.session.query(Bid.auction_id).filter_by(bidder_id=id).distinct()]
         Bid.query.filter_by(bidder_id=id).delete()
+        for auction in Auction.query.filter(Auction.id.in_(bid_auction_ids)).all():
+            auction.refresh_bid_summary()
         # Delete user's questions
         Question.query.filter_by(user_id=id).delete()
         # Delete user's answers
         Answer.query.filter_by(user_id=id).delete()
-        # Delete user's alerts
+        # Delete user's alerts; a bulk delete skips the mapper events that tell the other workers
         Alert.query.filter_by(user_id=id).delete()
+        alert_index.invalidate(db.session.connection())
         # Delete user's notifications
         Notification.query.filter_by(user_id=id).delete()
         
         # Finally, delete the user
         db.session.delete(user)
         db.session.commit()
+        alert_index.remove_user(id)
         
         flash(f'User {user.username} has been deleted successfully.', 'success')
     except Exception as e:
@@ -223,24 +232,27 @@ def answer_question(question_id):
         db.session.commit()
         
         # Emit socket event to update all users viewing the auction
-        socketio.emit('new_answer', {
-            'question_id': question.id,
-            'auction_id': question.auction_id,
-            'user_id': current_user.id,
-            'question_user_id': question.user_id,
-            'answer_text': answer_text,
-            'answer_username': current_user.username,
-            'answer_timestamp': datetime.utcnow().isoformat(),
-            'auction_title': question.auction.title
-        }, room=f'auction_{question.auction_id}')
+        NEW_ANSWER.emit(
+            f'auction_{question.auction_id}',
+            answer_id=answer.id,
+            question_id=question.id,
+            auction_id=question.auction_id,
+            user_id=current_user.id,
+            question_user_id=question.user_id,
+            answer_text=answer_text,
+            answer_username=current_user.username,
+            answer_timestamp=answer.created_at,
+            auction_title=question.auction.title
+        )
         
         # Emit notification to the user who asked the question
-        socketio.emit('notification', {
-            'title': 'Question Answered',
-            'message': notification.message,
-            'type': notification.type,
-            'link': f'/auction/{question.auction_id}'
-        }, room=f'user_{question.user_id}')
+        NOTIFICATION.emit(
+            f'user_{question.user_id}',
+            title='Question Answered',
+            message=notification.message,
+            type=notification.type,
+            link=f'/auction/{question.auction_id}'
+        )
         
         flash('Answer has been posted successfully.', 'success')
     except Exception as e:
@@ -300,11 +312,12 @@ def delete_auction(auction_id):
         Bid.query.filter_by(auction_id=auction_id).delete()
         
         # Delete all notifications related to this auction
-        Notification.query.filter_by(reference_id=auction_id).delete()
+        Notification.delete_where(Notification.reference_id == auction_id)
         
         # Finally, delete the auction
         db.session.delete(auction)
         db.session.commit()
+        suggestion_index.remove(auction_id)
         
         flash('Auction has been deleted successfully.', 'success')
     except Exception as e:
@@ -325,7 +338,11 @@ def delete_bid(bid_id):
         flash('Cannot delete bids from admin users.', 'danger')
         return redirect(url_for('customer_rep.view_questions'))
     
+    # Lock the auction so its bid summary is recomputed against a stable set of bids
+    auction = Auction.get_for_update(bid.auction_id)
     db.session.delete(bid)
+    db.session.flush()
+    auction.refresh_bid_summary()
     db.session.commit()
     
     flash('Bid deleted successfully.', 'success')
@@ -351,6 +368,12 @@ def toggle_auction(id):
         # Toggle the auction's active status
         auction.is_active = not auction.is_active
         db.session.commit()
+        if auction.is_active:
+            close_scheduler.schedule(auction.id, auction.end_time)
+            suggestion_index.add(auction)
+        else:
+            close_scheduler.cancel(auction.id)
+            suggestion_index.remove(auction.id)
         
         status = "activated" if auction.is_active else "deactivated"
         flash(f'Auction has been {status} successfully.', 'success')
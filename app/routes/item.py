@@ -5,6 +5,7 @@ from app.models import Item, Category, AttributeDefinition
 from app.models.user import User
 from datetime import datetime
 import json
+from app.services.category_tree import category_tree
 
 item_bp = Blueprint('item', __name__, url_prefix='/item')
 
@@ -140,6 +141,7 @@ def create_type():
         )
         db.session.add(category)
         db.session.commit()
+        category_tree.invalidate()
         
         flash('Item type created successfully!', 'success')
         return redirect(url_for('item.manage_types'))
@@ -207,6 +209,7 @@ def delete_type(id):
     # Delete category
     db.session.delete(category)
     db.session.commit()
+    category_tree.invalidate()
     
     flash('Item type deleted successfully!', 'success')
     return redirect(url_for('item.manage_types'))
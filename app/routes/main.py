@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, redirect, url_for
 from app.models import Auction, Category
 from datetime import datetime
+from app.services.category_tree import category_tree
 
 main_bp = Blueprint('main', __name__)
 
@@ -30,7 +31,7 @@ def index():
     ).limit(4).all()
     
     # Get all top-level categories
-    categories = Category.query.filter_by(parent_id=None).all()
+    categories = category_tree.roots()
     
     return render_template('index.html', 
                           recent_auctions=recent_auctions,
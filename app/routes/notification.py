@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app.models.notification import Notification
 from app import db
+from app.utils.keyset import keyset_paginate
 
 notification_bp = Blueprint('notification', __name__)
 
@@ -9,12 +10,31 @@ notification_bp = Blueprint('notification', __name__)
 @login_required
 def list():
     """Display user's notifications."""
-    notifications = Notification.query.filter_by(user_id=current_user.id)\
-        .order_by(Notification.created_at.desc())\
-        .all()
-    return render_template('notification/list.html', notifications=notifications)
+    show = request.args.get('filter', 'all')
+    page = inbox_page(show, request.args.get('cursor'))
+    return render_template('notification/list.html', notifications=page.items, page=page, filter=show)
 
-@notification_bp.route('/notifications/<int:notification_id>/read')
+@notification_bp.route('/notifications/feed')
+@login_required
+def feed():
+    """Next page of the user's notifications as JSON, for infinite scroll."""
+    show = request.args.get('filter', 'all')
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+    page = inbox_page(show, request.args.get('cursor'), per_page)
+    return jsonify({
+        'notifications': [notification.to_dict() for notification in page.items],
+        'next_cursor': page.next_cursor
+    })
+
+def inbox_page(show, cursor=None, per_page=20):
+    """One page of the current user's notifications ('all' or 'unread'), newest first."""
+    query = Notification.query.filter(Notification.user_id == current_user.id)
+    if show == 'unread':
+        query = query.filter(Notification.is_read == False)
+    order = [(Notification.created_at, True), (Notification.id, True)]
+    return keyset_paginate(query, order, cursor, per_page)
+
+@notification_bp.route('/notifications/<int:notification_id>/read', methods=['GET', 'POST'])
 @login_required
 def mark_read(notification_id):
     """Mark a specific notification as read."""
@@ -31,21 +51,20 @@ def mark_read(notification_id):
 @login_required
 def mark_all_read():
     """Mark all notifications as read."""
+    # Commits as it goes, a chunk at a time
     Notification.mark_all_read(current_user.id)
-    db.session.commit()
     return redirect(url_for('notification.list'))
 
 @notification_bp.route('/notifications/clear-all')
 @login_required
 def clear_all():
     """Delete all notifications for the current user."""
-    Notification.query.filter_by(user_id=current_user.id).delete()
-    db.session.commit()
+    Notification.clear_all(current_user.id)
     return redirect(url_for('notification.list'))
 
 @notification_bp.route('/notifications/count')
 @login_required
 def get_unread_count():
     """Get the count of unread notifications."""
-    count = Notification.get_unread_count(current_user.id)
-    return {'count': count} 
\ No newline at end of file
+    # current_user was just loaded by primary key and carries the counter
+    return {'count': current_user.unread_notification_count()} 
\ No newline at end of file
@@ -1,7 +1,13 @@
-from flask import Blueprint, render_template, request, jsonify
-from app.models import Auction, Item, Category
+from flask import Blueprint, render_template, request, jsonify, abort
+from app.models import Auction, Item, ItemAttribute, Category
 from datetime import datetime
 from sqlalchemy import or_, and_
+from app import db
+from app.services.category_tree import category_tree
+from app.services.search_engine import search_engine
+from app.services.search_facets import facet_counts
+from app.services.suggestions import suggestion_index
+from app.utils.keyset import cursor_context, estimate_count, keyset_paginate
 
 search_bp = Blueprint('search', __name__, url_prefix='/search')
 
@@ -11,20 +17,29 @@ def index():
     if not query:
         return render_template('search/index.html', results=None, query=None)
     
-    # Search for auctions matching the query
-    results = basic_search(query)
+    # Search for auctions matching the query, best matches first
+    page = basic_search(query, cursor=request.args.get('cursor'))
     
-    return render_template('search/index.html', results=results, query=query)
+    return render_template('search/index.html', results=page.items, page=page, query=query)
 
 @search_bp.route('/advanced')
 def advanced():
     # Get all categories for the form
-    categories = Category.query.filter_by(parent_id=None).all()
+    categories = category_tree.roots()
     
     # Check if this is a form submission
     if len(request.args) > 0:
-        results = advanced_search(request.args)
-        return render_template('search/advanced.html', categories=categories, results=results)
+        page = advanced_search(request.args)
+        facets = facet_counts(
+            request.args.get('query', '').strip(),
+            request.args.get('category_id', type=int),
+            request.args.get('min_price', type=float),
+            request.args.get('max_price', type=float),
+            request.args.get('status', 'active'),
+            ItemAttribute.parse_filters(request.args.get('attr')),
+            request.args.get('price_below', type=float)
+        )
+        return render_template('search/advanced.html', categories=categories, results=page.items, page=page, facets=facets)
     
     return render_template('search/advanced.html', categories=categories, results=None)
 
@@ -32,62 +47,33 @@ def advanced():
 def suggestions():
     """API endpoint for search suggestions"""
     query = request.args.get('q', '')
-    if not query or len(query) < 2:
-        return jsonify([])
     
-    # Get auction titles matching the query
-    current_time = datetime.utcnow()
-    auctions = Auction.query.filter(
-        Auction.is_active == True,
-        Auction.end_time > current_time,
-        Auction.title.ilike(f'%{query}%')
-    ).limit(5).all()
-    
-    # Get item names matching the query
-    items = Item.query.filter(
-        Item.name.ilike(f'%{query}%')
-    ).distinct(Item.name).limit(5).all()
-    
-    # Combine results
-    suggestions = []
-    for auction in auctions:
-        if auction.title not in suggestions:
-            suggestions.append(auction.title)
-    
-    for item in items:
-        if item.name not in suggestions and len(suggestions) < 10:
-            suggestions.append(item.name)
-    
-    return jsonify(suggestions)
+    # Active auction titles and item names with a word starting with the query
+    return jsonify(suggestion_index.suggest(query))
 
-def basic_search(query):
-    """Perform a basic search on auctions and items"""
+def basic_search(query, cursor=None, per_page=20):
+    """Perform a basic search on auctions and items, ranked by relevance"""
     current_time = datetime.utcnow()
     
-    # Split query into terms
-    terms = query.split()
-    
-    # Create search conditions
-    conditions = []
-    for term in terms:
-        term_filter = or_(
-            Auction.title.ilike(f'%{term}%'),
-            Auction.description.ilike(f'%{term}%'),
-            Item.name.ilike(f'%{term}%'),
-            Item.description.ilike(f'%{term}%')
-        )
-        conditions.append(term_filter)
-    
-    # Get active auctions matching the query
-    results = Auction.query.join(Item).filter(
-        and_(*conditions),
+    # Active auctions containing every word of the query, scored with the collection
+    # statistics of the first page so later pages continue the same ranking
+    statistics = search_engine.statistics(query, cursor_context(cursor))
+    results, score = search_engine.filter(Auction.query, query, statistics)
+    if score is None:
+        results = results.filter(db.false())
+        order = [(Auction.id, False)]
+    else:
+        order = [(score, True), (Auction.id, False)]
+    results = results.filter(
         Auction.is_active == True,
         Auction.end_time > current_time
-    ).order_by(Auction.end_time.asc()).all()
+    )
     
-    return results
+    page = keyset_paginate(results, order, cursor, per_page, context=statistics)
+    page.total, page.total_exact = estimate_count(results)
+    return page
 
-def advanced_search(args):
+def advanced_search(args, per_page=21):
     """Perform an advanced search based on form parameters"""
     current_time = datetime.utcnow()
     
@@ -96,46 +82,33 @@ def advanced_search(args):
     category_id = args.get('category_id', type=int)
     min_price = args.get('min_price', type=float)
     max_price = args.get('max_price', type=float)
+    price_below = args.get('price_below', type=float)
     status = args.get('status', 'active')
     sort_by = args.get('sort', 'end_time_asc')
+    attribute_filters = ItemAttribute.parse_filters(args.get('attr'))
     
     # Start with base query
     search_query = Auction.query.join(Item)
     
-    # Apply text search if provided
+    # Apply text search if provided; auctions must contain every word
+    score = statistics = None
     if query:
-        # Split query into terms
-        terms = query.split()
-        
-        # Create search conditions
-        conditions = []
-        for term in terms:
-            term_filter = or_(
-                Auction.title.ilike(f'%{term}%'),
-                Auction.description.ilike(f'%{term}%'),
-                Item.name.ilike(f'%{term}%'),
-                Item.description.ilike(f'%{term}%')
-            )
-            conditions.append(term_filter)
-        
-        search_query = search_query.filter(and_(*conditions))
+        statistics = search_engine.statistics(query, cursor_context(args.get('cursor')))
+        search_query, score = search_engine.filter(search_query, query, statistics)
+        if score is None:
+            search_query = search_query.filter(db.false())
     
     # Apply category filter if provided
     if category_id:
-        category = Category.query.get_or_404(category_id)
-        # Get all subcategory IDs
-        category_ids = [category_id]
-        
-        def get_subcategory_ids(cat_id):
-            subcats = Category.query.filter_by(parent_id=cat_id).all()
-            for subcat in subcats:
-                category_ids.append(subcat.id)
-                get_subcategory_ids(subcat.id)
-        
-        get_subcategory_ids(category_id)
+        if category_tree.get(category_id) is None:
+            abort(404)
         
-        # Filter by all categories and subcategories
-        search_query = search_query.filter(Item.category_id.in_(category_ids))
+        # Filter by the category and all its subcategories
+        search_query = search_query.filter(Item.category_id.in_(Category.subtree_ids_select(category_id)))
+    
+    # Apply item attribute filters, e.g. brand=Apple, storage>=256
+    for name, operator, value in attribute_filters:
+        search_query = search_query.filter(ItemAttribute.filter_clause(name, operator, value))
     
     # Apply price filters if provided
     if min_price is not None:
@@ -144,6 +117,10 @@ def advanced_search(args):
     if max_price is not None:
         search_query = search_query.filter(Auction.initial_price <= max_price)
     
+    # Upper bound of a price facet bucket, which excludes it
+    if price_below is not None:
+        search_query = search_query.filter(Auction.initial_price < price_below)
+    
     # Apply status filter
     if status == 'active':
         search_query = search_query.filter(
@@ -154,19 +131,26 @@ def advanced_search(args):
         search_query = search_query.filter(Auction.end_time <= current_time)
     # 'all' doesn't need additional filtering
     
-    # Apply sorting
-    if sort_by == 'end_time_asc':
-        search_query = search_query.order_by(Auction.end_time.asc())
+    # Apply sorting; the id breaks ties so each page can start after the last row
+    if sort_by == 'relevance' and score is not None:
+        order = [(score, True), (Auction.id, False)]
+    elif sort_by == 'end_time_asc':
+        order = [(Auction.end_time, False), (Auction.id, False)]
     elif sort_by == 'end_time_desc':
-        search_query = search_query.order_by(Auction.end_time.desc())
+        order = [(Auction.end_time, True), (Auction.id, True)]
     elif sort_by == 'price_asc':
-        search_query = search_query.order_by(Auction.initial_price.asc())
+        order = [(Auction.initial_price, False), (Auction.id, False)]
     elif sort_by == 'price_desc':
-        search_query = search_query.order_by(Auction.initial_price.desc())
+        order = [(Auction.initial_price, True), (Auction.id, True)]
     elif sort_by == 'newest':
-        search_query = search_query.order_by(Auction.created_at.desc())
+        # Ids follow creation order, and unlike created_at are never NULL
+        order = [(Auction.id, True)]
+    else:
+        order = [(Auction.id, False)]
     
-    # Execute query
-    results = search_query.all()
+    # Fetch one page; ranked pages carry the statistics they were scored with
+    context = statistics if order[0][0] is score else None
+    page = keyset_paginate(search_query, order, args.get('cursor'), per_page, context=context)
+    page.total, page.total_exact = estimate_count(search_query)
     
-    return results
\ No newline at end of file
+    return page
\ No newline at end of file
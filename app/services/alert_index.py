@@ -0,0 +1,244 @@
+import logging
+import re
+import threading
+import time
+from collections import defaultdict, namedtuple
+from sqlalchemy import event, insert, update
+from app import db
+from app.models import Alert
+from app.models.cache_version import CacheVersion
+from app.services.category_tree import category_tree
+
+logger = logging.getLogger(__name__)
+
+CACHE_NAME = 'alerts'
+
+versions = CacheVersion.__table__
+
+# What the index keeps per active alert; enough to check a match without the database
+AlertEntry = namedtuple('AlertEntry', 'id user_id keywords category_id min_price max_price')
+
+WORD = re.compile(r'\w+')
+
+# Prices are bucketed by powers of two; everything from 2**MAX_PRICE_BUCKET up shares the top bucket
+MAX_PRICE_BUCKET = 40
+
+
+def price_bucket(price):
+    return min(int(max(price, 0)).bit_length(), MAX_PRICE_BUCKET)
+
+
+def keyword_probe(keyword):
+    """The longest run of word characters in a keyword, or None if it has none.
+
+    A keyword can only occur in an auction's text if its probe occurs inside
+    one of the text's words, so the probe is what the index is keyed on.
+    """
+    words = WORD.findall(keyword)
+    return max(words, key=len) if words else None
+
+
+class AlertIndex:
+    """In-memory index of the active alerts for matching new auctions.
+
+    Each alert is filed under a single key taken from its most selective
+    criterion: the probe of every keyword if it has keywords, otherwise its
+    category, otherwise the price buckets its range covers. Matching an
+    auction looks up its words, its category and ancestors and its price
+    bucket, and only the alerts found that way are checked against the full
+    criteria (the same rules as Alert.matches_auction).
+
+    The routes that create, toggle and delete alerts update this worker's
+    index directly. The Alert mapper events below also bump the 'alerts'
+    row of cache_versions in the same transaction, and every worker
+    compares that version at most every check_interval seconds and
+    rebuilds when it has moved. Matches are confirmed still active against
+    the database, which covers changes made within that interval.
+    """
+
+    def __init__(self, check_interval=5):
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._version = None
+        self._checked_at = 0
+        self._clear()
+
+    def _clear(self):
+        self._entries = {}
+        self._by_probe = defaultdict(set)
+        self._by_category = defaultdict(set)
+        self._by_price = defaultdict(set)
+        self._unkeyed = set()
+        self._max_probe_length = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _keys(self, entry):
+        if entry.keywords:
+            probes = [keyword_probe(k) for k in entry.keywords]
+            if None in probes:
+                # A keyword without word characters can't be looked up
+                return [(self._unkeyed, None)]
+            return [(self._by_probe, probe) for probe in set(probes)]
+        if entry.category_id:
+            return [(self._by_category, entry.category_id)]
+        if entry.min_price is not None or entry.max_price is not None:
+            low = price_bucket(entry.min_price) if entry.min_price is not None else 0
+            high = price_bucket(entry.max_price) if entry.max_price is not None else MAX_PRICE_BUCKET
+            return [(self._by_price, bucket) for bucket in range(low, high + 1)]
+        return [(self._unkeyed, None)]
+
+    def _add(self, entry):
+        self._discard(entry.id)
+        self._entries[entry.id] = entry
+        for table, key in self._keys(entry):
+            if key is None:
+                table.add(entry.id)
+            else:
+                table[key].add(entry.id)
+                if table is self._by_probe:
+                    self._max_probe_length = max(self._max_probe_length, len(key))
+
+    def _discard(self, alert_id):
+        entry = self._entries.pop(alert_id, None)
+        if entry is None:
+            return
+        for table, key in self._keys(entry):
+            if key is None:
+                table.discard(alert_id)
+            else:
+                table[key].discard(alert_id)
+                if not table[key]:
+                    del table[key]
+
+    @staticmethod
+    def _entry(alert):
+        return AlertEntry(
+            alert.id,
+            alert.user_id,
+            tuple(Alert.parse_keywords(alert.keywords)) if alert.keywords else (),
+            int(alert.category_id) if alert.category_id else None,
+            alert.min_price,
+            alert.max_price
+        )
+
+    def _load_rows(self, query):
+        columns = (Alert.id, Alert.user_id, Alert.keywords, Alert.category_id, Alert.min_price, Alert.max_price)
+        for row in db.session.query(*columns).filter(query).yield_per(5000):
+            self._add(self._entry(row))
+
+    @staticmethod
+    def _stored_version():
+        return db.session.query(CacheVersion.version).filter_by(name=CACHE_NAME).scalar() or 0
+
+    def rebuild(self):
+        """Reload every active alert from the database."""
+        with self._lock:
+            # Read first, so a change made while loading triggers another rebuild
+            version = self._stored_version()
+            self._clear()
+            self._load_rows(Alert.is_active == True)
+            self._version = version
+            self._checked_at = time.monotonic()
+            logger.info('Alert index built with %d alerts', len(self._entries))
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return
+        if self._stored_version() != self._version:
+            self.rebuild()
+        self._checked_at = now
+
+    def invalidate(self, connection):
+        """Record on connection that the alerts changed, so every worker rebuilds its index."""
+        result = connection.execute(
+            update(versions).where(versions.c.name == CACHE_NAME).values(version=versions.c.version + 1)
+        )
+        if result.rowcount == 0:
+            # The migration creates the row; databases made with create_all() start without it
+            connection.execute(insert(versions).values(name=CACHE_NAME, version=1))
+
+    def update(self, alert):
+        """Index an alert that was created or toggled, or drop it if it's inactive."""
+        with self._lock:
+            if self._version is None:
+                return
+            if alert.is_active:
+                self._add(self._entry(alert))
+            else:
+                self._discard(alert.id)
+
+    def remove(self, alert_id):
+        """Drop a deleted alert."""
+        with self._lock:
+            self._discard(alert_id)
+
+    def remove_user(self, user_id):
+        """Drop every alert of a deleted user."""
+        with self._lock:
+            for alert_id in [e.id for e in self._entries.values() if e.user_id == user_id]:
+                self._discard(alert_id)
+
+    def _candidates(self, text, category_ids, price):
+        candidates = set(self._unkeyed)
+        candidates.update(self._by_price.get(price_bucket(price), ()))
+        for category_id in category_ids:
+            candidates.update(self._by_category.get(category_id, ()))
+
+        if self._by_probe:
+            # Every probe is a substring of some word of the text
+            longest = self._max_probe_length
+            for word in set(WORD.findall(text)):
+                for start in range(len(word)):
+                    for end in range(start + 1, min(len(word), start + longest) + 1):
+                        ids = self._by_probe.get(word[start:end])
+                        if ids:
+                            candidates.update(ids)
+        return candidates
+
+    @staticmethod
+    def _matches(entry, text, category_ids, price):
+        if entry.category_id and entry.category_id not in category_ids:
+            return False
+        if entry.keywords and not any(k in text for k in entry.keywords):
+            return False
+        if entry.min_price is not None and price < entry.min_price:
+            return False
+        if entry.max_price is not None and price > entry.max_price:
+            return False
+        return True
+
+    def match(self, auction):
+        """Return the (alert_id, user_id) pairs of the active alerts the auction matches."""
+        text = Alert.auction_search_text(auction)
+        category_ids = category_tree.ancestor_ids(auction.item.category_id)
+        price = auction.initial_price
+
+        with self._lock:
+            self._refresh()
+            candidates = self._candidates(text, category_ids, price)
+            matched = [
+                self._entries[alert_id] for alert_id in candidates
+                if self._matches(self._entries[alert_id], text, category_ids, price)
+            ]
+        if not matched:
+            return []
+
+        # Alerts toggled or deleted by another process may still be indexed here
+        still_active = {row[0] for row in db.session.query(Alert.id).filter(
+            Alert.id.in_([entry.id for entry in matched]), Alert.is_active == True
+        )}
+        logger.debug('Alert index: %d candidates, %d matches', len(candidates), len(still_active))
+        return sorted((entry.id, entry.user_id) for entry in matched if entry.id in still_active)
+
+
+alert_index = AlertIndex()
+
+
+@event.listens_for(Alert, 'after_insert')
+@event.listens_for(Alert, 'after_update')
+@event.listens_for(Alert, 'after_delete')
+def alert_changed(mapper, connection, target):
+    alert_index.invalidate(connection)
@@ -0,0 +1,222 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import and_, case, update
+from app import db
+from app.models import Auction, Bid, User
+from app.models.notification import Notification
+from app.services.live_events import AUCTION_CLOSED, emit_notifications
+
+logger = logging.getLogger(__name__)
+
+# Winner of a closing auction, decided from the stored bid summary
+WINNER_ID = case(
+    (and_(Auction.bid_count > 0, Auction.current_price >= Auction.secret_min_price), Auction.leading_bidder_id),
+    else_=None
+)
+
+NOTIFICATION_TITLES = {'auction_won': 'Auction Won', 'auction_ended': 'Auction Ended'}
+
+
+def closing_notifications(auction_id, title, seller_id, winner_id, winner_username, bidder_ids):
+    """Build the notification rows for a closed auction.
+
+    Winner and seller are told about the result and every other bidder gets
+    one notification, however many bids they placed. Nothing is sent when
+    the auction closes without a winner.
+    """
+    if not winner_id:
+        return []
+
+    rows = [
+        {
+            'user_id': winner_id,
+            'type': 'auction_won',
+            'message': f'Congratulations! You won the auction for "{title}"!',
+            'reference_id': auction_id
+        },
+        {
+            'user_id': seller_id,
+            'type': 'auction_ended',
+            'message': f'Your auction "{title}" has ended. The winner is {winner_username}.',
+            'reference_id': auction_id
+        }
+    ]
+    for bidder_id in sorted(bidder_ids):
+        if bidder_id not in (winner_id, seller_id):
+            rows.append({
+                'user_id': bidder_id,
+                'type': 'auction_ended',
+                'message': f'The auction "{title}" has ended. You were outbid.',
+                'reference_id': auction_id
+            })
+    return rows
+
+
+def emit_closing(auction_id, title, end_time, winner_username, rows):
+    """Tell the notified users and the auction room that an auction closed."""
+    emit_notifications(rows, NOTIFICATION_TITLES)
+    AUCTION_CLOSED.emit(
+        f'auction_{auction_id}',
+        auction_id=auction_id,
+        title=title,
+        winner=winner_username,
+        end_time=end_time
+    )
+
+
+def finalize_auction(auction, now=None):
+    """Close an auction whose end time has passed and notify everyone involved.
+
+    Safe to call any number of times and from any process: the conditional
+    UPDATE only matches while the auction is still active, so exactly one
+    caller records the winner and creates the notifications. Returns True if
+    this call closed the auction.
+    """
+    now = now or datetime.utcnow()
+
+    result = db.session.execute(
+        update(Auction)
+        .where(Auction.id == auction.id, Auction.is_active == True, Auction.end_time <= now)
+        .values(is_active=False, winner_id=WINNER_ID, winner_notified=True)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        return False
+
+    db.session.refresh(auction)
+    winner = auction.winner
+    bidder_ids = [row[0] for row in db.session.query(Bid.bidder_id).filter(Bid.auction_id == auction.id).distinct()]
+    rows = closing_notifications(
+        auction.id, auction.title, auction.seller_id,
+        auction.winner_id, winner.username if winner else None, bidder_ids
+    )
+    if rows:
+        Notification.insert_many(rows)
+    db.session.commit()
+
+    # Only tell clients once the close is durable
+    emit_closing(auction.id, auction.title, auction.end_time, winner.username if winner else None, rows)
+    return True
+
+
+def finalize_expired_auctions(batch_size=500, now=None):
+    """Close every auction whose end time has passed, batch_size at a time.
+
+    Each batch is one short transaction: the expired rows are locked (rows
+    another closer already holds are skipped), closed with a single UPDATE
+    that only matches auctions still active, so each one is closed once,
+    their bidders are read with one query and the notifications go in as
+    one multi-row INSERT. Socket events are emitted after the commit.
+    Returns the number of auctions closed.
+    """
+    now = now or datetime.utcnow()
+    total = 0
+
+    while True:
+        started = time.perf_counter()
+
+        batch = (
+            db.session.query(Auction.id, Auction.title, Auction.seller_id, Auction.end_time, WINNER_ID.label('winner_id'))
+            .filter(Auction.is_active == True, Auction.end_time <= now)
+            .order_by(Auction.end_time, Auction.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not batch:
+            break
+
+        auction_ids = [auction.id for auction in batch]
+        result = db.session.execute(
+            update(Auction)
+            .where(Auction.id.in_(auction_ids), Auction.is_active == True)
+            .values(is_active=False, winner_id=WINNER_ID, winner_notified=True)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(batch):
+            # Some of these were closed elsewhere (e.g. finalize_auction) after we read them
+            # and the database doesn't hold row locks; start the batch over
+            db.session.rollback()
+            continue
+
+        bidders = defaultdict(set)
+        bid_rows = db.session.query(Bid.auction_id, Bid.bidder_id).filter(Bid.auction_id.in_(auction_ids)).distinct()
+        for auction_id, bidder_id in bid_rows:
+            bidders[auction_id].add(bidder_id)
+
+        winner_ids = {auction.winner_id for auction in batch if auction.winner_id}
+        usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_(winner_ids))) if winner_ids else {}
+
+        closed = []
+        notification_rows = []
+        for auction in batch:
+            winner_username = usernames.get(auction.winner_id)
+            rows = closing_notifications(
+                auction.id, auction.title, auction.seller_id,
+                auction.winner_id, winner_username, bidders[auction.id]
+            )
+            notification_rows.extend(rows)
+            closed.append((auction, winner_username, rows))
+
+        if notification_rows:
+            Notification.insert_many(notification_rows)
+        db.session.commit()
+
+        for auction, winner_username, rows in closed:
+            emit_closing(auction.id, auction.title, auction.end_time, winner_username, rows)
+
+        total += len(batch)
+        logger.info(
+            'Finalized %d auctions (%d notifications) in %.1f ms',
+            len(batch), len(notification_rows), (time.perf_counter() - started) * 1000
+        )
+
+        if len(batch) < batch_size:
+            break
+
+    return total
+
+
+def notify_auctions_ending_soon(auction_ids, now=None):
+    """Warn the seller and bidders of each still-running auction that it ends within 5 minutes."""
+    now = now or datetime.utcnow()
+    ending_soon = db.session.query(Auction.id, Auction.title, Auction.seller_id).filter(
+        Auction.id.in_(auction_ids),
+        Auction.end_time <= now + timedelta(minutes=5),
+        Auction.end_time > now,
+        Auction.is_active == True
+    ).all()
+    if not ending_soon:
+        return
+
+    # One notification per distinct bidder, fetched for all auctions at once
+    bidders = defaultdict(set)
+    bid_rows = db.session.query(Bid.auction_id, Bid.bidder_id).filter(
+        Bid.auction_id.in_([auction.id for auction in ending_soon])
+    ).distinct()
+    for auction_id, bidder_id in bid_rows:
+        bidders[auction_id].add(bidder_id)
+
+    rows = []
+    for auction in ending_soon:
+        rows.append({
+            'user_id': auction.seller_id,
+            'type': 'auction_ending',
+            'message': f'Your auction "{auction.title}" is ending in less than 5 minutes!',
+            'reference_id': auction.id
+        })
+        for bidder_id in sorted(bidders[auction.id]):
+            if bidder_id != auction.seller_id:
+                rows.append({
+                    'user_id': bidder_id,
+                    'type': 'auction_ending',
+                    'message': f'An auction you bid on "{auction.title}" is ending in less than 5 minutes!',
+                    'reference_id': auction.id
+                })
+
+    Notification.insert_many(rows)
+    db.session.commit()
+
+    emit_notifications(rows, 'Auction Ending Soon')
@@ -0,0 +1,66 @@
+import logging
+from app import db, socketio
+from app.models import Auction
+from app.models.notification import Notification
+from app.services.alert_index import alert_index
+from app.services.job_queue import job_queue
+from app.services.live_events import NOTIFICATION
+from app.services.notifications import rep_directory
+
+logger = logging.getLogger(__name__)
+
+
+@job_queue.handler('auction_created')
+def auction_created(auction_id):
+    """Tell the customer reps about a new auction and notify the users whose alerts it matches."""
+    auction = db.session.get(Auction, auction_id)
+    if auction is None:
+        return None
+
+    rows = [
+        {'user_id': rep_id, 'type': 'new_auction', 'message': 'New auction posted in your category', 'reference_id': auction.id}
+        for rep_id in sorted(rep_directory.ids())
+    ]
+
+    # Check for matching alerts; only the alerts the index turns up are checked
+    matches = alert_index.match(auction)
+    logger.info(f"{len(matches)} alerts match auction {auction.id}")
+    message = f'New auction matches your alert: "{auction.title}"'
+    rows.extend(
+        {'user_id': user_id, 'type': 'alert_match', 'message': message, 'reference_id': auction.id}
+        for _, user_id in matches
+    )
+    if rows:
+        Notification.insert_many(rows)
+
+    title = auction.title
+
+    def emit():
+        # Send a single notification to all customer reps
+        NOTIFICATION.emit(
+            'customer_reps',
+            title='New Auction Posted',
+            message=f'New auction: "{title}"',
+            type='new_auction',
+            link=f'/auction/{auction_id}'
+        )
+
+        # Every matched user gets the same events, so each goes out once to all their rooms
+        rooms = sorted({f'user_{user_id}' for _, user_id in matches})
+        NOTIFICATION.emit(
+            rooms,
+            title='Alert Match',
+            message=message,
+            type='alert_match',
+            link=f'/auction/{auction_id}'
+        )
+
+        # Also emit a specific alert match event that client code can listen for
+        if rooms:
+            socketio.emit('new_auction_alert', {
+                'auction_id': auction_id,
+                'auction_title': title,
+                'message': message
+            }, to=rooms)
+
+    return emit
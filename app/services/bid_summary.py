@@ -0,0 +1,49 @@
+from app import db
+from app.models import Auction, Bid
+
+
+def find_bid_summary_drift():
+    """Compare every auction's stored bid summary against its bids.
+
+    Returns a list of (auction, expected) pairs for the auctions that are out
+    of step, where ``expected`` is a dict of the values the columns should
+    hold.
+    """
+    # One ordered pass over the bids gives each auction's count and leading bid
+    expected = {}
+    rows = (
+        db.session.query(Bid.id, Bid.auction_id, Bid.bidder_id, Bid.amount)
+        .order_by(Bid.auction_id, Bid.amount.desc(), Bid.id.asc())
+        .yield_per(1000)
+    )
+    for bid_id, auction_id, bidder_id, amount in rows:
+        summary = expected.get(auction_id)
+        if summary is None:
+            expected[auction_id] = {
+                'bid_count': 1,
+                'current_price': amount,
+                'leading_bid_id': bid_id,
+                'leading_bidder_id': bidder_id
+            }
+        else:
+            summary['bid_count'] += 1
+
+    drift = []
+    for auction in Auction.query.order_by(Auction.id).yield_per(1000):
+        summary = expected.get(auction.id, {
+            'bid_count': 0,
+            'current_price': auction.initial_price,
+            'leading_bid_id': None,
+            'leading_bidder_id': None
+        })
+        if any(getattr(auction, column) != value for column, value in summary.items()):
+            drift.append((auction, summary))
+    return drift
+
+
+def fix_bid_summary_drift(drift):
+    """Write the expected bid summary back to each drifted auction."""
+    for auction, summary in drift:
+        for column, value in summary.items():
+            setattr(auction, column, value)
+    db.session.commit()
@@ -0,0 +1,66 @@
+from collections import namedtuple
+
+# An auto-bidder's strongest proxy: the highest auto_bid_limit they have set
+AutoBidder = namedtuple('AutoBidder', ['bidder_id', 'limit'])
+
+# A bid the resolver wants placed on behalf of an auto-bidder
+ProxyBid = namedtuple('ProxyBid', ['bidder_id', 'amount', 'limit'])
+
+
+def to_cents(amount):
+    """Convert a dollar amount to integer cents."""
+    return int(round(amount * 100))
+
+
+def from_cents(cents):
+    """Convert integer cents back to a dollar amount."""
+    return cents / 100.0
+
+
+def resolve_proxy_bids(current_amount, leader_id, auto_bidders, min_increment):
+    """Work out the outcome of a proxy-bidding war in one step.
+
+    The step-by-step engine lets the two strongest auto-bidders take turns
+    raising the price by ``min_increment`` until one of them runs out of
+    limit. Only the last bid of each side changes who leads and at what
+    price, so this returns just those bids (at most two), in the order they
+    would have been placed.
+
+    ``auto_bidders`` must be ordered by limit, highest first.
+    """
+    if len(auto_bidders) < 2:
+        return []
+
+    increment = to_cents(min_increment)
+    if increment <= 0:
+        return []
+
+    top, second = auto_bidders[0], auto_bidders[1]
+    top_limit = to_cents(top.limit)
+    second_limit = to_cents(second.limit)
+    price = to_cents(current_amount)
+    bids = []
+
+    # The strongest auto-bidder first takes the lead if someone else holds it
+    if leader_id != top.bidder_id:
+        if top_limit <= price:
+            return []
+        price = min(top_limit, price + increment)
+        bids.append(ProxyBid(top.bidder_id, from_cents(price), top.limit))
+        if price >= top_limit:
+            return bids
+
+    # The runner-up answers at price, price + 2 * increment, ... while the
+    # price is still below their limit; find their last turn directly.
+    if second_limit <= price:
+        return bids
+    last_turn = (second_limit - price - 1) // (2 * increment)
+    second_price = min(second_limit, price + (2 * last_turn + 1) * increment)
+    bids = [ProxyBid(second.bidder_id, from_cents(second_price), second.limit)]
+
+    # The strongest auto-bidder answers once more if their limit allows it
+    if top_limit > second_price:
+        top_price = min(top_limit, second_price + increment)
+        bids.append(ProxyBid(top.bidder_id, from_cents(top_price), top.limit))
+
+    return bids
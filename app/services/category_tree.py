@@ -0,0 +1,136 @@
+import threading
+import time
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Category
+from app.models.cache_version import CacheVersion
+
+CACHE_NAME = 'categories'
+
+
+class CategoryNode:
+    """Read-only copy of a category, with the same attributes the templates use."""
+    __slots__ = ('id', 'name', 'description', 'parent_id', 'parent', 'subcategories')
+
+    def __init__(self, id, name, description, parent_id):
+        self.id = id
+        self.name = name
+        self.description = description
+        self.parent_id = parent_id
+        self.parent = None
+        self.subcategories = []
+
+    def __repr__(self):
+        return f'<CategoryNode {self.name}>'
+
+    def get_breadcrumbs(self):
+        """Categories from the root down to this one."""
+        breadcrumbs = []
+        node = self
+        while node:
+            breadcrumbs.insert(0, node)
+            node = node.parent
+        return breadcrumbs
+
+
+class CategoryTree:
+    """The whole category hierarchy, held in memory by every worker.
+
+    The tree is loaded with one query and shared by all requests. Routes
+    that add, move or delete categories call invalidate(), which bumps the
+    'categories' row of cache_versions; other workers compare that version
+    at most every check_interval seconds and reload when it has moved.
+    """
+
+    def __init__(self, check_interval=5):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0
+        self._nodes = {}
+        self._roots = []
+
+    @staticmethod
+    def _stored_version():
+        return db.session.query(CacheVersion.version).filter_by(name=CACHE_NAME).scalar() or 0
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            version = self._stored_version()
+            if version != self._version:
+                self._load(version)
+            self._checked_at = now
+
+    def _load(self, version):
+        nodes = {
+            row.id: CategoryNode(row.id, row.name, row.description, row.parent_id)
+            for row in db.session.query(
+                Category.id, Category.name, Category.description, Category.parent_id
+            ).order_by(Category.id)
+        }
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node.parent_id)
+            if parent:
+                node.parent = parent
+                parent.subcategories.append(node)
+            else:
+                roots.append(node)
+        self._nodes, self._roots, self._version = nodes, roots, version
+
+    def invalidate(self):
+        """Record that the categories changed, so every worker reloads its tree."""
+        result = db.session.execute(
+            update(CacheVersion)
+            .where(CacheVersion.name == CACHE_NAME)
+            .values(version=CacheVersion.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            try:
+                db.session.add(CacheVersion(name=CACHE_NAME, version=1))
+                db.session.flush()
+            except IntegrityError:
+                db.session.rollback()
+                return self.invalidate()
+        db.session.commit()
+        self._version = None
+
+    def roots(self):
+        """Top-level categories."""
+        self._ensure_loaded()
+        return self._roots
+
+    def all(self):
+        """Every category, in id order."""
+        self._ensure_loaded()
+        return list(self._nodes.values())
+
+    def get(self, category_id):
+        """The category with this id, or None."""
+        self._ensure_loaded()
+        return self._nodes.get(category_id)
+
+    def ancestor_ids(self, category_id):
+        """Ids of a category and all its ancestors."""
+        node = self.get(category_id)
+        return {crumb.id for crumb in node.get_breadcrumbs()} if node else set()
+
+    def subtree_ids(self, category_id):
+        """Ids of a category and all its descendants."""
+        node = self.get(category_id)
+        if node is None:
+            return []
+        ids, stack = [], [node]
+        while stack:
+            node = stack.pop()
+            ids.append(node.id)
+            stack.extend(node.subcategories)
+        return ids
+
+
+category_tree = CategoryTree()
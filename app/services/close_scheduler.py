@@ -0,0 +1,155 @@
+import atexit
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from app import db
+from app.models import Auction
+from app.services.auction_closing import finalize_expired_auctions, notify_auctions_ending_soon
+from app.services.leases import acquire_lease, release_lease
+
+logger = logging.getLogger(__name__)
+
+ENDING_SOON_WINDOW = timedelta(minutes=5)
+
+# Only the process holding this lease closes auctions
+CLOSER_LEASE = 'auction-closer'
+
+
+class AuctionCloseScheduler:
+    """Wakes up exactly when the next auction deadline is due.
+
+    Deadlines live in a min-heap of (when, auction_id, kind) entries, where
+    kind is 'ending_soon' (five minutes before the end) or 'close'. The
+    worker thread sleeps until the earliest entry instead of polling the
+    auctions table. Rescheduling or cancelling an auction just replaces its
+    entry in _scheduled; stale heap entries are skipped when they surface.
+
+    Every process runs the thread, but only the one holding the
+    CLOSER_LEASE row acts on its deadlines; the others just keep trying to
+    take the lease over. The leader renews it every resync_interval
+    seconds, and at the same time reloads the upcoming deadlines from the
+    database (auctions created by other processes never reach this heap)
+    and closes any expired auctions in batches. If the leader dies, another
+    process takes over once the lease expires.
+    """
+
+    def __init__(self, resync_interval=60, lease_ttl=180):
+        self.resync_interval = resync_interval
+        self.lease_ttl = lease_ttl
+        self.is_leader = False
+        self._heap = []
+        self._scheduled = {}
+        self._condition = threading.Condition()
+        self._thread = None
+        self._app = None
+
+    def start(self, app):
+        """Start the worker thread if it's not already running."""
+        self._app = app
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='auction-close-scheduler')
+            self._thread.daemon = True
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Hand the closer lease over to another process straight away, e.g. on shutdown."""
+        if self.is_leader:
+            self.is_leader = False
+            with self._app.app_context():
+                release_lease(CLOSER_LEASE)
+
+    def schedule(self, auction_id, end_time):
+        """Add or move the deadlines of an auction."""
+        with self._condition:
+            self._push(auction_id, 'ending_soon', end_time - ENDING_SOON_WINDOW)
+            self._push(auction_id, 'close', end_time)
+            self._condition.notify()
+
+    def cancel(self, auction_id):
+        """Forget an auction's deadlines, e.g. when it is ended or deactivated early."""
+        with self._condition:
+            self._scheduled.pop((auction_id, 'ending_soon'), None)
+            self._scheduled.pop((auction_id, 'close'), None)
+
+    def __len__(self):
+        return len(self._scheduled)
+
+    def _push(self, auction_id, kind, when):
+        self._scheduled[(auction_id, kind)] = when
+        heapq.heappush(self._heap, (when, auction_id, kind))
+
+    def _pop_due(self, now):
+        """Remove and return the live entries whose deadline has passed."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, auction_id, kind = heapq.heappop(self._heap)
+            if self._scheduled.get((auction_id, kind)) == when:
+                del self._scheduled[(auction_id, kind)]
+                due.append((auction_id, kind))
+        return due
+
+    def _load(self, now):
+        """Schedule every active auction ending before the next resync is due."""
+        horizon = now + ENDING_SOON_WINDOW + timedelta(seconds=self.resync_interval)
+        upcoming = db.session.query(Auction.id, Auction.end_time).filter(
+            Auction.is_active == True,
+            Auction.end_time > now,
+            Auction.end_time <= horizon
+        ).all()
+        db.session.rollback()
+
+        with self._condition:
+            for auction_id, end_time in upcoming:
+                if self._scheduled.get((auction_id, 'close')) != end_time:
+                    if end_time - ENDING_SOON_WINDOW > now:
+                        self._push(auction_id, 'ending_soon', end_time - ENDING_SOON_WINDOW)
+                    self._push(auction_id, 'close', end_time)
+
+    def _run(self):
+        if self._app is None:
+            logger.error('Auction close scheduler started without an application')
+            return
+
+        with self._app.app_context():
+            next_resync = 0
+            while True:
+                try:
+                    if time.monotonic() >= next_resync:
+                        was_leader = self.is_leader
+                        self.is_leader = acquire_lease(CLOSER_LEASE, self.lease_ttl)
+                        if self.is_leader != was_leader:
+                            logger.info('Auction closer lease %s', 'acquired' if self.is_leader else 'lost')
+                        if self.is_leader:
+                            self._load(datetime.utcnow())
+                            finalize_expired_auctions()
+                        next_resync = time.monotonic() + self.resync_interval
+
+                    with self._condition:
+                        timeout = next_resync - time.monotonic()
+                        if self._heap:
+                            until_due = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+                            timeout = min(timeout, until_due)
+                        if timeout > 0:
+                            self._condition.wait(timeout)
+                        due = self._pop_due(datetime.utcnow())
+
+                    # The leader's resync will pick these up
+                    if not self.is_leader:
+                        continue
+
+                    ending_soon = [auction_id for auction_id, kind in due if kind == 'ending_soon']
+                    if ending_soon:
+                        notify_auctions_ending_soon(ending_soon)
+                    if any(kind == 'close' for _, kind in due):
+                        finalize_expired_auctions()
+
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Error in auction close scheduler')
+                    time.sleep(5)
+
+
+close_scheduler = AuctionCloseScheduler()
@@ -0,0 +1,217 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, update
+from app import db
+from app.models.outbox import OutboxJob
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """In-process worker pool for side effects, backed by the outbox_jobs table.
+
+    enqueue() adds an OutboxJob to the caller's transaction; once that
+    commits the caller hands the job to submit(), which puts it on the local
+    queue for the worker threads. A worker claims a job with a conditional
+    UPDATE (pending -> running), so a job is run once even when several
+    processes see it. The handler's writes are committed together with the
+    job's 'done' status, and anything it returns is called afterwards for
+    post-commit work such as socket events.
+
+    Jobs whose submit() never happened (e.g. the process died) are found by
+    a sweep every sweep_interval seconds, which also retries failed jobs
+    with exponential backoff and releases jobs stuck in 'running'.
+    """
+
+    def __init__(self, sweep_interval=30, max_attempts=5, stale_after=300, keep_done_for=86400):
+        self.sweep_interval = sweep_interval
+        self.max_attempts = max_attempts
+        self.stale_after = stale_after
+        self.keep_done_for = keep_done_for
+        self.workers = 0
+        self._handlers = {}
+        self._queue = queue.Queue()
+        self._threads = []
+        self._sweeper = None
+        self._last_sweep = None
+        self._app = None
+        self._stats_lock = threading.Lock()
+        self._processed = 0
+        self._failures = 0
+        self._last_lag = None
+        self._avg_lag = None
+
+    def handler(self, kind):
+        """Register the function that runs jobs of the given kind."""
+        def decorator(f):
+            self._handlers[kind] = f
+            return f
+        return decorator
+
+    def enqueue(self, kind, **payload):
+        """Add a job to the current transaction; submit() it after the commit."""
+        job = OutboxJob(kind=kind, payload=json.dumps(payload), status='pending', attempts=0)
+        db.session.add(job)
+        return job
+
+    def submit(self, job):
+        """Hand a committed job to the workers."""
+        self._dispatch(job.id)
+
+    def _dispatch(self, job_id):
+        # Without a worker pool (e.g. JOB_QUEUE_WORKERS = 0) jobs run right away
+        if self.workers:
+            self._queue.put(job_id)
+        else:
+            self._run(job_id)
+
+    def start(self, app):
+        """Start the worker threads and the sweeper if they're not already running."""
+        self._app = app
+        self.workers = app.config.get('JOB_QUEUE_WORKERS', 2)
+        if self._threads and all(thread.is_alive() for thread in self._threads):
+            return
+        self._threads = []
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._work, name=f'job-worker-{i}'))
+        # Without workers the sweeper runs the retries itself
+        self._sweeper = threading.Thread(target=self._sweep_forever, name='job-sweeper')
+        self._threads.append(self._sweeper)
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def _claim(self, job_id, now):
+        result = db.session.execute(
+            update(OutboxJob)
+            .where(OutboxJob.id == job_id, OutboxJob.status == 'pending', OutboxJob.available_at <= now)
+            .values(status='running', started_at=now, attempts=OutboxJob.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _run(self, job_id):
+        """Claim and run one job. Returns True if this call ran it."""
+        now = datetime.utcnow()
+        if not self._claim(job_id, now):
+            return False
+
+        job = db.session.get(OutboxJob, job_id, populate_existing=True)
+        self._record_lag((now - job.created_at).total_seconds())
+        try:
+            handler = self._handlers[job.kind]
+            after_commit = handler(**json.loads(job.payload))
+            job.status = 'done'
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Job %d (%s) failed', job_id, job.kind)
+            self._fail(job_id, str(e))
+            return True
+
+        with self._stats_lock:
+            self._processed += 1
+        if after_commit:
+            try:
+                after_commit()
+            except Exception:
+                logger.exception('Post-commit step of job %d failed', job_id)
+        return True
+
+    def _fail(self, job_id, error):
+        job = db.session.get(OutboxJob, job_id, populate_existing=True)
+        if job.attempts >= self.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'pending'
+            job.available_at = datetime.utcnow() + timedelta(seconds=2 ** job.attempts)
+        job.last_error = error[:1000]
+        db.session.commit()
+        with self._stats_lock:
+            self._failures += 1
+
+    def _record_lag(self, lag):
+        with self._stats_lock:
+            self._last_lag = lag
+            self._avg_lag = lag if self._avg_lag is None else 0.9 * self._avg_lag + 0.1 * lag
+
+    def _work(self):
+        with self._app.app_context():
+            while True:
+                job_id = self._queue.get()
+                try:
+                    self._run(job_id)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Error running job %d', job_id)
+                finally:
+                    self._queue.task_done()
+
+    def sweep(self):
+        """Queue jobs that are due but not on the local queue, and tidy up old ones."""
+        now = datetime.utcnow()
+
+        # Jobs whose worker died mid-run go back to pending
+        db.session.execute(
+            update(OutboxJob)
+            .where(OutboxJob.status == 'running', OutboxJob.started_at < now - timedelta(seconds=self.stale_after))
+            .values(status='pending')
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            delete(OutboxJob)
+            .where(OutboxJob.status == 'done', OutboxJob.finished_at < now - timedelta(seconds=self.keep_done_for))
+        )
+        db.session.commit()
+
+        due = db.session.query(OutboxJob.id).filter(
+            OutboxJob.status == 'pending',
+            OutboxJob.available_at <= now
+        ).order_by(OutboxJob.id).limit(1000).all()
+        db.session.rollback()
+        for (job_id,) in due:
+            self._dispatch(job_id)
+        return len(due)
+
+    def _sweep_forever(self):
+        with self._app.app_context():
+            while True:
+                try:
+                    self.sweep()
+                    self._last_sweep = datetime.utcnow()
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Error sweeping the outbox')
+                time.sleep(self.sweep_interval)
+
+    def metrics(self):
+        """Queue depth and lag, for monitoring."""
+        now = datetime.utcnow()
+        counts = dict(db.session.query(OutboxJob.status, func.count(OutboxJob.id)).group_by(OutboxJob.status))
+        oldest_pending = db.session.query(func.min(OutboxJob.created_at)).filter(OutboxJob.status == 'pending').scalar()
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'sweeper_running': self._sweeper is not None and self._sweeper.is_alive(),
+                'sweep_interval_seconds': self.sweep_interval,
+                'last_sweep_age_seconds': (now - self._last_sweep).total_seconds() if self._last_sweep else None,
+                'queue_depth': self._queue.qsize(),
+                'pending': counts.get('pending', 0),
+                'running': counts.get('running', 0),
+                'failed': counts.get('failed', 0),
+                'oldest_pending_age_seconds': (now - oldest_pending).total_seconds() if oldest_pending else 0,
+                'last_lag_seconds': self._last_lag,
+                'avg_lag_seconds': self._avg_lag,
+                'processed': self._processed,
+                'failures': self._failures
+            }
+
+
+job_queue = JobQueue()
@@ -0,0 +1,60 @@
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import case, or_, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.lease import Lease
+
+# Identifies this process as a lease holder
+HOLDER_ID = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_lease(name, ttl, holder=HOLDER_ID, now=None):
+    """Take or renew the named lease for ttl seconds.
+
+    Succeeds if the lease is free, expired or already ours. The claim is a
+    single conditional UPDATE (or the first INSERT), so when several
+    processes race for an expired lease exactly one of them wins. Commits
+    and returns True if the caller now holds the lease.
+    """
+    now = now or datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+
+    result = db.session.execute(
+        update(Lease)
+        .where(Lease.name == name, or_(Lease.holder == holder, Lease.expires_at <= now))
+        .values(
+            holder=holder,
+            expires_at=expires_at,
+            acquired_at=case((Lease.holder == holder, Lease.acquired_at), else_=now)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        db.session.commit()
+        return True
+
+    if db.session.get(Lease, name) is not None:
+        db.session.rollback()
+        return False
+
+    try:
+        db.session.add(Lease(name=name, holder=holder, expires_at=expires_at, acquired_at=now))
+        db.session.commit()
+        return True
+    except IntegrityError:
+        # Another process created the lease first
+        db.session.rollback()
+        return False
+
+
+def release_lease(name, holder=HOLDER_ID):
+    """Give up the named lease if we hold it so another process can take over at once."""
+    db.session.execute(
+        update(Lease)
+        .where(Lease.name == name, Lease.holder == holder)
+        .values(expires_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
@@ -0,0 +1,183 @@
+"""Typed Socket.IO events and their compact wire format.
+
+Every event pushed to browsers is declared here once, as a list of fields
+each with the short key it travels under. A payload is encoded once per
+broadcast: keys are shortened, fields without a value are left out and
+datetimes are sent as epoch milliseconds. base.html hands the same schema
+to the browser, where onSocketEvent() expands the keys again, so handlers
+keep reading data.current_price and the like.
+"""
+import calendar
+import json
+from collections import defaultdict
+from app import socketio
+from app.utils import fastjson
+
+# Field kind of datetimes, sent as milliseconds since the epoch
+MS = 'ms'
+
+
+def epoch_ms(value):
+    """Milliseconds since the epoch of a naive UTC datetime."""
+    return calendar.timegm(value.utctimetuple()) * 1000 + value.microsecond // 1000
+
+
+class LiveEvent:
+    """A Socket.IO event with a fixed set of fields.
+
+    Each field is (name, key) or (name, key, kind). emit() takes the fields
+    by name and refuses unknown ones, so a typo fails on the server instead
+    of leaving a handler reading undefined.
+    """
+
+    def __init__(self, name, *fields):
+        self.name = name
+        self.keys = {}
+        self.kinds = {}
+        for field in fields:
+            self.keys[field[0]] = field[1]
+            if len(field) > 2:
+                self.kinds[field[0]] = field[2]
+        if len(set(self.keys.values())) != len(self.keys):
+            raise ValueError(f'Duplicate key in event {name}')
+
+    def encode(self, **values):
+        """The wire payload for values."""
+        payload = {}
+        for name, value in values.items():
+            key = self.keys.get(name)
+            if key is None:
+                raise TypeError(f'{self.name} has no field {name!r}')
+            if value is None:
+                continue
+            if self.kinds.get(name) == MS:
+                value = epoch_ms(value)
+            payload[key] = value
+        return payload
+
+    def emit(self, to, **values):
+        """Send the event to a room, or to a list of rooms with a single packet."""
+        payload = self.encode(**values)
+        if not to:
+            # socketio.emit() would take an empty list as "everyone"
+            return
+        socketio.emit(self.name, payload, to=to)
+
+    def schema(self):
+        """{key: [name, kind]}, how the browser expands a payload."""
+        return {key: [name, self.kinds.get(name)] for name, key in self.keys.items()}
+
+
+NEW_BID = LiveEvent(
+    'new_bid',
+    ('bid_id', 'i'),
+    ('auction_id', 'a'),
+    ('bidder_username', 'u'),
+    ('amount', 'p'),
+    ('created_at', 't', MS),
+    ('is_auto_bid', 'ab'),
+    ('is_customer_rep', 'cr'),
+    ('total_bids', 'n')
+)
+
+BID_UPDATE = LiveEvent(
+    'bid_update',
+    ('auction_id', 'a'),
+    ('current_price', 'p'),
+    ('next_min_bid', 'm'),
+    ('num_bids', 'n'),
+    ('highest_bidder_id', 'h'),
+    ('highest_bidder_username', 'hu'),
+    ('status', 's'),
+    ('your_bid', 'y')
+)
+
+NOTIFICATION = LiveEvent(
+    'notification',
+    ('title', 't'),
+    ('message', 'm'),
+    ('type', 'k'),
+    ('link', 'l')
+)
+
+# Sent to the auction room when it closes; pages have always listened for it
+# as auction_ended
+AUCTION_CLOSED = LiveEvent(
+    'auction_ended',
+    ('auction_id', 'a'),
+    ('title', 't'),
+    ('winner', 'w'),
+    ('winner_id', 'wi'),
+    ('end_time', 'e', MS)
+)
+
+NEW_ANSWER = LiveEvent(
+    'new_answer',
+    ('answer_id', 'i'),
+    ('question_id', 'q'),
+    ('auction_id', 'a'),
+    ('auction_title', 'at'),
+    ('user_id', 'u'),
+    ('question_user_id', 'qu'),
+    ('question_status', 's'),
+    ('answer_text', 'x'),
+    ('answer_username', 'n'),
+    ('answerer_is_rep', 'r'),
+    ('answer_timestamp', 't', MS)
+)
+
+EVENTS = (NEW_BID, BID_UPDATE, NOTIFICATION, AUCTION_CLOSED, NEW_ANSWER)
+
+
+def client_schema():
+    """{event name: {key: [name, kind]}} for the browser."""
+    return {event.name: event.schema() for event in EVENTS}
+
+
+def notification_groups(rows, title):
+    """[(rooms, NOTIFICATION fields)] for notification rows, one entry per distinct notification."""
+    rooms = defaultdict(list)
+    for row in rows:
+        rooms[row['type'], row['message'], row.get('reference_id')].append(f'user_{row["user_id"]}')
+    return [
+        (to, {
+            'title': title[type] if isinstance(title, dict) else title,
+            'message': message,
+            'type': type,
+            'link': f'/auction/{reference_id}' if reference_id else None
+        })
+        for (type, message, reference_id), to in rooms.items()
+    ]
+
+
+def emit_notifications(rows, title):
+    """Push notification rows, as given to Notification.insert_many, to their users.
+
+    title is a string or a {type: title} dict. The users getting the same
+    notification share one emit to all their rooms, so its packet is encoded
+    once however many of them there are.
+    """
+    for to, values in notification_groups(rows, title):
+        NOTIFICATION.emit(to, **values)
+
+
+class WireJSON:
+    """json module stand-in for Socket.IO packets that encodes with orjson when it's installed.
+
+    The packets ask for compact separators, which is the only output orjson
+    has. Anything orjson refuses (integer dict keys, say) goes to the json
+    module as before.
+    """
+
+    @staticmethod
+    def dumps(value, **kwargs):
+        if fastjson.orjson is not None:
+            try:
+                return fastjson.dumps(value)
+            except TypeError:
+                pass
+        return json.dumps(value, **kwargs)
+
+    @staticmethod
+    def loads(value, **kwargs):
+        return fastjson.loads(value)
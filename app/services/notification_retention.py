@@ -0,0 +1,139 @@
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, update
+from app import db
+from app.models.notification import Notification, adjust_unread
+
+logger = logging.getLogger(__name__)
+
+
+class RetentionReport:
+    """What one retention run did, and how long each part took."""
+
+    def __init__(self):
+        self.deleted = 0
+        self.delete_seconds = 0.0
+        self.groups_compacted = 0
+        self.rows_compacted = 0
+        self.compact_seconds = 0.0
+
+    @property
+    def seconds(self):
+        return self.delete_seconds + self.compact_seconds
+
+    def __str__(self):
+        return (
+            f'deleted {self.deleted} read notification(s) in {self.delete_seconds * 1000:.1f} ms; '
+            f'merged away {self.rows_compacted} repeat(s) from {self.groups_compacted} group(s) '
+            f'in {self.compact_seconds * 1000:.1f} ms'
+        )
+
+
+def delete_old_read(cutoff, chunk_size=1000):
+    """Delete read notifications created before cutoff, chunk_size per transaction. Returns the number deleted."""
+    total = 0
+    while True:
+        ids = [row[0] for row in db.session.query(Notification.id).filter(
+            Notification.created_at < cutoff, Notification.is_read == True
+        ).limit(chunk_size)]
+        if not ids:
+            break
+        total += Notification.delete_where(Notification.id.in_(ids), Notification.is_read == True)
+        db.session.commit()
+        if len(ids) < chunk_size:
+            break
+    return total
+
+
+def compact_repeats(types, since, cutoff, chunk_size=500):
+    """Collapse each user's repeated notifications of one type about one thing into a single row.
+
+    Looks at notifications of the given types created between since and
+    cutoff. Of each (user, type, reference) group with more than one row,
+    the newest is kept with the group's total in repeat_count, and stays
+    unread if any row of the group was. The others are deleted. Groups are
+    handled chunk_size per transaction. Returns (groups, rows removed).
+    """
+    window = (
+        Notification.type.in_(types),
+        Notification.reference_id.isnot(None),
+        Notification.created_at >= since,
+        Notification.created_at < cutoff
+    )
+    groups = (
+        db.session.query(
+            Notification.user_id, Notification.type, Notification.reference_id,
+            func.max(Notification.id), func.sum(Notification.repeat_count)
+        )
+        .filter(*window)
+        .group_by(Notification.user_id, Notification.type, Notification.reference_id)
+        .having(func.count() > 1)
+        .all()
+    )
+
+    removed = 0
+    for start in range(0, len(groups), chunk_size):
+        deltas = Counter()
+        for user_id, type, reference_id, keep_id, repeats in groups[start:start + chunk_size]:
+            repeats_of_group = (
+                *window,
+                Notification.user_id == user_id,
+                Notification.type == type,
+                Notification.reference_id == reference_id,
+                Notification.id < keep_id
+            )
+            # Unread and read rows go separately so the row counts say exactly
+            # how many unread notifications were removed, even if some were
+            # being marked read meanwhile
+            unread_removed = db.session.execute(
+                delete(Notification).where(*repeats_of_group, Notification.is_read == False)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            read_removed = db.session.execute(
+                delete(Notification).where(*repeats_of_group)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.execute(
+                update(Notification).where(Notification.id == keep_id).values(repeat_count=repeats)
+                .execution_options(synchronize_session=False)
+            )
+            reopened = 0
+            if unread_removed:
+                # The summary stays unread if any of its rows was
+                reopened = db.session.execute(
+                    update(Notification).where(Notification.id == keep_id, Notification.is_read == True)
+                    .values(is_read=False)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+            removed += unread_removed + read_removed
+            deltas[user_id] += reopened - unread_removed
+        adjust_unread(db.session.connection(), db.session, deltas)
+        db.session.commit()
+    return len(groups), removed
+
+
+def run_retention(retention_days, compact_after, compact_types, chunk_size=1000, now=None):
+    """Delete read notifications older than retention_days and compact repeats older than compact_after.
+
+    Every chunk is its own short transaction, so the job can run while the
+    site is busy. Returns a RetentionReport, which is also logged.
+    """
+    now = now or datetime.utcnow()
+    report = RetentionReport()
+
+    started = time.perf_counter()
+    report.deleted = delete_old_read(now - timedelta(days=retention_days), chunk_size)
+    report.delete_seconds = time.perf_counter() - started
+
+    if compact_types:
+        started = time.perf_counter()
+        # Older rows were compacted while they passed through this window
+        report.groups_compacted, report.rows_compacted = compact_repeats(
+            compact_types, now - timedelta(days=retention_days), now - compact_after, chunk_size
+        )
+        report.compact_seconds = time.perf_counter() - started
+
+    logger.info('Notification retention: %s', report)
+    return report
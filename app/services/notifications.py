@@ -0,0 +1,87 @@
+import threading
+import time
+from sqlalchemy import event, inspect, insert, update
+from app import db
+from app.models import User
+from app.models.cache_version import CacheVersion
+from app.models.notification import Notification
+
+CACHE_NAME = 'customer_reps'
+
+versions = CacheVersion.__table__
+
+
+class RepDirectory:
+    """Ids of the customer reps, held in memory by every worker.
+
+    Loaded with one query and reloaded when the 'customer_reps' row of
+    cache_versions moves, checked at most every check_interval seconds.
+    The User mapper events below bump that row in the same transaction as
+    any insert, delete or is_customer_rep change, so no route has to
+    remember to.
+    """
+
+    def __init__(self, check_interval=5):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0
+        self._ids = frozenset()
+
+    def ids(self):
+        """frozenset of the ids of every customer rep."""
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.check_interval:
+            with self._lock:
+                version = db.session.query(CacheVersion.version).filter_by(name=CACHE_NAME).scalar() or 0
+                if version != self._version:
+                    self._ids = frozenset(
+                        row[0] for row in db.session.query(User.id).filter(User.is_customer_rep == True)
+                    )
+                    self._version = version
+                self._checked_at = now
+        return self._ids
+
+    def invalidate(self, connection):
+        """Record on connection that the reps changed, so every worker reloads its set."""
+        result = connection.execute(
+            update(versions).where(versions.c.name == CACHE_NAME).values(version=versions.c.version + 1)
+        )
+        if result.rowcount == 0:
+            # The migration creates the row; databases made with create_all() start without it
+            connection.execute(insert(versions).values(name=CACHE_NAME, version=1))
+        self._version = None
+
+
+rep_directory = RepDirectory()
+
+
+def notify_users(user_ids, type, message, reference_id=None):
+    """Give each of user_ids the same notification, with one multi-row INSERT.
+
+    The caller commits. Returns the number of notifications added.
+    """
+    rows = [
+        {'user_id': user_id, 'type': type, 'message': message, 'reference_id': reference_id}
+        for user_id in sorted(set(user_ids))
+    ]
+    Notification.insert_many(rows)
+    return len(rows)
+
+
+def notify_reps(type, message, reference_id=None):
+    """Give every customer rep the same notification; see notify_users."""
+    return notify_users(rep_directory.ids(), type, message, reference_id)
+
+
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_delete')
+def rep_added_or_removed(mapper, connection, target):
+    if target.is_customer_rep:
+        rep_directory.invalidate(connection)
+
+
+@event.listens_for(User, 'after_update')
+def rep_status_changed(mapper, connection, target):
+    if inspect(target).attrs.is_customer_rep.history.has_changes():
+        rep_directory.invalidate(connection)
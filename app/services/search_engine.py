@@ -0,0 +1,338 @@
+import abc
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from sqlalchemy import and_, case, delete, event, func, insert, inspect, literal, or_, select
+from app import db
+from app.models import Auction, Item
+from app.models.search import SearchDocument, SearchPosting
+
+logger = logging.getLogger(__name__)
+
+postings = SearchPosting.__table__
+documents = SearchDocument.__table__
+
+TOKEN = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+
+# The last word of a query is also tried as a prefix if it isn't a whole indexed term,
+# as long as it's at least this long (the suggestion box starts at two characters too)
+MIN_PREFIX_LENGTH = 2
+
+STOPWORDS = frozenset('''
+a an and are as at be but by for from has have in is it its of on or that the this to was were will with
+'''.split())
+
+VOWEL = re.compile(r'[aeiouy]')
+
+
+def stem(word):
+    """Light English suffix stripping, so 'phones', 'phone' and 'phoned' share a term."""
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith('ies') and len(word) > 4:
+        return word[:-3] + 'y'
+    if word.endswith('sses'):
+        return word[:-2]
+    if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix):
+            base = word[:-len(suffix)]
+            if len(base) >= 3 and VOWEL.search(base):
+                # running -> run, stopped -> stop
+                if len(base) > 3 and base[-1] == base[-2] and base[-1] not in 'lsz':
+                    base = base[:-1]
+                return base
+    return word
+
+
+def tokenize(text):
+    """Lowercase, split into words, drop stopwords and stem."""
+    if not text:
+        return []
+    return [
+        stem(token)[:MAX_TERM_LENGTH]
+        for token in TOKEN.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def document_terms(title, description, item_name, item_description):
+    """Weighted term frequencies of an auction; title and item name count double."""
+    terms = Counter()
+    for text, weight in ((title, 2), (item_name, 2), (description, 1), (item_description, 1)):
+        for term in tokenize(text):
+            terms[term] += weight
+    return terms
+
+
+class SearchBackend(abc.ABC):
+    """Interface of a full-text backend.
+
+    Terms come in query order. matches() returns a selectable of
+    (auction_id, score) rows for the auctions containing every term (the
+    last one may be matched as a prefix), so callers can join it to
+    Auction and keep filtering, sorting and paginating in SQL. A backend
+    built on SQLite FTS5 or MySQL FULLTEXT only has to provide these
+    methods.
+
+    statistics() returns whatever the scores depend on beyond the matched
+    auctions themselves, as JSON-compatible data (or None). Passing it back
+    to matches() for later pages ranks them exactly like the first.
+    """
+
+    @abc.abstractmethod
+    def index(self, connection, auction_ids):
+        """(Re)index the given auctions within connection's transaction."""
+
+    @abc.abstractmethod
+    def remove(self, connection, auction_ids):
+        """Drop the given auctions from the index."""
+
+    @abc.abstractmethod
+    def statistics(self, terms, snapshot=None):
+        """Scoring statistics for terms; snapshot is returned as is if it still applies to them."""
+
+    @abc.abstractmethod
+    def matches(self, terms, statistics=None):
+        """(auction_id, score) selectable of the auctions matching every term."""
+
+
+class PostingsBackend(SearchBackend):
+    """Inverted index kept in the search_postings/search_documents tables, ranked with BM25.
+
+    Works the same on MySQL and SQLite and is shared by every worker. The
+    collection statistics BM25 needs (document count, average length and
+    each term's document frequency) are cached for stats_ttl seconds.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, stats_ttl=60):
+        self.stats_ttl = stats_ttl
+        self._stats = None
+        self._stats_at = 0
+        self._lock = threading.Lock()
+
+    def index(self, connection, auction_ids):
+        auction_ids = list(auction_ids)
+        if not auction_ids:
+            return
+        self.remove(connection, auction_ids)
+        rows = connection.execute(
+            select(Auction.id, Auction.title, Auction.description, Item.name, Item.description)
+            .join(Item, Item.id == Auction.item_id)
+            .where(Auction.id.in_(auction_ids))
+        ).all()
+
+        posting_rows, document_rows = [], []
+        for auction_id, title, description, item_name, item_description in rows:
+            terms = document_terms(title, description, item_name, item_description)
+            posting_rows.extend({'term': term, 'auction_id': auction_id, 'tf': tf} for term, tf in terms.items())
+            document_rows.append({'auction_id': auction_id, 'length': sum(terms.values())})
+        if posting_rows:
+            connection.execute(insert(postings), posting_rows)
+        if document_rows:
+            connection.execute(insert(documents), document_rows)
+
+    def remove(self, connection, auction_ids):
+        auction_ids = list(auction_ids)
+        connection.execute(delete(postings).where(postings.c.auction_id.in_(auction_ids)))
+        connection.execute(delete(documents).where(documents.c.auction_id.in_(auction_ids)))
+
+    def _collection_stats(self):
+        with self._lock:
+            if self._stats is None or time.monotonic() - self._stats_at > self.stats_ttl:
+                count, average = db.session.execute(
+                    select(func.count(documents.c.auction_id), func.avg(documents.c.length))
+                ).one()
+                self._stats = (count or 0, float(average or 1))
+                self._stats_at = time.monotonic()
+            return self._stats
+
+    def statistics(self, terms, snapshot=None):
+        """{'n': document count, 'avgdl': average length, 'df': {term: document frequency}}.
+
+        If the last term isn't indexed as a whole word it is matched as a
+        prefix, so 'cam' finds 'camera'; it then appears in df as 'cam*',
+        with the number of auctions having a word that starts with it.
+        snapshot is returned unchanged if it was taken for the same terms.
+        """
+        words = sorted(set(terms))
+        prefixed = sorted(set(terms[:-1]) | {terms[-1] + '*'})
+        if self._valid_snapshot(snapshot, (words, prefixed)):
+            return snapshot
+
+        document_count, average_length = self._collection_stats()
+        frequencies = dict(db.session.execute(
+            select(postings.c.term, func.count()).where(postings.c.term.in_(words)).group_by(postings.c.term)
+        ).all())
+        df = {term: frequencies.get(term, 0) for term in words}
+
+        last = terms[-1]
+        if not df[last] and len(last) >= MIN_PREFIX_LENGTH:
+            df = {term: df[term] for term in terms[:-1]}
+            df[last + '*'] = db.session.execute(
+                select(func.count(postings.c.auction_id.distinct())).where(self._starts_with(last))
+            ).scalar()
+        return {'n': document_count, 'avgdl': average_length, 'df': df}
+
+    @staticmethod
+    def _valid_snapshot(snapshot, keys):
+        try:
+            return (
+                isinstance(snapshot['n'], int)
+                and isinstance(snapshot['avgdl'], (int, float)) and snapshot['avgdl'] > 0
+                and sorted(snapshot['df']) in keys
+                and all(isinstance(df, int) for df in snapshot['df'].values())
+            )
+        except (TypeError, KeyError):
+            return False
+
+    @staticmethod
+    def _starts_with(prefix):
+        # A range rather than LIKE, so the primary key index on term serves it on every database
+        return and_(postings.c.term >= prefix, postings.c.term < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+    def matches(self, terms, statistics=None):
+        statistics = self.statistics(terms, statistics)
+        document_count, average_length = statistics['n'], float(statistics['avgdl'])
+
+        # BM25 inverse document frequency of each term, passed into the query as constants;
+        # a term that occurs nowhere weighs nothing and means nothing matches every term
+        idf = {
+            term: math.log(1 + (max(document_count, df) - df + 0.5) / (df + 0.5)) if df else 0.0
+            for term, df in statistics['df'].items()
+        }
+        words = [term for term in idf if not term.endswith('*')]
+        prefix = next((term[:-1] for term in idf if term.endswith('*')), None)
+
+        # Postings that aren't one of the words are those of the prefix
+        weight = literal(idf.get(f'{prefix}*', 0.0))
+        if words:
+            weight = case({term: idf[term] for term in words}, value=postings.c.term, else_=weight)
+        norm = self.k1 * (1 - self.b + self.b * documents.c.length / average_length)
+        score = func.sum(weight * postings.c.tf * (self.k1 + 1) / (postings.c.tf + norm))
+
+        if prefix is None:
+            wanted = postings.c.term.in_(words)
+            every_term = func.count() == len(words)
+        else:
+            # An auction may have several words starting with the prefix; they count as one
+            wanted = or_(postings.c.term.in_(words), self._starts_with(prefix))
+            matched = case((postings.c.term.in_(words), postings.c.term), else_=literal('*')) if words else literal('*')
+            every_term = func.count(matched.distinct()) == len(words) + 1
+
+        return (
+            select(postings.c.auction_id.label('auction_id'), score.label('score'))
+            .join(documents, documents.c.auction_id == postings.c.auction_id)
+            .where(wanted)
+            .group_by(postings.c.auction_id)
+            .having(every_term)
+            .subquery('search_matches')
+        )
+
+
+class SearchEngine:
+    """Full-text search over auctions and their items.
+
+    Auctions are (re)indexed automatically: a session hook collects the
+    auctions and items whose searchable text changed in each flush and
+    updates the backend in the same transaction. Bulk UPDATE/DELETE
+    statements bypass the hook; `flask rebuild-search-index` catches up.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def statistics(self, text, snapshot=None):
+        """What the scores of the matches for text depend on, or None if text has no words.
+
+        Hand it to matches() or filter() for every page of a result list,
+        e.g. inside the pagination cursor, and the pages are ranked alike
+        even when other auctions are indexed in between. snapshot, taken
+        this way for an earlier page, is kept if it was for the same words.
+        """
+        terms = tokenize(text)
+        if not terms:
+            return None
+        return self.backend.statistics(terms, snapshot)
+
+    def matches(self, text, statistics=None):
+        """(auction_id, score) subquery for the auctions matching every word of text, or None if text has no words.
+
+        The last word also matches as the start of a word when it isn't a
+        word of any auction itself, so results show up while it's typed.
+        """
+        terms = tokenize(text)
+        if not terms:
+            return None
+        return self.backend.matches(terms, statistics)
+
+    def filter(self, query, text, statistics=None):
+        """Restrict an Auction query to the matches for text; returns the query and the score column."""
+        matches = self.matches(text, statistics)
+        if matches is None:
+            return query, None
+        return query.join(matches, matches.c.auction_id == Auction.id), matches.c.score
+
+    def rebuild(self, batch_size=1000):
+        """Reindex every auction. Returns the number indexed."""
+        connection = db.session.connection()
+        connection.execute(delete(postings))
+        connection.execute(delete(documents))
+        total = 0
+        last_id = 0
+        while True:
+            ids = [row[0] for row in connection.execute(
+                select(Auction.id).where(Auction.id > last_id).order_by(Auction.id).limit(batch_size)
+            )]
+            if not ids:
+                break
+            self.backend.index(connection, ids)
+            total += len(ids)
+            last_id = ids[-1]
+        db.session.commit()
+        return total
+
+
+search_engine = SearchEngine(PostingsBackend())
+
+SEARCHABLE = {Auction: ('title', 'description', 'item_id'), Item: ('name', 'description')}
+
+
+def _text_changed(obj, attributes):
+    state = inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+
+@event.listens_for(db.session, 'after_flush')
+def update_search_index(session, flush_context):
+    reindex, removed, items = set(), set(), set()
+    for obj in session.new:
+        if isinstance(obj, Auction):
+            reindex.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Auction) and _text_changed(obj, SEARCHABLE[Auction]):
+            reindex.add(obj.id)
+        elif isinstance(obj, Item) and _text_changed(obj, SEARCHABLE[Item]):
+            items.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Auction):
+            removed.add(obj.id)
+    if not (reindex or removed or items):
+        return
+
+    connection = session.connection()
+    if items:
+        reindex.update(row[0] for row in connection.execute(select(Auction.id).where(Auction.item_id.in_(items))))
+    reindex -= removed
+    if removed:
+        search_engine.backend.remove(connection, removed)
+    if reindex:
+        search_engine.backend.index(connection, reindex)
@@ -0,0 +1,130 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import and_, case, func, literal
+from app import db
+from app.models import Auction, Category, Item, ItemAttribute
+from app.services.category_tree import category_tree
+from app.services.search_engine import search_engine
+
+# (label, min price, max price) of the price facet; ranges include min, exclude max
+PRICE_BUCKETS = [
+    ('Under $10', None, 10),
+    ('$10 - $50', 10, 50),
+    ('$50 - $100', 50, 100),
+    ('$100 - $500', 100, 500),
+    ('$500 and up', 500, None),
+]
+
+
+class Facets:
+    """Result counts per category subtree, price bucket and status.
+
+    Each facet is counted with every filter applied except its own, so
+    the counts say how many results picking that option would give.
+    """
+
+    def __init__(self, total, categories, prices, statuses):
+        self.total = total
+        self.categories = categories  # category id -> count, including subcategories
+        self.prices = prices          # [(label, min price, max price, count)]
+        self.statuses = statuses      # 'active'/'ended'/'all' -> count
+
+    def category_count(self, category_id):
+        return self.categories.get(category_id, 0)
+
+
+def _price_bucket():
+    whens = [(Auction.initial_price < high, i) for i, (_, low, high) in enumerate(PRICE_BUCKETS) if high is not None]
+    return case(*whens, else_=len(PRICE_BUCKETS) - 1)
+
+
+def _status_criteria(now):
+    """WHERE criteria of each status; together they cover every auction once."""
+    return {
+        'active': (Auction.is_active == True, Auction.end_time > now),
+        'ended': (Auction.end_time <= now,),
+        'other': (Auction.is_active.isnot(True), Auction.end_time > now),
+    }
+
+
+def facet_counts(text=None, category_id=None, min_price=None, max_price=None, status='active',
+                 attribute_filters=(), price_below=None, now=None):
+    """Count the facets of a search.
+
+    The auctions of the requested status are grouped by category, price
+    bucket and whether they fall in the requested price range, and the
+    filters are then applied to the handful of groups in Python. The other
+    statuses only need one number each, counted with every filter in SQL,
+    so a browse of active auctions never reads the ended ones.
+
+    min_price and max_price are inclusive; price_below, which the bucket
+    links pass, excludes the bucket's upper bound the way the buckets do.
+    """
+    now = now or datetime.utcnow()
+    criteria = _status_criteria(now)
+
+    bounds = []
+    if min_price is not None:
+        bounds.append(Auction.initial_price >= min_price)
+    if max_price is not None:
+        bounds.append(Auction.initial_price <= max_price)
+    if price_below is not None:
+        bounds.append(Auction.initial_price < price_below)
+
+    def matching(*columns):
+        query = db.session.query(*columns).select_from(Auction).join(Item, Item.id == Auction.item_id)
+        if text:
+            query, score = search_engine.filter(query, text)
+            if score is None:
+                query = query.filter(db.false())
+        for name, operator, value in attribute_filters or ():
+            query = query.filter(ItemAttribute.filter_clause(name, operator, value))
+        return query
+
+    in_range = case((and_(*bounds), 1), else_=0) if bounds else literal(1)
+    columns = (Item.category_id, _price_bucket(), in_range)
+    grouped = [status] if status in ('active', 'ended') else list(criteria)
+    groups = []
+    for name in grouped:
+        rows = matching(*columns, func.count(Auction.id)).filter(*criteria[name]).group_by(*columns)
+        groups.extend((row_category, bucket, name, row_in_range, count)
+                      for row_category, bucket, row_in_range, count in rows)
+
+    in_category = set(category_tree.subtree_ids(category_id)) if category_id else None
+
+    def wanted(row, skip):
+        row_category, _, _, row_in_range, _ = row
+        if skip != 'category' and in_category is not None and row_category not in in_category:
+            return False
+        if skip != 'price' and not row_in_range:
+            return False
+        return True
+
+    by_category = Counter()
+    for row in groups:
+        if wanted(row, 'category'):
+            by_category[row[0]] += row[4]
+    categories = Counter()
+    for leaf_id, count in by_category.items():
+        for ancestor_id in category_tree.ancestor_ids(leaf_id):
+            categories[ancestor_id] += count
+
+    by_bucket = Counter()
+    for row in groups:
+        if wanted(row, 'price'):
+            by_bucket[row[1]] += row[4]
+    prices = [(label, low, high, by_bucket[i]) for i, (label, low, high) in enumerate(PRICE_BUCKETS)]
+
+    statuses = Counter()
+    for row in groups:
+        if wanted(row, 'status'):
+            statuses[row[2]] += row[4]
+    for name in criteria.keys() - set(grouped):
+        query = matching(func.count(Auction.id)).filter(*criteria[name], *bounds)
+        if category_id:
+            query = query.filter(Item.category_id.in_(Category.subtree_ids_select(category_id)))
+        statuses[name] = query.scalar()
+    statuses = {'active': statuses['active'], 'ended': statuses['ended'], 'all': sum(statuses.values())}
+
+    total = sum(row[4] for row in groups if wanted(row, None))
+    return Facets(total, dict(categories), prices, statuses)
@@ -0,0 +1,93 @@
+import time
+from datetime import datetime, timedelta
+import socketio
+from sqlalchemy import create_engine, delete, func, insert, or_, select
+from app.models.socket_message import SocketMessage
+
+messages = SocketMessage.__table__
+
+
+class DatabaseRelayManager(socketio.PubSubManager):
+    """Socket.IO client manager that fans messages out through a database table.
+
+    A drop-in for Flask-SocketIO's Redis/Kombu managers when no broker is
+    available: every worker appends the emits, room changes and callbacks
+    it publishes to socketio_messages, and a listener in each worker polls
+    for rows newer than the last one it has seen. Rows are pruned once they
+    are older than retention seconds.
+
+    Auto-increment ids can commit out of order, so ids skipped by a poll are
+    remembered for a short grace period and fetched if they show up late.
+    """
+    name = 'dbrelay'
+
+    def __init__(self, url, channel='flask-socketio', write_only=False, logger=None,
+                 poll_interval=0.05, retention=60, grace=5):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.url = url
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.grace = grace
+        self.engine = create_engine(url, pool_pre_ping=True)
+        self._published = 0
+
+    def _publish(self, data):
+        with self.engine.begin() as conn:
+            conn.execute(insert(messages).values(
+                channel=self.channel,
+                payload=self.json.dumps(data),
+                created_at=datetime.utcnow()
+            ))
+            self._published += 1
+            if self._published % 100 == 0:
+                conn.execute(delete(messages).where(
+                    messages.c.created_at < datetime.utcnow() - timedelta(seconds=self.retention)
+                ))
+
+    def _listen(self):
+        with self.engine.connect() as conn:
+            last_id = conn.execute(
+                select(func.coalesce(func.max(messages.c.id), 0)).where(messages.c.channel == self.channel)
+            ).scalar()
+            conn.rollback()
+        gaps = {}
+
+        while True:
+            query = select(messages.c.id, messages.c.payload).where(messages.c.channel == self.channel)
+            if gaps:
+                query = query.where(or_(messages.c.id > last_id, messages.c.id.in_(list(gaps))))
+            else:
+                query = query.where(messages.c.id > last_id)
+
+            with self.engine.connect() as conn:
+                rows = conn.execute(query.order_by(messages.c.id)).all()
+                conn.rollback()
+
+            now = time.monotonic()
+            for message_id, payload in rows:
+                if message_id > last_id:
+                    for missing in range(last_id + 1, message_id):
+                        gaps[missing] = now
+                    last_id = message_id
+                else:
+                    gaps.pop(message_id, None)
+                yield payload
+
+            # Ids that never turned up belong to rolled back transactions
+            for message_id, seen_at in list(gaps.items()):
+                if now - seen_at > self.grace:
+                    del gaps[message_id]
+
+            self.server.sleep(self.poll_interval)
+
+
+def message_queue_options(config):
+    """Build the SocketIO.init_app options for the configured message queue."""
+    url = config.get('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return {}
+    if url == 'db://':
+        return {'client_manager': DatabaseRelayManager(config['SQLALCHEMY_DATABASE_URI'])}
+    if url.startswith('db+'):
+        return {'client_manager': DatabaseRelayManager(url[len('db+'):])}
+    return {'message_queue': url}
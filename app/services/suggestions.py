@@ -0,0 +1,241 @@
+import heapq
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import Auction, Item
+
+logger = logging.getLogger(__name__)
+
+WORD_START = re.compile(r'(?<!\w)\w')
+WHITESPACE = re.compile(r'\s+')
+
+# Sorts after every character a key can contain
+KEY_END = '\U0010ffff'
+
+
+def normalize(text):
+    return WHITESPACE.sub(' ', text or '').strip().lower()
+
+
+def phrase_keys(phrase):
+    """The phrase from each of its words on, so 'cam' finds 'Leica Camera'."""
+    return [phrase[match.start():] for match in WORD_START.finditer(phrase)]
+
+
+class SuggestionIndex:
+    """In-memory prefix index of active auction titles and item names.
+
+    Every phrase is filed in a sorted list under the suffix starting at
+    each of its words, so the phrases completing a prefix are one bisect
+    range. A phrase is weighted by its active auctions (one plus each
+    one's bid count); item names without an active auction weigh nothing
+    but are still suggested. Ranges too large to rank on the fly have their
+    top suggestions memoized until one of their phrases changes.
+
+    Auctions leave the index when their end time passes. The create, end
+    and toggle routes update it directly; rows added by other processes
+    are loaded every check_interval seconds, and the whole index (with
+    current bid counts) is rebuilt every rebuild_interval seconds.
+    """
+
+    def __init__(self, limit=10, check_interval=5, rebuild_interval=60, memo_threshold=200):
+        self.limit = limit
+        self.check_interval = check_interval
+        self.rebuild_interval = rebuild_interval
+        self.memo_threshold = memo_threshold
+        self._lock = threading.Lock()
+        self._bulk = False
+        self._rebuilding = False
+        self._loaded_at = None
+        self._checked_at = 0
+        self._clear()
+
+    def _clear(self):
+        self._keys = []         # sorted (key, phrase)
+        self._phrases = {}      # phrase -> [display text, weight, references]
+        self._auctions = {}     # auction id -> (title, item name, weight, end time)
+        self._expiry = []       # heap of (end time, auction id)
+        self._memo = {}
+        self._max_auction_id = 0
+        self._max_item_id = 0
+
+    def __len__(self):
+        return len(self._phrases)
+
+    def _forget(self, phrase):
+        for key in phrase_keys(phrase):
+            for end in range(1, len(key) + 1):
+                self._memo.pop(key[:end], None)
+
+    def _add_phrase(self, text, weight):
+        phrase = normalize(text)
+        if not phrase:
+            return
+        entry = self._phrases.get(phrase)
+        if entry is None:
+            entry = self._phrases[phrase] = [WHITESPACE.sub(' ', text).strip(), 0, 0]
+            for key in phrase_keys(phrase):
+                if self._bulk:
+                    self._keys.append((key, phrase))
+                else:
+                    insort(self._keys, (key, phrase))
+        entry[1] += weight
+        entry[2] += 1
+        self._forget(phrase)
+
+    def _drop_phrase(self, text, weight):
+        phrase = normalize(text)
+        entry = self._phrases.get(phrase)
+        if entry is None:
+            return
+        entry[1] -= weight
+        entry[2] -= 1
+        self._forget(phrase)
+        if entry[2] <= 0:
+            del self._phrases[phrase]
+            for key in phrase_keys(phrase):
+                i = bisect_left(self._keys, (key, phrase))
+                if i < len(self._keys) and self._keys[i] == (key, phrase):
+                    del self._keys[i]
+
+    def _add_auction(self, auction_id, title, item_name, end_time, bid_count):
+        self._remove_auction(auction_id)
+        weight = 1 + (bid_count or 0)
+        self._auctions[auction_id] = (title, item_name, weight, end_time)
+        self._max_auction_id = max(self._max_auction_id, auction_id)
+        heapq.heappush(self._expiry, (end_time, auction_id))
+        self._add_phrase(title, weight)
+        self._add_phrase(item_name, weight)
+
+    def _remove_auction(self, auction_id):
+        entry = self._auctions.pop(auction_id, None)
+        if entry:
+            title, item_name, weight, end_time = entry
+            self._drop_phrase(title, weight)
+            self._drop_phrase(item_name, weight)
+
+    def _expire(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            end_time, auction_id = heapq.heappop(self._expiry)
+            entry = self._auctions.get(auction_id)
+            # Skip entries left behind when an auction was re-added
+            if entry and entry[3] == end_time:
+                self._remove_auction(auction_id)
+
+    def _load_auctions(self, *criteria):
+        now = datetime.utcnow()
+        rows = db.session.query(
+            Auction.id, Auction.title, Item.name, Auction.end_time, Auction.bid_count
+        ).join(Item, Item.id == Auction.item_id).filter(
+            Auction.is_active == True,
+            Auction.end_time > now,
+            *criteria
+        )
+        for row in rows.yield_per(5000):
+            self._add_auction(*row)
+
+    def _load_items(self, *criteria):
+        for item_id, name in db.session.query(Item.id, Item.name).filter(*criteria).yield_per(5000):
+            self._max_item_id = max(self._max_item_id, item_id)
+            self._add_phrase(name, 0)
+
+    def rebuild(self):
+        """Reload every active auction and item name from the database.
+
+        The new index is built aside and swapped in, so suggestions keep
+        being served from the old one meanwhile.
+        """
+        fresh = SuggestionIndex()
+        # Sort the keys once at the end instead of inserting each in order
+        fresh._bulk = True
+        fresh._load_items()
+        fresh._load_auctions()
+        fresh._keys.sort()
+        with self._lock:
+            self._keys = fresh._keys
+            self._phrases = fresh._phrases
+            self._auctions = fresh._auctions
+            self._expiry = fresh._expiry
+            self._memo = {}
+            self._max_auction_id = fresh._max_auction_id
+            self._max_item_id = fresh._max_item_id
+            self._loaded_at = self._checked_at = time.monotonic()
+        logger.info('Suggestion index built with %d phrases', len(fresh._phrases))
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context():
+                self.rebuild()
+        except Exception:
+            logger.exception('Error rebuilding the suggestion index')
+        finally:
+            self._rebuilding = False
+
+    def _refresh(self):
+        now = time.monotonic()
+        if self._loaded_at is None:
+            self.rebuild()
+        elif now - self._loaded_at > self.rebuild_interval:
+            with self._lock:
+                if self._rebuilding:
+                    return
+                self._rebuilding = True
+            thread = threading.Thread(
+                target=self._rebuild_in_background,
+                args=(current_app._get_current_object(),),
+                name='suggestion-index-rebuild'
+            )
+            thread.daemon = True
+            thread.start()
+        elif now - self._checked_at > self.check_interval:
+            with self._lock:
+                self._load_items(Item.id > self._max_item_id)
+                self._load_auctions(Auction.id > self._max_auction_id)
+                self._checked_at = now
+
+    def add(self, auction):
+        """Index an auction that was created or reactivated."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            if auction.item_id > self._max_item_id:
+                # A new item; its name stays suggestable after the auction ends
+                self._max_item_id = auction.item_id
+                self._add_phrase(auction.item.name, 0)
+            self._add_auction(auction.id, auction.title, auction.item.name, auction.end_time, auction.bid_count)
+
+    def remove(self, auction_id):
+        """Drop an auction that was ended, deactivated or deleted early."""
+        with self._lock:
+            self._remove_auction(auction_id)
+
+    def _top(self, prefix):
+        lo = bisect_left(self._keys, (prefix,))
+        hi = bisect_left(self._keys, (prefix + KEY_END,), lo)
+        if hi - lo > self.memo_threshold:
+            top = self._memo.get(prefix)
+            if top is not None:
+                return top
+        phrases = {phrase for _, phrase in self._keys[lo:hi]}
+        top = heapq.nsmallest(self.limit, phrases, key=lambda p: (-self._phrases[p][1], p))
+        if hi - lo > self.memo_threshold:
+            self._memo[prefix] = top
+        return top
+
+    def suggest(self, text):
+        """Up to limit phrases with a word starting with text, most popular first."""
+        prefix = normalize(text)
+        if len(prefix) < 2:
+            return []
+        self._refresh()
+        with self._lock:
+            self._expire(datetime.utcnow())
+            return [self._phrases[phrase][0] for phrase in self._top(prefix)]
+
+
+suggestion_index = SuggestionIndex()
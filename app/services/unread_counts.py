@@ -0,0 +1,71 @@
+import logging
+from sqlalchemy import event, select
+from app import db, socketio
+from app.models import User
+from app.models.notification import UNREAD_CHANGED, Notification
+
+logger = logging.getLogger(__name__)
+
+# session.info key holding the counts read just before a commit, emitted after it
+PENDING_PUSH = 'unread_notifications_pending_push'
+
+
+def read_counts(session, user_ids, chunk_size=500):
+    """{user id: stored unread count} for user_ids, by primary key."""
+    user_ids = sorted(user_ids)
+    counts = {}
+    for start in range(0, len(user_ids), chunk_size):
+        counts.update(session.execute(
+            select(User.id, User.unread_notifications).where(User.id.in_(user_ids[start:start + chunk_size]))
+        ).all())
+    return counts
+
+
+def push_counts(counts):
+    """Send each user their unread count, so open pages update their badge without polling."""
+    for user_id, count in counts.items():
+        socketio.emit('unread_count', {'count': count}, room=f'user_{user_id}')
+
+
+@event.listens_for(db.session, 'before_commit')
+def read_changed_counts(session):
+    if session.new or session.dirty or session.deleted:
+        # Counters of ORM-added notifications are only bumped when they flush
+        session.flush()
+    changed = session.info.pop(UNREAD_CHANGED, None)
+    if changed:
+        session.info.setdefault(PENDING_PUSH, {}).update(read_counts(session, changed))
+
+
+@event.listens_for(db.session, 'after_commit')
+def push_changed_counts(session):
+    counts = session.info.pop(PENDING_PUSH, None)
+    if counts:
+        try:
+            push_counts(counts)
+        except Exception:
+            logger.exception('Error pushing unread notification counts')
+
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_changed_counts(session):
+    session.info.pop(UNREAD_CHANGED, None)
+    session.info.pop(PENDING_PUSH, None)
+
+
+def find_unread_count_drift():
+    """[(user, expected)] for the users whose stored unread counter disagrees with their notifications."""
+    expected = Notification.count_unread()
+    drift = []
+    for user in User.query.order_by(User.id).yield_per(1000):
+        count = expected.get(user.id, 0)
+        if user.unread_notifications != count:
+            drift.append((user, count))
+    return drift
+
+
+def fix_unread_count_drift(drift):
+    """Write the counted value back to each drifted user."""
+    for user, count in drift:
+        user.unread_notifications = count
+    db.session.commit()
@@ -3,138 +3,16 @@ from flask_socketio import emit, join_room, leave_room
 from flask_login import current_user
 from app.models import Auction, Bid, Alert, Wishlist, User, Question, Answer
 from app import db, socketio
-import time
-import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 from app.models.notification import Notification
+from app.services.close_scheduler import close_scheduler
+from app.services.live_events import AUCTION_CLOSED, BID_UPDATE, NEW_ANSWER, NEW_BID, NOTIFICATION
+from app.services.notifications import notify_reps
 from flask import current_app
 
-_monitor_thread = None
-_app = None
-
-def background_auction_monitor():
-    """Background task to monitor auctions and send notifications."""
-    global _app
-    if _app is None:
-        print("Error: No application context available")
-        return
-        
-    with _app.app_context():
-        while True:
-            try:
-                # Check auctions ending soon (within 5 minutes)
-                ending_soon = Auction.query.filter(
-                    Auction.end_time <= datetime.utcnow() + timedelta(minutes=5),
-                    Auction.end_time > datetime.utcnow(),
-                    Auction.is_active == True
-                ).all()
-                
-                for auction in ending_soon:
-                    # Notify seller
-                    notification = Notification(
-                        user_id=auction.seller_id,
-                        type='auction_ending',
-                        message=f'Your auction "{auction.title}" is ending in less than 5 minutes!',
-                        reference_id=auction.id
-                    )
-                    db.session.add(notification)
-                    socketio.emit('notification', {
-                        'title': 'Auction Ending Soon',
-                        'message': notification.message,
-                        'type': notification.type,
-                        'link': f'/auction/{auction.id}'
-                    }, room=f'user_{auction.seller_id}')
-                    
-                    # Notify bidders
-                    for bid in auction.bids:
-                        if bid.bidder_id != auction.seller_id:
-                            notification = Notification(
-                                user_id=bid.bidder_id,
-                                type='auction_ending',
-                                message=f'An auction you bid on "{auction.title}" is ending in less than 5 minutes!',
-                                reference_id=auction.id
-                            )
-                            db.session.add(notification)
-                            socketio.emit('notification', {
-                                'title': 'Auction Ending Soon',
-                                'message': notification.message,
-                                'type': notification.type,
-                                'link': f'/auction/{auction.id}'
-                            }, room=f'user_{bid.bidder_id}')
-                
-                # Check ended auctions
-                ended = Auction.query.filter(
-                    Auction.end_time <= datetime.utcnow(),
-                    Auction.is_active == True
-                ).all()
-                
-                for auction in ended:
-                    auction.is_active = False
-                    winner = auction.determine_winner()
-                    
-                    if winner:
-                        # Notify winner
-                        notification = Notification(
-                            user_id=winner.id,
-                            type='auction_won',
-                            message=f'Congratulations! You won the auction for "{auction.title}"!',
-                            reference_id=auction.id
-                        )
-                        db.session.add(notification)
-                        socketio.emit('notification', {
-                            'title': 'Auction Won',
-                            'message': notification.message,
-                            'type': notification.type,
-                            'link': f'/auction/{auction.id}'
-                        }, room=f'user_{winner.id}')
-                        
-                        # Notify seller
-                        notification = Notification(
-                            user_id=auction.seller_id,
-                            type='auction_ended',
-                            message=f'Your auction "{auction.title}" has ended. The winner is {winner.username}.',
-                            reference_id=auction.id
-                        )
-                        db.session.add(notification)
-                        socketio.emit('notification', {
-                            'title': 'Auction Ended',
-                            'message': notification.message,
-                            'type': notification.type,
-                            'link': f'/auction/{auction.id}'
-                        }, room=f'user_{auction.seller_id}')
-                        
-                        # Notify other bidders
-                        for bid in auction.bids:
-                            if bid.bidder_id not in [winner.id, auction.seller_id]:
-                                notification = Notification(
-                                    user_id=bid.bidder_id,
-                                    type='auction_ended',
-                                    message=f'The auction "{auction.title}" has ended. You were outbid.',
-                                    reference_id=auction.id
-                                )
-                                db.session.add(notification)
-                                socketio.emit('notification', {
-                                    'title': 'Auction Ended',
-                                    'message': notification.message,
-                                    'type': notification.type,
-                                    'link': f'/auction/{auction.id}'
-                                }, room=f'user_{bid.bidder_id}')
-                
-                db.session.commit()
-                time.sleep(30)  # Check every 30 seconds
-                
-            except Exception as e:
-                print(f"Error in auction monitor: {str(e)}")
-                time.sleep(60)  # Wait longer on error
-
 def start_background_monitor(app=None):
-    """Start the background monitor if it's not already running."""
-    global _monitor_thread, _app
-    _app = app
-    if _monitor_thread is None or not _monitor_thread.is_alive():
-        _monitor_thread = threading.Thread(target=background_auction_monitor)
-        _monitor_thread.daemon = True
-        _monitor_thread.start()
+    """Start the deadline-driven auction close scheduler if it's not already running."""
+    close_scheduler.start(app)
 
 @socketio.on('connect')
 def handle_connect():
@@ -205,24 +83,17 @@ def handle_new_question(data):
             }, room=f'auction_{auction_id}')
             
             # Notify customer reps about the new question
-            customer_reps = User.query.filter_by(is_customer_rep=True).all()
-            for rep in customer_reps:
-                notification = Notification(
-                    user_id=rep.id,
-                    title='New Question',
-                    message=f'New question about auction "{question.auction.title}"',
-                    type='new_question',
-                    link=f'/auction/{auction_id}'
-                )
-                db.session.add(notification)
+            notify_reps('new_question', f'New question about auction "{question.auction.title}"', auction_id)
+            db.session.commit()
             
             # Send a single notification to all customer reps
-            socketio.emit('notification', {
-                'title': 'New Question',
-                'message': f'New question from {question.user.username} about auction "{question.auction.title}"',
-                'type': 'new_question',
-                'link': f'/auction/{auction_id}'
-            }, room='customer_reps')
+            NOTIFICATION.emit(
+                'customer_reps',
+                title='New Question',
+                message=f'New question from {question.user.username} about auction "{question.auction.title}"',
+                type='new_question',
+                link=f'/auction/{auction_id}'
+            )
 
 @socketio.on('new_answer')
 def handle_new_answer(data):
@@ -235,16 +106,18 @@ def handle_new_answer(data):
         question = Question.query.get(question_id)
         if question:
             # Emit to all users in the auction room
-            socketio.emit('new_answer', {
-                'question_id': question.id,
-                'auction_id': auction_id,
-                'user_id': current_user.id,
-                'question_user_id': question.user_id,
-                'answer_text': answer_text,
-                'answer_username': current_user.username,
-                'answer_timestamp': datetime.utcnow().isoformat(),
-                'auction_title': question.auction.title
-            }, room=f'auction_{auction_id}')
+            NEW_ANSWER.emit(
+                f'auction_{auction_id}',
+                question_id=question.id,
+                auction_id=auction_id,
+                user_id=current_user.id,
+                question_user_id=question.user_id,
+                answer_text=answer_text,
+                answer_username=current_user.username,
+                answerer_is_rep=current_user.is_customer_rep,
+                answer_timestamp=datetime.utcnow(),
+                auction_title=question.auction.title
+            )
             
             # Notify the user who asked the question
             notification = Notification(
@@ -254,12 +127,13 @@ def handle_new_answer(data):
                 reference_id=auction_id
             )
             db.session.add(notification)
-            socketio.emit('notification', {
-                'title': 'Question Answered',
-                'message': notification.message,
-                'type': notification.type,
-                'link': f'/auction/{auction_id}'
-            }, room=f'user_{question.user_id}')
+            NOTIFICATION.emit(
+                f'user_{question.user_id}',
+                title='Question Answered',
+                message=notification.message,
+                type=notification.type,
+                link=f'/auction/{auction_id}'
+            )
 
 @socketio.on('new_bid')
 def handle_new_bid(data):
@@ -279,7 +153,8 @@ def handle_new_bid(data):
         emit('bid_response', {'status': 'error', 'message': 'Invalid bid amount'})
         return
     
-    auction = Auction.query.get(auction_id)
+    # Lock the auction row so validation and the bid summary update see the same price
+    auction = Auction.get_for_update(auction_id)
     if not auction:
         emit('bid_response', {'status': 'error', 'message': 'Auction not found'})
         return
@@ -311,6 +186,9 @@ def handle_new_bid(data):
         })
         return
     
+    # Everyone who leads during this bid, in order
+    leaders = [auction.leading_bidder_id]
+    
     # Create the bid
     bid = Bid(
         auction_id=auction_id,
@@ -319,55 +197,28 @@ def handle_new_bid(data):
         auto_bid_limit=auto_bid_limit
     )
     db.session.add(bid)
+    db.session.flush()
+    auction.record_bid(bid)
     db.session.commit()
+    leaders.append(auction.leading_bidder_id)
     
     # Process automatic bidding
-    from app.routes.auction import process_auto_bidding
-    process_auto_bidding(auction)
+    from app.routes.auction import notify_other_bidders, process_auto_bidding
+    leaders.extend(process_auto_bidding(auction))
     
-    # Get updated auction data
+    # Broadcast the updated auction to the room and tell everyone who lost the lead
     auction = Auction.query.get(auction_id)
-    highest_bid = Bid.query.filter_by(auction_id=auction_id).order_by(Bid.amount.desc()).first()
-    
-    # Broadcast the updated auction data to all clients in the auction room
-    room = f"auction_{auction_id}"
-    emit('bid_update', {
-        'status': 'success',
-        'auction_id': auction_id,
-        'current_price': auction.current_price,
-        'next_min_bid': auction.next_valid_bid_amount(),
-        'highest_bidder_id': highest_bid.bidder_id if highest_bid else None,
-        'highest_bidder_username': highest_bid.bidder.username if highest_bid else None,
-        'num_bids': auction.num_bids,
-        'your_bid': {'status': 'success', 'amount': bid_amount}
-    }, room=room)
-    
-    # Notify the outbid user if applicable
-    second_highest_bid = Bid.query.filter(
-        Bid.auction_id == auction_id,
-        Bid.bidder_id != current_user.id,
-        Bid.amount < bid_amount
-    ).order_by(Bid.amount.desc()).first()
-    
-    if second_highest_bid:
-        outbid_room = f"user_{second_highest_bid.bidder_id}"
-        emit('outbid_notification', {
-            'auction_id': auction_id,
-            'auction_title': auction.title,
-            'your_bid': second_highest_bid.amount,
-            'new_highest_bid': bid_amount
-        }, room=outbid_room)
+    highest_bidder = auction.highest_bidder
+    notify_other_bidders(
+        auction, leaders,
+        status='success',
+        highest_bidder_username=highest_bidder.username if highest_bidder else None,
+        your_bid={'status': 'success', 'amount': bid_amount}
+    )
 
 def notify_auction_closed(auction_id, winner_id):
-    """Emit an 'auction_closed' event to everyone in that auction's room."""
-    socketio.emit(
-        'auction_closed',
-        {
-            'auction_id': auction_id,
-            'winner_id':   winner_id
-        },
-        room=f'auction_{auction_id}'
-    )
+    """Tell everyone in that auction's room that it closed."""
+    AUCTION_CLOSED.emit(f'auction_{auction_id}', auction_id=auction_id, winner_id=winner_id)
 
 def notify_winner(auction_id, winner_id):
     """Emit a private 'winner_notification' to the winning user's room."""
@@ -385,28 +236,30 @@ def notify_winner(auction_id, winner_id):
 
 def emit_new_bid(auction_id, bid):
     """Emit a new bid event to all users in the auction room."""
-    bid_data = {
-        'bidder': bid.bidder.username,
-        'amount': bid.amount,
-        'created_at': bid.created_at.isoformat(),
-        'is_auto_bid': bid.is_auto_bid,
-        'total_bids': Bid.query.filter_by(auction_id=auction_id).count()
-    }
-    emit('new_bid', bid_data, room=f'auction_{auction_id}')
+    NEW_BID.emit(
+        f'auction_{auction_id}',
+        bid_id=bid.id,
+        auction_id=auction_id,
+        bidder_username=bid.bidder.username,
+        amount=bid.amount,
+        created_at=bid.created_at,
+        is_auto_bid=bid.is_auto_bid,
+        total_bids=Bid.query.filter_by(auction_id=auction_id).count()
+    )
 
 def emit_notification(user_id, notification_data):
     """Emit a notification to a specific user."""
-    emit('notification', notification_data, room=f'user_{user_id}')
+    NOTIFICATION.emit(f'user_{user_id}', **notification_data)
 
 def emit_auction_ended(auction_id):
     """Emit an auction ended event to all users in the auction room."""
     auction = Auction.query.get(auction_id)
     if auction:
-        winner = auction.determine_winner()
-        end_data = {
-            'auction_id': auction_id,
-            'title': auction.title,
-            'winner': winner.username if winner else None,
-            'end_time': datetime.utcnow().isoformat()
-        }
-        emit('auction_ended', end_data, room=f'auction_{auction_id}')
\ No newline at end of file
+        winner = auction.winner
+        AUCTION_CLOSED.emit(
+            f'auction_{auction_id}',
+            auction_id=auction_id,
+            title=auction.title,
+            winner=winner.username if winner else None,
+            end_time=datetime.utcnow()
+        )
\ No newline at end of file
@@ -41,7 +41,7 @@ socket.on('connect', () => {
     console.log('Connected to server');
 });
 
-socket.on('notification', (data) => {
+onSocketEvent(socket, 'notification', (data) => {
     // Create notification element
     const notification = document.createElement('div');
     notification.className = `alert alert-${data.type === 'error' ? 'danger' : 'info'} alert-dismissible fade show`;
@@ -84,7 +84,7 @@ function initAuctionSocket(auctionId) {
     });
     
     // Handle new answers
-    socket.on('new_answer', function(data) {
+    onSocketEvent(socket, 'new_answer', function(data) {
         const questionsContainer = document.querySelector('.questions-container');
         if (questionsContainer) {
             // Reload questions section
@@ -97,7 +97,7 @@ function initAuctionSocket(auctionId) {
     });
     
     // Handle notifications
-    socket.on('notification', function(data) {
+    onSocketEvent(socket, 'notification', function(data) {
         // Create notification element
         const notification = document.createElement('div');
         notification.className = `alert alert-${data.type === 'error' ? 'danger' : 'info'} alert-dismissible fade show`;
@@ -121,7 +121,7 @@ function initAuctionSocket(auctionId) {
     });
     
     // Handle new bids
-    socket.on('new_bid', function(data) {
+    onSocketEvent(socket, 'new_bid', function(data) {
         // Update current price
         const currentPrice = document.querySelector('.current-price');
         if (currentPrice) {
@@ -134,16 +134,16 @@ function initAuctionSocket(auctionId) {
             const bidItem = document.createElement('div');
             bidItem.className = 'bid-item';
             bidItem.innerHTML = `
-                <span class="bidder">${data.username}</span>
+                <span class="bidder">${data.bidder_username}</span>
                 <span class="bid-amount">$${data.amount.toFixed(2)}</span>
-                <span class="bid-time">${new Date(data.timestamp).toLocaleString()}</span>
+                <span class="bid-time">${new Date(data.created_at).toLocaleString()}</span>
             `;
             bidHistory.insertBefore(bidItem, bidHistory.firstChild);
         }
     });
     
     // Handle auction end
-    socket.on('auction_ended', function(data) {
+    onSocketEvent(socket, 'auction_ended', function(data) {
         // Update auction status
         const auctionStatus = document.querySelector('.auction-status');
         if (auctionStatus) {
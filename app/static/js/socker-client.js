@@ -63,7 +63,7 @@ function setupPageSpecificListeners(socket) {
         }
         
         // Listen for bid updates
-        socket.on('bid_update', function(data) {
+        onSocketEvent(socket, 'bid_update', function(data) {
             updateAuctionUI(data);
         });
     }
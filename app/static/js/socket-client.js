@@ -43,7 +43,7 @@ document.addEventListener('DOMContentLoaded', function() {
     });
     
     // Handle new answer event
-    socket.on('new_answer', function(data) {
+    onSocketEvent(socket, 'new_answer', function(data) {
         const questionId = data.question_id;
         const questionItem = document.querySelector(`.question-item[data-question-id="${questionId}"]`);
         
@@ -112,7 +112,7 @@ document.addEventListener('DOMContentLoaded', function() {
     });
     
     // Handle new bid event
-    socket.on('new_bid', function(data) {
+    onSocketEvent(socket, 'new_bid', function(data) {
         // Update bid history table
         const tbody = document.getElementById('bid-history-body');
         if (tbody) {
@@ -188,11 +188,11 @@ document.addEventListener('DOMContentLoaded', function() {
     });
     
     // Handle auction ended notifications
-    socket.on('auction_ended', function(data) {
+    onSocketEvent(socket, 'auction_ended', function(data) {
         showNotification('Auction Ended', 
             data.winner ? 
-                `The auction "${data.auction_title}" has ended. Winner: ${data.winner}` :
-                `The auction "${data.auction_title}" has ended. No winner was determined.`,
+                `The auction "${data.title}" has ended. Winner: ${data.winner}` :
+                `The auction "${data.title}" has ended. No winner was determined.`,
             'info',
             `/auctions/${data.auction_id}`
         );
@@ -325,7 +325,7 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     // Handle new answers
-    socket.on('new_answer', function(data) {
+    onSocketEvent(socket, 'new_answer', function(data) {
         const questionItem = document.querySelector(`.question-item[data-question-id="${data.question_id}"]`);
         if (questionItem) {
             // Update status badge
@@ -386,7 +386,7 @@ document.addEventListener('DOMContentLoaded', function() {
 
     function setupNotificationListeners(socket) {
         // Listen for general notifications
-        socket.on('notification', function(data) {
+        onSocketEvent(socket, 'notification', function(data) {
             showGenericNotification(data);
         });
         
@@ -404,6 +404,20 @@ document.addEventListener('DOMContentLoaded', function() {
         socket.on('auction_ending_notification', function(data) {
             showAuctionEndingNotification(data);
         });
+        
+        // The server pushes the unread count whenever it changes
+        socket.on('unread_count', function(data) {
+            updateNotificationBadge(data.count);
+        });
+    }
+    
+    // Function to show the unread count in the navbar badge
+    function updateNotificationBadge(count) {
+        const badge = document.getElementById('notification-badge');
+        if (badge) {
+            badge.querySelector('.notification-count').textContent = count;
+            badge.style.display = count > 0 ? '' : 'none';
+        }
     }
 
     // Function to show a generic notification
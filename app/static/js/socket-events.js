@@ -0,0 +1,22 @@
+// Expands the compact payloads of the typed Socket.IO events (app/services/live_events.py).
+// window.SOCKET_EVENTS maps each event to {key: [field, kind]}; base.html renders it.
+function expandSocketPayload(event, data) {
+    const fields = (window.SOCKET_EVENTS || {})[event];
+    if (!fields || !data) {
+        return data;
+    }
+    const expanded = {};
+    for (const key in data) {
+        const [name, kind] = fields[key] || [key, null];
+        // Timestamps travel as epoch milliseconds
+        expanded[name] = kind === 'ms' ? new Date(data[key]).toISOString() : data[key];
+    }
+    return expanded;
+}
+
+// socket.on() for a typed event; handler gets the payload with its full field names
+function onSocketEvent(socket, event, handler) {
+    socket.on(event, function(data) {
+        handler(expandSocketPayload(event, data));
+    });
+}
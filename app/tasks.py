@@ -1,43 +1,29 @@
-from datetime import datetime
-from . import db
+from datetime import timedelta
 from flask import current_app
-from .models.auction import Auction
-from .models import Bid
-from .socket_events import notify_auction_closed, notify_winner
 from flask_mail import Message
-from app import mail
+from app import mail, scheduler
+from app.services.leases import acquire_lease
+from app.services.notification_retention import run_retention
 
-def finalize_auctions():
-    """Scan for ended auctions, finalize them, and send alerts."""
-    # Ensure we have app context if APScheduler doesn't automatically push one
-    with current_app.app_context():
-        now = datetime.utcnow()
-        ended = (
-            Auction.query
-                   .filter(Auction.end_time <= now, Auction.status == 'open')
-                   .all()
-        )
-
-        for auction in ended:
-            auction.status = 'closed'
-            highest = (
-                Bid.query
-                   .filter_by(auction_id=auction.id)
-                   .order_by(Bid.amount.desc())
-                   .first()
-            )
+# Only the process holding this lease runs the notification retention job
+RETENTION_LEASE = 'notification-retention'
 
-            winner_id = None
-            if highest and (auction.reserve_price is None or highest.amount >= auction.reserve_price):
-                winner_id = highest.bidder_id
+def prune_notifications():
+    """Delete old read notifications and compact repeats, if no other process is doing it.
 
-            auction.winner_id = winner_id
-            db.session.add(auction)
-            db.session.commit()
-
-            notify_auction_closed(auction.id, winner_id)
-            if winner_id:
-                notify_winner(auction.id, winner_id)
+    Scheduled hourly through the JOBS config. Returns the RetentionReport,
+    or None if another process holds the lease.
+    """
+    # APScheduler runs jobs outside any request, so push the app's context
+    with scheduler.app.app_context():
+        if not acquire_lease(RETENTION_LEASE, 2 * 3600):
+            return None
+        config = current_app.config
+        return run_retention(
+            config['NOTIFICATION_RETENTION_DAYS'],
+            timedelta(hours=config['NOTIFICATION_COMPACT_AFTER_HOURS']),
+            config['NOTIFICATION_COMPACT_TYPES']
+        )
 
 def send_notification_email(to_email, subject, message):
     """Send a notification email to a user."""
@@ -0,0 +1,79 @@
+"""Measure matching new auctions against many alerts.
+
+Used by `flask bench-alerts`: `alerts` alerts are seeded with a mix of
+keywords, categories and price ranges, a tenth of them inactive, and a
+series of new auctions is matched against them both through an
+AlertIndex and the way it was done before the index, by loading every
+active alert and calling Alert.matches_auction on each. Both must find
+the same alerts.
+"""
+import time
+from sqlalchemy import insert
+from app import db
+from app.models import Alert, Auction
+from app.services.alert_index import AlertIndex
+from app.utils import bench_data
+
+
+def seed(alerts, auctions, rng):
+    user_ids = bench_data.seed_users(100)
+    category_ids = bench_data.seed_categories(30, rng)
+    vocabulary = bench_data.WORDS + [f'w{n}' for n in range(3000)]
+
+    rows = []
+    for n in range(alerts):
+        keywords = category_id = min_price = max_price = None
+        if rng.random() < 0.7:
+            keywords = ', '.join(rng.sample(vocabulary, rng.randint(1, 3)))
+        if keywords is None or rng.random() < 0.4:
+            category_id = rng.choice(category_ids)
+        if rng.random() < 0.3:
+            min_price = rng.choice([1, 10, 100, 1000])
+        if rng.random() < 0.3:
+            max_price = rng.choice([50, 500, 5000])
+        rows.append({
+            'user_id': user_ids[n % len(user_ids)], 'keywords': keywords, 'category_id': category_id,
+            'min_price': min_price, 'max_price': max_price, 'is_active': rng.random() < 0.9
+        })
+    for start in range(0, len(rows), 5000):
+        db.session.execute(insert(Alert), rows[start:start + 5000])
+    db.session.commit()
+
+    item_ids = bench_data.seed_items(auctions, category_ids, rng)
+    return bench_data.seed_auctions(item_ids, user_ids, bench_data.FAR_FUTURE, rng)
+
+
+def run(alerts=100000, auctions=20, linear=3, seed_value=0):
+    """{name: value} of matching auctions through the index and linearly."""
+    rng = bench_data.new_rng(seed_value)
+    auction_ids = seed(alerts, auctions, rng)
+    new_auctions = Auction.query.filter(Auction.id.in_(auction_ids)).order_by(Auction.id).all()
+
+    index = AlertIndex()
+    started = time.perf_counter()
+    index.rebuild()
+    built = time.perf_counter() - started
+
+    matched = {}
+    started = time.perf_counter()
+    for auction in new_auctions:
+        matched[auction.id] = index.match(auction)
+    indexed = (time.perf_counter() - started) / len(new_auctions)
+
+    linear = min(linear, len(new_auctions))
+    agree = True
+    started = time.perf_counter()
+    for auction in new_auctions[:linear]:
+        active = Alert.query.filter_by(is_active=True).all()
+        found = sorted((alert.id, alert.user_id) for alert in active if alert.matches_auction(auction))
+        agree = agree and found == matched[auction.id]
+    scanned = (time.perf_counter() - started) / linear if linear else 0
+
+    return {
+        'active alerts': len(index),
+        'index built in (ms)': round(built * 1000, 1),
+        'matches per auction': round(sum(map(len, matched.values())) / len(new_auctions), 1),
+        'index ms per auction': round(indexed * 1000, 2),
+        'linear ms per auction': round(scanned * 1000, 1) if linear else '-',
+        'same matches': agree if linear else '-'
+    }
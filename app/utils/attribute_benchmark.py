@@ -0,0 +1,41 @@
+"""Measure reading item attributes.
+
+Used by `flask bench-attributes`: an item (never saved) gets `attributes`
+attributes, and every one of them is read the way Item used to do it,
+parsing the JSON column on each access, and through the parsed dict the
+item now keeps. Parsing and serializing the payload once is timed with
+the json module and with orjson, which app.utils.fastjson uses when it
+is installed. Nothing touches the database.
+"""
+import json
+import timeit
+from app.models import Item
+from app.utils import fastjson
+
+
+def microseconds(function, repeat):
+    return timeit.timeit(function, number=repeat) / repeat * 1e6
+
+
+def run(attributes=50, repeat=2000):
+    """[(what, microseconds per call, or None if orjson isn't installed)]."""
+    values = {f'attribute_{n}': f'value number {n}' for n in range(attributes)}
+    item = Item(name='Benchmark item')
+    item.attribute_values = values
+    raw = item.attributes
+
+    def read_parsing_each_time():
+        return [json.loads(item.attributes).get(name) for name in values]
+
+    def read_cached():
+        return [item.get_attribute_value(name) for name in values]
+
+    orjson = fastjson.orjson
+    return [
+        (f'read all {attributes}, parsing each time', microseconds(read_parsing_each_time, repeat)),
+        (f'read all {attributes}, parsed once', microseconds(read_cached, repeat)),
+        ('parse with json', microseconds(lambda: json.loads(raw), repeat)),
+        ('parse with orjson', microseconds(lambda: orjson.loads(raw), repeat) if orjson else None),
+        ('serialize with json', microseconds(lambda: json.dumps(values), repeat)),
+        ('serialize with orjson', microseconds(lambda: orjson.dumps(values), repeat) if orjson else None)
+    ]
@@ -0,0 +1,137 @@
+"""Bulk test data for the `flask bench-*` commands.
+
+The benchmarks need tens of thousands to millions of rows, so they are
+written with multi-row INSERTs that skip the ORM events (search index,
+rep cache, unread counters); a benchmark rebuilds what it needs itself.
+They are meant for an empty scratch database: is_empty() lets a command
+refuse anything else and clear() empties the database again afterwards.
+"""
+import itertools
+import random
+from datetime import datetime
+from sqlalchemy import delete, insert, select
+from app import db
+from app.models import Auction, Category, Item, User
+
+# Words titles, descriptions and keywords are drawn from
+WORDS = '''
+vintage antique classic retro modern rare limited signed original sealed mint used refurbished
+camera lens leica canon nikon sony fujifilm tripod flash film digital mirrorless
+phone iphone samsung pixel tablet laptop macbook thinkpad monitor keyboard mouse headphones speaker
+guitar fender gibson amplifier piano violin drum synthesizer vinyl record turntable
+watch rolex omega seiko casio bracelet necklace ring earrings gold silver diamond pearl
+sneakers nike adidas jordan boots jacket leather denim wool silk dress handbag wallet
+chair table desk lamp sofa rug mirror clock vase painting print poster sculpture
+bicycle helmet skateboard tent backpack kayak fishing rod golf clubs tennis racket
+lego puzzle doll train model car comic book novel atlas map coin stamp card
+'''.split()
+
+# End time of seeded auctions, far enough ahead that close_scheduler leaves them alone
+FAR_FUTURE = datetime(2100, 1, 1)
+
+# Tables a benchmark leaves alone: lease holders and cache versions belong to the running app
+KEEP_TABLES = {'leases', 'cache_versions'}
+
+NOT_EMPTY = (
+    'Benchmarks fill the database with test rows and empty it again afterwards. '
+    'Point DATABASE_URL at an empty, migrated scratch database, e.g. '
+    'DATABASE_URL=sqlite:////tmp/bench.db flask db upgrade'
+)
+
+
+def is_empty():
+    """True if the database holds no users, items or auctions."""
+    return all(db.session.query(model.id).first() is None for model in (User, Item, Auction))
+
+
+def clear():
+    """Delete every row a benchmark may have written."""
+    db.session.rollback()
+    for table in reversed(db.metadata.sorted_tables):
+        if table.name not in KEEP_TABLES:
+            db.session.execute(delete(table))
+    db.session.commit()
+
+
+def insert_rows(model, rows, chunk_size=5000):
+    """Insert rows (an iterable of dicts) chunk_size per statement and commit. Returns their ids, in order."""
+    last_id = db.session.query(db.func.max(model.id)).scalar() or 0
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            break
+        db.session.execute(insert(model.__table__), chunk)
+    db.session.commit()
+    return [row[0] for row in db.session.execute(
+        select(model.id).where(model.id > last_id).order_by(model.id)
+    )]
+
+
+def phrase(rng, words, vocabulary=WORDS):
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+def seed_users(count, prefix='bench'):
+    """count users with a throwaway password hash. Returns their ids."""
+    return insert_rows(User, (
+        {'username': f'{prefix}{n}', 'email': f'{prefix}{n}@example.com', 'password_hash': '!', 'unread_notifications': 0}
+        for n in range(count)
+    ))
+
+
+def seed_categories(count, rng):
+    """A random tree of count categories, added through the ORM so the closure table follows. Returns their ids."""
+    categories = []
+    for n in range(count):
+        parent = rng.choice(categories) if categories and rng.random() < 0.7 else None
+        category = Category(name=f'Category {n}', parent_id=parent.id if parent else None)
+        db.session.add(category)
+        db.session.flush()
+        categories.append(category)
+    db.session.commit()
+    return [category.id for category in categories]
+
+
+def seed_items(count, category_ids, rng, name_words=3, description_words=20, vocabulary=WORDS):
+    """count items with random names and descriptions. Returns their ids."""
+    return insert_rows(Item, (
+        {
+            'name': phrase(rng, name_words, vocabulary)[:100],
+            'description': phrase(rng, description_words, vocabulary),
+            'category_id': rng.choice(category_ids)
+        }
+        for _ in range(count)
+    ))
+
+
+def seed_auctions(item_ids, seller_ids, end_time, rng, title_words=4, vocabulary=WORDS, **values):
+    """One active auction per item, ending at end_time (or end_time(n) for the n-th). Returns their ids.
+
+    values override the columns of every auction.
+    """
+    def rows():
+        for n, item_id in enumerate(item_ids):
+            price = float(rng.choice([5, 20, 80, 300, 2000, 9000]))
+            row = {
+                'item_id': item_id,
+                'seller_id': rng.choice(seller_ids),
+                'title': phrase(rng, title_words, vocabulary)[:128],
+                'description': phrase(rng, 12, vocabulary),
+                'initial_price': price,
+                'min_increment': 1.0,
+                'secret_min_price': price,
+                'current_price': price,
+                'bid_count': 0,
+                'end_time': end_time(n) if callable(end_time) else end_time,
+                'is_active': True,
+                'winner_notified': False
+            }
+            row.update(values)
+            yield row
+
+    return insert_rows(Auction, rows())
+
+
+def new_rng(seed=None):
+    return random.Random(seed)
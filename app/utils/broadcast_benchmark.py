@@ -0,0 +1,137 @@
+"""Measure what a broadcast costs the server.
+
+Used by `flask bench-broadcasts`: a standalone Socket.IO server is given
+`members` connected clients, all in one auction room and each in their own
+user room, and every broadcast is sent both the way the routes used to
+(long keys, ISO timestamps, the json module, one emit per user for
+notifications) and through the typed events of app.services.live_events.
+Packets are counted instead of being written to sockets, so the CPU time
+is what encoding and fanning out costs, without the network.
+"""
+import json
+import time
+from datetime import datetime
+import socketio
+from socketio import packet
+from app.services.auction_closing import closing_notifications
+from app.services.live_events import (
+    AUCTION_CLOSED, BID_UPDATE, NEW_ANSWER, NEW_BID, NOTIFICATION, WireJSON, notification_groups
+)
+
+ROOM = 'auction_1'
+
+
+class LegacyPacket(packet.Packet):
+    json = json
+
+
+class WirePacket(packet.Packet):
+    json = WireJSON
+
+
+class CountingServer(socketio.Server):
+    """Socket.IO server whose clients are counters."""
+
+    def __init__(self, members):
+        super().__init__(async_mode='threading')
+        self.packets = 0
+        self.bytes = 0
+        self._last = None
+        self._last_size = 0
+        for user_id in range(1, members + 1):
+            sid = self.manager.connect(f'eio{user_id}', '/')
+            self.manager.enter_room(sid, '/', ROOM)
+            self.manager.enter_room(sid, '/', f'user_{user_id}')
+
+    def _send_eio_packet(self, eio_sid, eio_pkt):
+        # One packet object is sent to every member of a room; size it once
+        if eio_pkt is not self._last:
+            self._last = eio_pkt
+            self._last_size = len(eio_pkt.data.encode())
+        self.packets += 1
+        self.bytes += self._last_size
+
+
+def scenarios(members):
+    """{name: (legacy broadcast, typed broadcast)}, each a function of the server."""
+    now = datetime.utcnow()
+    bid = dict(
+        bid_id=48213, auction_id=1, bidder_username='vintage_collector', amount=1250.0,
+        created_at=now, is_auto_bid=False, is_customer_rep=False, total_bids=37
+    )
+    update = dict(
+        auction_id=1, current_price=1250.0, next_min_bid=1260.0, num_bids=37, highest_bidder_id=812
+    )
+    answer = dict(
+        answer_id=913, question_id=2231, auction_id=1, auction_title='Leica M3 with Summicron 50mm',
+        user_id=4, question_user_id=812, question_status='answered',
+        answer_text='Yes, the shutter was serviced last spring and all speeds are accurate.',
+        answer_username='support_anna', answer_timestamp=now
+    )
+    title = 'Leica M3 with Summicron 50mm'
+    rows = closing_notifications(1, title, members + 1, 2, 'user2', range(1, members + 1))
+    titles = {'auction_won': 'Auction Won', 'auction_ended': 'Auction Ended'}
+
+    def legacy_room(event, values):
+        def send(server):
+            payload = {
+                name: value.isoformat() if isinstance(value, datetime) else value
+                for name, value in values.items()
+            }
+            server.emit(event, payload, to=ROOM)
+        return send
+
+    def typed_room(event, values):
+        def send(server):
+            server.emit(event.name, event.encode(**values), to=ROOM)
+        return send
+
+    def legacy_closing(server):
+        for row in rows:
+            server.emit('notification', {
+                'title': titles[row['type']],
+                'message': row['message'],
+                'type': row['type'],
+                'link': f'/auction/{row["reference_id"]}'
+            }, to=f'user_{row["user_id"]}')
+        server.emit('auction_ended', {
+            'auction_id': 1, 'title': title, 'winner': 'user2', 'end_time': now.isoformat()
+        }, to=ROOM)
+
+    def typed_closing(server):
+        for to, values in notification_groups(rows, titles):
+            server.emit(NOTIFICATION.name, NOTIFICATION.encode(**values), to=to)
+        server.emit(AUCTION_CLOSED.name, AUCTION_CLOSED.encode(
+            auction_id=1, title=title, winner='user2', end_time=now
+        ), to=ROOM)
+
+    return {
+        'new_bid': (legacy_room('new_bid', bid), typed_room(NEW_BID, bid)),
+        'bid_update': (legacy_room('bid_update', update), typed_room(BID_UPDATE, update)),
+        'new_answer': (legacy_room('new_answer', answer), typed_room(NEW_ANSWER, answer)),
+        'auction closed': (legacy_closing, typed_closing),
+    }
+
+
+def measure(server, packet_class, send, repeat):
+    """(bytes, packets, CPU seconds) of one broadcast, averaged over repeat."""
+    server.packet_class = packet_class
+    server.packets = server.bytes = 0
+    started = time.process_time()
+    for _ in range(repeat):
+        send(server)
+    seconds = time.process_time() - started
+    return server.bytes // repeat, server.packets // repeat, seconds / repeat
+
+
+def run(members=1000, repeat=50):
+    """[(scenario, legacy (bytes, packets, seconds), typed (bytes, packets, seconds))]."""
+    server = CountingServer(members)
+    results = []
+    for name, (legacy, typed) in scenarios(members).items():
+        results.append((
+            name,
+            measure(server, LegacyPacket, legacy, repeat),
+            measure(server, WirePacket, typed, repeat)
+        ))
+    return results
@@ -0,0 +1,101 @@
+"""Measure how long closing a wave of expired auctions takes.
+
+Used by `flask bench-closing`: `auctions` auctions are seeded with a third
+of them left without bids, a third sold and a third below their reserve,
+then finalize_expired_auctions closes them all, batch by batch, the way
+close_scheduler does. Their end times lie far in the future and the run
+passes its own `now`, so a close_scheduler running in the same database
+never gets to them first.
+"""
+import logging
+import statistics
+import time
+from datetime import timedelta
+from sqlalchemy import bindparam, insert, update
+from app import db
+from app.models import Auction, Bid
+from app.models.notification import Notification
+from app.services.auction_closing import finalize_expired_auctions
+from app.utils import bench_data
+
+END_TIME = bench_data.FAR_FUTURE
+
+
+class BatchTimes(logging.Handler):
+    """Collects the milliseconds finalize_expired_auctions logs for each batch."""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.times = []
+
+    def emit(self, record):
+        self.times.append(record.args[2])
+
+
+def seed(auctions, bidders, rng):
+    seller_ids = bench_data.seed_users(10, prefix='seller')
+    bidder_ids = bench_data.seed_users(bidders, prefix='bidder')
+    category_ids = bench_data.seed_categories(1, rng)
+    item_ids = bench_data.seed_items(auctions, category_ids, rng, description_words=5)
+    auction_ids = bench_data.seed_auctions(
+        item_ids, seller_ids, lambda n: END_TIME + timedelta(seconds=n), rng, secret_min_price=50.0,
+        initial_price=10.0, current_price=10.0
+    )
+
+    # n % 3: 0 has no bids, 1 ends above its reserve, 2 below it
+    bids = []
+    summaries = []
+    for n, auction_id in enumerate(auction_ids):
+        if n % 3 == 0:
+            continue
+        amounts = [40.0, 60.0] if n % 3 == 1 else [20.0, 30.0]
+        placed = rng.sample(bidder_ids, len(amounts))
+        for bidder_id, amount in zip(placed, amounts):
+            bids.append({'auction_id': auction_id, 'bidder_id': bidder_id, 'amount': amount, 'created_at': END_TIME})
+        summaries.append((auction_id, amounts[-1], len(amounts), placed[-1]))
+    for start in range(0, len(bids), 5000):
+        db.session.execute(insert(Bid), bids[start:start + 5000])
+    db.session.execute(
+        update(Auction.__table__).where(Auction.id == bindparam('b_id')).values(
+            current_price=bindparam('b_price'), bid_count=bindparam('b_count'),
+            leading_bidder_id=bindparam('b_leader')
+        ),
+        [{'b_id': a, 'b_price': p, 'b_count': c, 'b_leader': l} for a, p, c, l in summaries]
+    )
+    db.session.commit()
+    return auction_ids
+
+
+def run(auctions=50000, batch_size=500, bidders=200, seed_value=0):
+    """{name: value} of one closing run."""
+    rng = bench_data.new_rng(seed_value)
+    started = time.perf_counter()
+    seed(auctions, bidders, rng)
+    seeded = time.perf_counter() - started
+
+    batches = BatchTimes()
+    closing_logger = logging.getLogger('app.services.auction_closing')
+    level = closing_logger.level
+    closing_logger.addHandler(batches)
+    closing_logger.setLevel(logging.INFO)
+    try:
+        started = time.perf_counter()
+        closed = finalize_expired_auctions(batch_size, now=END_TIME + timedelta(seconds=auctions))
+        seconds = time.perf_counter() - started
+    finally:
+        closing_logger.removeHandler(batches)
+        closing_logger.setLevel(level)
+
+    times = batches.times or [0.0]
+    return {
+        'seeded in (s)': round(seeded, 2),
+        'auctions closed': closed,
+        'still active': db.session.query(Auction.id).filter(Auction.is_active == True).count(),
+        'notifications': db.session.query(Notification.id).count(),
+        'batches': len(batches.times),
+        'total (s)': round(seconds, 2),
+        'auctions per second': round(closed / seconds) if seconds else 0,
+        'batch ms (min)': round(min(times), 1),
+        'batch ms (median)': round(statistics.median(times), 1),
+        'batch ms (max)': round(max(times), 1)
+    }
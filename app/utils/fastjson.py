@@ -0,0 +1,23 @@
+"""JSON helpers that use orjson when it's installed and the json module otherwise.
+
+orjson is an optional dependency (`pip install orjson`); it parses and
+serializes several times faster. Both raise ValueError on bad input.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(value):
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+def dumps(value):
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
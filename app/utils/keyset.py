@@ -0,0 +1,124 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select
+
+
+def encode_cursor(values, direction='next', context=None):
+    """Opaque URL-safe token for the sort key of a row, plus any JSON-compatible context."""
+    keys = [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in values]
+    data = {'k': keys, 'd': direction}
+    if context is not None:
+        data['c'] = context
+    raw = json.dumps(data, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _load(token):
+    try:
+        return json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, binascii.Error):
+        return None
+
+
+def decode_cursor(token):
+    """Return (values, direction) for a token, or (None, 'next') if it's missing or malformed."""
+    if not token:
+        return None, 'next'
+    try:
+        data = _load(token)
+        values = [
+            datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in data['k']
+        ]
+        direction = 'prev' if data.get('d') == 'prev' else 'next'
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        return None, 'next'
+    return values, direction
+
+
+def cursor_context(token):
+    """The context a cursor was encoded with, or None."""
+    data = _load(token) if token else None
+    return data.get('c') if isinstance(data, dict) else None
+
+
+def _after(order, values):
+    """Rows that come after the given sort key in the given order."""
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        equal = [order[j][0] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query.
+
+    Pages are addressed by the sort key of their first or last row rather
+    than by an offset, so every page costs the same as the first one.
+    """
+
+    def __init__(self, items, next_cursor, prev_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = None
+        self.total_exact = True
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def keyset_paginate(query, order, cursor=None, per_page=20, context=None):
+    """Fetch the page of query after (or before) cursor.
+
+    order is a list of (column, descending) pairs that must end with a
+    unique column, e.g. the primary key, so every row has a distinct key.
+    context is carried along in the cursors of the page (see cursor_context).
+    """
+    values, direction = decode_cursor(cursor)
+    if values is not None and len(values) != len(order):
+        values, direction = None, 'next'
+    backwards = direction == 'prev' and values is not None
+
+    # Walking backwards is the same seek with every direction flipped
+    seek = [(column, descending != backwards) for column, descending in order]
+    if values is not None:
+        query = query.filter(_after(seek, values))
+    query = query.add_columns(*[column for column, _ in order])
+    query = query.order_by(None).order_by(*[
+        column.desc() if descending else column.asc() for column, descending in seek
+    ])
+
+    rows = query.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    keys = [list(row[1:]) for row in rows]
+    if not rows:
+        return KeysetPage([], None, None)
+    has_next = more if not backwards else True
+    has_prev = values is not None if not backwards else more
+    return KeysetPage(
+        items,
+        encode_cursor(keys[-1], context=context) if has_next else None,
+        encode_cursor(keys[0], 'prev', context) if has_prev else None
+    )
+
+
+def estimate_count(query, cap=1000):
+    """Count the rows of query, but stop at cap. Returns (count, exact)."""
+    capped = query.order_by(None).limit(cap + 1).subquery()
+    count = query.session.execute(select(func.count()).select_from(capped)).scalar()
+    return min(count, cap), count <= cap
@@ -0,0 +1,156 @@
+"""Find queries that read whole tables.
+
+Used by `flask check-query-plans` and tests/test_query_plans.py: the GET
+routes below are requested through the test client, every SELECT they
+run is recorded, and each one is run again under EXPLAIN. A step that
+reads every row of a table (SQLite "SCAN <table>", MySQL access type ALL,
+PostgreSQL "Seq Scan") is reported unless the table is smaller than
+min_rows.
+
+Each route is requested twice and only the second request is checked:
+the in-memory indexes and caches (search statistics, suggestions, the
+category tree, the rep ids) load whole tables once, on the first request
+that needs them, and not on the requests after it.
+"""
+import json
+import re
+from contextlib import contextmanager
+from flask import url_for
+from sqlalchemy import event, func, select
+from app import db
+
+# (endpoint, url arguments) of the routes to check; '<auction>' and '<user>' are filled in
+ROUTES = [
+    ('main.index', {}),
+    ('auction.browse', {}),
+    ('auction.browse', {'status': 'ended', 'sort': 'price_desc'}),
+    ('auction.browse', {'q': 'vintage', 'min_price': 10}),
+    ('auction.view', {'id': '<auction>'}),
+    ('auction.bid_history', {'id': '<auction>'}),
+    ('auction.user_auctions', {'user_id': '<user>'}),
+    ('search.index', {'q': 'vintage'}),
+    ('search.advanced', {'query': 'vintage', 'status': 'all'}),
+    ('search.suggestions', {'q': 'vi'}),
+    ('user.profile', {}),
+    ('user.my_auctions', {}),
+    ('user.my_bids', {}),
+    ('user.profile_view', {'id': '<user>'}),
+    ('user.my_questions', {}),
+    ('notification.list', {}),
+    ('notification.list', {'filter': 'unread'}),
+    ('notification.feed', {}),
+    ('notification.get_unread_count', {}),
+    ('alert.manage', {}),
+    ('wishlist.view', {}),
+    ('review.user_reviews', {'user_id': '<user>'}),
+]
+
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+
+
+@contextmanager
+def recorded_selects(engine):
+    """Collect the (statement, parameters) of every SELECT run on engine."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def _sqlite_scans(connection, statement, parameters):
+    plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    details = [row[-1] for row in plan]
+    return {match.group(1) for match in map(SQLITE_SCAN.match, details) if match}
+
+
+def _mysql_scans(connection, statement, parameters):
+    result = connection.exec_driver_sql('EXPLAIN ' + statement, parameters)
+    columns = list(result.keys())
+    return {
+        row[columns.index('table')] for row in result
+        if row[columns.index('type')] == 'ALL'
+    }
+
+
+def _postgresql_scans(connection, statement, parameters):
+    plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    tables = set()
+    nodes = [entry['Plan'] for entry in plan]
+    while nodes:
+        node = nodes.pop()
+        if node['Node Type'] == 'Seq Scan':
+            tables.add(node['Relation Name'])
+        nodes.extend(node.get('Plans', ()))
+    return tables
+
+
+# Dialect name -> function returning the tables a statement reads in full
+EXPLAINERS = {
+    'sqlite': _sqlite_scans,
+    'mysql': _mysql_scans,
+    'postgresql': _postgresql_scans,
+}
+
+
+def supports(engine):
+    """True if the query plans of engine's database can be checked."""
+    return engine.dialect.name in EXPLAINERS
+
+
+def scanned_tables(connection, statement, parameters):
+    """Names of the tables a statement reads in full."""
+    return EXPLAINERS[connection.dialect.name](connection, statement, parameters)
+
+
+def _get(client, url):
+    try:
+        client.get(url)
+    except Exception:
+        # A page that fails to render has still run its queries
+        db.session.rollback()
+
+
+def check_routes(app, user, auction, min_rows=1000):
+    """Request each route as user; returns [(url, table, statement)] for the full scans found.
+
+    The database must be one supports() accepts.
+    """
+    placeholders = {'<user>': user.id, '<auction>': auction.id}
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+
+    table_names = set(db.metadata.tables)
+    table_sizes = {}
+    problems = []
+    for endpoint, arguments in ROUTES:
+        if endpoint not in app.view_functions:
+            continue
+        arguments = {key: placeholders.get(value, value) for key, value in arguments.items()}
+        with app.test_request_context():
+            url = url_for(endpoint, **arguments)
+
+        _get(client, url)
+        with recorded_selects(db.engine) as statements:
+            _get(client, url)
+
+        with db.engine.connect() as connection:
+            for statement, parameters in statements:
+                for table in scanned_tables(connection, statement, parameters) & table_names:
+                    if table not in table_sizes:
+                        table_sizes[table] = connection.execute(
+                            select(func.count()).select_from(db.metadata.tables[table])
+                        ).scalar()
+                    if table_sizes[table] >= min_rows:
+                        problems.append((url, table, statement))
+    return problems
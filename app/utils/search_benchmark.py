@@ -0,0 +1,77 @@
+"""Measure full-text search against the ILIKE scan it replaced.
+
+Used by `flask bench-search`: `items` items are seeded, each with an
+auction, from a vocabulary of common words (a few percent of auctions
+contain each) and a long tail of rare ones, and the search index is
+rebuilt over them. Each query is then run both through basic_search
+(first page plus the capped count) and as the old ILIKE conditions, one
+per word over the four text columns, fetching the same first page and
+counting the matches. ILIKE also matches inside words ('w12' in 'w123'),
+so its counts can be higher.
+"""
+import time
+from sqlalchemy import and_, func, or_
+from app import db
+from app.models import Auction, Item
+from app.services.search_engine import search_engine
+from app.utils import bench_data
+
+# Each common word weighs as much as COMMON_WEIGHT rare words
+COMMON_WEIGHT = 40
+RARE_WORDS = 20000
+
+QUERIES = ('camera', 'vintage camera', 'leica lens mint', 'w123', 'w5 camera', 'zzzz')
+
+
+def ilike_search(query, per_page=20):
+    """First page and total of the pre-index search: every word somewhere in the auction or item text."""
+    conditions = [
+        or_(
+            Auction.title.ilike(f'%{term}%'),
+            Auction.description.ilike(f'%{term}%'),
+            Item.name.ilike(f'%{term}%'),
+            Item.description.ilike(f'%{term}%')
+        )
+        for term in query.split()
+    ]
+    results = Auction.query.join(Item).filter(and_(*conditions))
+    page = results.order_by(Auction.end_time.asc()).limit(per_page).all()
+    total = results.with_entities(func.count(Auction.id)).scalar()
+    return page, total
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def run(items=1000000, queries=QUERIES, seed_value=0):
+    """({name: value} of the setup, [(query, index ms, index total, ILIKE ms, ILIKE total)])."""
+    from app.routes.search import basic_search
+
+    rng = bench_data.new_rng(seed_value)
+    vocabulary = bench_data.WORDS * COMMON_WEIGHT + [f'w{n}' for n in range(RARE_WORDS)]
+
+    started = time.perf_counter()
+    user_ids = bench_data.seed_users(10)
+    category_ids = bench_data.seed_categories(10, rng)
+    item_ids = bench_data.seed_items(items, category_ids, rng, description_words=12, vocabulary=vocabulary)
+    bench_data.seed_auctions(item_ids, user_ids, bench_data.FAR_FUTURE, rng, vocabulary=vocabulary)
+    seeded = time.perf_counter() - started
+
+    indexed, index_ms = timed(search_engine.rebuild)
+
+    results = []
+    for query in queries:
+        page, search_ms = timed(basic_search, query)
+        (_, ilike_total), ilike_ms = timed(ilike_search, query)
+        total = f'{page.total}' if page.total_exact else f'{page.total}+'
+        results.append((query, search_ms, total, ilike_ms, ilike_total))
+
+    setup = {
+        'auctions': indexed,
+        'seeded in (s)': round(seeded, 1),
+        'index built in (s)': round(index_ms / 1000, 1)
+    }
+    return setup, results
@@ -0,0 +1,85 @@
+"""Measure the latency of search suggestions.
+
+Used by `flask bench-suggestions`: `auctions` active auctions (and as
+many items) are seeded and a SuggestionIndex is built over them. Each
+prefix is then answered both by the index and by the two ILIKE queries
+/search/api/suggestions used to run on every keystroke, one over active
+auction titles and one over item names.
+"""
+import statistics
+import time
+from datetime import datetime
+from sqlalchemy import update
+from app import db
+from app.models import Auction, Item
+from app.services.suggestions import SuggestionIndex
+from app.utils import bench_data
+
+RARE_WORDS = 5000
+
+PREFIXES = ('ca', 'camera', 'vintage ca', 'w1', 'w123', 'w4999', 'zz')
+
+
+def ilike_suggest(prefix):
+    """The pre-index suggestions: up to 5 matching active auction titles, then item names up to 10."""
+    now = datetime.utcnow()
+    auctions = Auction.query.filter(
+        Auction.is_active == True,
+        Auction.end_time > now,
+        Auction.title.ilike(f'%{prefix}%')
+    ).limit(5).all()
+    items = Item.query.filter(Item.name.ilike(f'%{prefix}%')).limit(5).all()
+
+    suggestions = []
+    for text in [auction.title for auction in auctions] + [item.name for item in items]:
+        if text not in suggestions and len(suggestions) < 10:
+            suggestions.append(text)
+    return suggestions
+
+
+def latencies(function, prefix, repeat):
+    """Milliseconds of each of repeat calls."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(prefix)
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def run(auctions=200000, prefixes=PREFIXES, repeat=1000, ilike_repeat=5, seed_value=0):
+    """({name: value} of the setup, [(prefix, index median ms, index p99 ms, ILIKE median ms)])."""
+    rng = bench_data.new_rng(seed_value)
+    vocabulary = bench_data.WORDS + [f'w{n}' for n in range(RARE_WORDS)]
+
+    user_ids = bench_data.seed_users(10)
+    category_ids = bench_data.seed_categories(10, rng)
+    item_ids = bench_data.seed_items(auctions, category_ids, rng, description_words=0, vocabulary=vocabulary)
+    bench_data.seed_auctions(item_ids, user_ids, bench_data.FAR_FUTURE, rng, vocabulary=vocabulary)
+    # Popularity, so phrases rank differently
+    db.session.execute(update(Auction).values(bid_count=Auction.id % 50))
+    db.session.commit()
+
+    # Rebuilt here only, so every suggestion below is served from memory
+    index = SuggestionIndex(check_interval=10 ** 9, rebuild_interval=10 ** 9)
+    started = time.perf_counter()
+    index.rebuild()
+    built = time.perf_counter() - started
+
+    results = []
+    for prefix in prefixes:
+        index.suggest(prefix)
+        times = sorted(latencies(index.suggest, prefix, repeat))
+        ilike = latencies(ilike_suggest, prefix, ilike_repeat)
+        results.append((
+            prefix,
+            statistics.median(times),
+            times[min(len(times) - 1, int(len(times) * 0.99))],
+            statistics.median(ilike)
+        ))
+
+    setup = {
+        'phrases': len(index),
+        'index built in (s)': round(built, 2)
+    }
+    return setup, results
@@ -22,5 +22,31 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, 'app/static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
+    # Socket.IO fan-out between worker processes. Leave unset for a single
+    # worker. Use 'db://' to relay through the app's own database (no extra
+    # services), any SQLAlchemy URL prefixed with 'db+' for a separate
+    # database, or a redis://, amqp://, kafka:// or zmq+tcp:// broker URL.
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    
+    # Worker threads for post-commit jobs (alert matching, notifications);
+    # 0 runs each job inside the request that queued it. Either way a sweeper
+    # thread retries failed jobs and picks up ones that were never run
+    JOB_QUEUE_WORKERS = int(os.environ.get('JOB_QUEUE_WORKERS') or 2)
+    
+    # Notification retention: read notifications are deleted once they are
+    # older than NOTIFICATION_RETENTION_DAYS, and repeats of the compacted
+    # types about the same auction are merged into one row once older than
+    # NOTIFICATION_COMPACT_AFTER_HOURS
+    NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS') or 90)
+    NOTIFICATION_COMPACT_AFTER_HOURS = int(os.environ.get('NOTIFICATION_COMPACT_AFTER_HOURS') or 24)
+    NOTIFICATION_COMPACT_TYPES = ('outbid', 'auto_bid', 'bid_placed')
+    
+    # Outbid and auto-bid notifications about the same auction that arrive
+    # within this many seconds of an unread one are merged into it
+    NOTIFICATION_DEBOUNCE_SECONDS = int(os.environ.get('NOTIFICATION_DEBOUNCE_SECONDS') or 60)
+    
     # Scheduler settings
-    SCHEDULER_API_ENABLED = True 
\ No newline at end of file
+    SCHEDULER_API_ENABLED = True
+    JOBS = [
+        {'id': 'prune-notifications', 'func': 'app.tasks:prune_notifications', 'trigger': 'interval', 'hours': 1}
+    ] 
\ No newline at end of file
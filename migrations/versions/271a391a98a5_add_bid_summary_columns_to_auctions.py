@@ -0,0 +1,52 @@
+"""add bid summary columns to auctions
+
+Revision ID: 271a391a98a5
+Revises: 4d3dd0550d70
+Create Date: 2026-10-18 07:08:37.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '271a391a98a5'
+down_revision = '4d3dd0550d70'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('auctions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('current_price', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('bid_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('leading_bidder_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('leading_bid_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_auctions_leading_bidder_id_users', 'users', ['leading_bidder_id'], ['id'])
+
+    # Backfill the summary from the existing bids; ties on amount go to the earliest bid
+    op.execute("""
+        UPDATE auctions SET
+            bid_count = (SELECT COUNT(*) FROM bids WHERE bids.auction_id = auctions.id),
+            current_price = COALESCE(
+                (SELECT MAX(bids.amount) FROM bids WHERE bids.auction_id = auctions.id),
+                auctions.initial_price
+            ),
+            leading_bid_id = (
+                SELECT bids.id FROM bids WHERE bids.auction_id = auctions.id
+                ORDER BY bids.amount DESC, bids.id ASC LIMIT 1
+            ),
+            leading_bidder_id = (
+                SELECT bids.bidder_id FROM bids WHERE bids.auction_id = auctions.id
+                ORDER BY bids.amount DESC, bids.id ASC LIMIT 1
+            )
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('auctions', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_auctions_leading_bidder_id_users', type_='foreignkey')
+        batch_op.drop_column('leading_bid_id')
+        batch_op.drop_column('leading_bidder_id')
+        batch_op.drop_column('bid_count')
+        batch_op.drop_column('current_price')
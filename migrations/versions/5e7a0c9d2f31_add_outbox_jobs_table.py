@@ -0,0 +1,41 @@
+"""add outbox jobs table
+
+Revision ID: 5e7a0c9d2f31
+Revises: c3f18d92b6e4
+Create Date: 2026-10-18 08:41:19.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e7a0c9d2f31'
+down_revision = 'c3f18d92b6e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('outbox_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('available_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('outbox_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_outbox_jobs_status_available_at', ['status', 'available_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('outbox_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_outbox_jobs_status_available_at')
+
+    op.drop_table('outbox_jobs')
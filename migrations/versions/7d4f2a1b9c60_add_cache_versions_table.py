@@ -0,0 +1,28 @@
+"""add cache versions table
+
+Revision ID: 7d4f2a1b9c60
+Revises: e81b4c6a0d52
+Create Date: 2026-10-18 09:38:05.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4f2a1b9c60'
+down_revision = 'e81b4c6a0d52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
@@ -0,0 +1,30 @@
+"""add leases table
+
+Revision ID: 9b2e6f1c4a7d
+Revises: 271a391a98a5
+Create Date: 2026-10-18 07:30:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b2e6f1c4a7d'
+down_revision = '271a391a98a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('leases',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('holder', sa.String(length=128), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('acquired_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('leases')
@@ -0,0 +1,42 @@
+"""add search index tables
+
+Revision ID: a4c97e3d1f08
+Revises: 7d4f2a1b9c60
+Create Date: 2026-10-18 10:12:41.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c97e3d1f08'
+down_revision = '7d4f2a1b9c60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('search_postings',
+    sa.Column('term', sa.String(length=64), nullable=False),
+    sa.Column('auction_id', sa.Integer(), nullable=False),
+    sa.Column('tf', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('term', 'auction_id')
+    )
+    with op.batch_alter_table('search_postings', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_search_postings_auction_id'), ['auction_id'], unique=False)
+
+    op.create_table('search_documents',
+    sa.Column('auction_id', sa.Integer(), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('auction_id')
+    )
+    # Existing auctions are indexed with `flask rebuild-search-index`
+
+
+def downgrade():
+    op.drop_table('search_documents')
+    with op.batch_alter_table('search_postings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_search_postings_auction_id'))
+
+    op.drop_table('search_postings')
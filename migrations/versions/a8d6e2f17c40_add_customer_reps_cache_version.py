@@ -0,0 +1,26 @@
+"""add customer_reps cache version
+
+Revision ID: a8d6e2f17c40
+Revises: f4b71d9e2c36
+Create Date: 2026-10-18 14:21:55.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d6e2f17c40'
+down_revision = 'f4b71d9e2c36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bumped whenever a customer rep is added, removed or changes role;
+    # created here so the bump is always a plain UPDATE
+    op.execute("INSERT INTO cache_versions (name, version) VALUES ('customer_reps', 1)")
+
+
+def downgrade():
+    op.execute("DELETE FROM cache_versions WHERE name = 'customer_reps'")
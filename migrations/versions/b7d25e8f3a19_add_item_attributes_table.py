@@ -0,0 +1,76 @@
+"""add item attributes table
+
+Revision ID: b7d25e8f3a19
+Revises: a4c97e3d1f08
+Create Date: 2026-10-18 10:41:17.000000
+
+"""
+import json
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d25e8f3a19'
+down_revision = 'a4c97e3d1f08'
+branch_labels = None
+depends_on = None
+
+NUMBER = re.compile(r'^\s*(-?\d+(?:\.\d+)?)')
+
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = NUMBER.match(str(value))
+    return float(match.group(1)) if match else None
+
+
+def upgrade():
+    item_attributes = op.create_table('item_attributes',
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('value_text', sa.String(length=255), nullable=False),
+    sa.Column('value_number', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id'], name='fk_item_attributes_item_id_items', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('item_id', 'name')
+    )
+    with op.batch_alter_table('item_attributes', schema=None) as batch_op:
+        batch_op.create_index('ix_item_attributes_name_text', ['name', 'value_text', 'item_id'], unique=False)
+        batch_op.create_index('ix_item_attributes_name_number', ['name', 'value_number', 'item_id'], unique=False)
+
+    # Backfill from the JSON attributes of existing items
+    rows = []
+    items = op.get_bind().execute(sa.text('SELECT id, attributes FROM items WHERE attributes IS NOT NULL'))
+    for item_id, attributes in items:
+        try:
+            values = json.loads(attributes) if attributes else {}
+        except ValueError:
+            continue
+        if not isinstance(values, dict):
+            continue
+        named = {}
+        for name, value in values.items():
+            key = str(name).strip().lower()[:64]
+            if not key or value is None or isinstance(value, (dict, list)):
+                continue
+            named[key] = {
+                'item_id': item_id,
+                'name': key,
+                'value_text': str(value).strip().lower()[:255],
+                'value_number': _number(value)
+            }
+        rows.extend(named.values())
+    if rows:
+        op.bulk_insert(item_attributes, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('item_attributes', schema=None) as batch_op:
+        batch_op.drop_index('ix_item_attributes_name_number')
+        batch_op.drop_index('ix_item_attributes_name_text')
+
+    op.drop_table('item_attributes')
@@ -0,0 +1,26 @@
+"""add alerts cache version
+
+Revision ID: b91f4c2d7e35
+Revises: c3e9a5d71b08
+Create Date: 2026-10-18 18:40:12.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b91f4c2d7e35'
+down_revision = 'c3e9a5d71b08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Bumped whenever an alert is created, changed or deleted;
+    # created here so the bump is always a plain UPDATE
+    op.execute("INSERT INTO cache_versions (name, version) VALUES ('alerts', 1)")
+
+
+def downgrade():
+    op.execute("DELETE FROM cache_versions WHERE name = 'alerts'")
@@ -0,0 +1,28 @@
+"""add notification updated_at
+
+Revision ID: c3e9a5d71b08
+Revises: a8d6e2f17c40
+Create Date: 2026-10-18 16:02:41.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e9a5d71b08'
+down_revision = 'a8d6e2f17c40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Coalesced notifications used to move created_at to their last repeat
+    op.execute('UPDATE notifications SET updated_at = created_at')
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
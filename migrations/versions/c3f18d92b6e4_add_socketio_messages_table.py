@@ -0,0 +1,37 @@
+"""add socketio messages table
+
+Revision ID: c3f18d92b6e4
+Revises: 9b2e6f1c4a7d
+Create Date: 2026-10-18 08:02:45.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f18d92b6e4'
+down_revision = '9b2e6f1c4a7d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('socketio_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('channel', sa.String(length=64), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('socketio_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_socketio_messages_channel_id', ['channel', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_socketio_messages_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('socketio_messages', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_socketio_messages_created_at'))
+        batch_op.drop_index('ix_socketio_messages_channel_id')
+
+    op.drop_table('socketio_messages')
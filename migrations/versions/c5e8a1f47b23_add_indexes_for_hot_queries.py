@@ -0,0 +1,74 @@
+"""add indexes for hot queries
+
+Revision ID: c5e8a1f47b23
+Revises: b7d25e8f3a19
+Create Date: 2026-10-18 11:05:52.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e8a1f47b23'
+down_revision = 'b7d25e8f3a19'
+branch_labels = None
+depends_on = None
+
+# table -> [(index name, columns)], one entry per query shape the routes run
+INDEXES = {
+    'auctions': [
+        ('ix_auctions_is_active_end_time', ['is_active', 'end_time']),  # active listings, closing
+        ('ix_auctions_end_time', ['end_time']),  # ended listings
+        ('ix_auctions_item_id', ['item_id']),
+        ('ix_auctions_seller_id_created_at', ['seller_id', 'created_at']),  # seller's auctions
+        ('ix_auctions_winner_id', ['winner_id']),
+    ],
+    'bids': [
+        ('ix_bids_auction_id_amount', ['auction_id', sa.text('amount DESC'), 'id']),  # highest bids
+        ('ix_bids_bidder_id_created_at', ['bidder_id', 'created_at']),  # a user's bids
+    ],
+    'notifications': [
+        ('ix_notifications_user_id_is_read_created_at', ['user_id', 'is_read', 'created_at']),  # inbox, unread count
+        ('ix_notifications_reference_id', ['reference_id']),
+    ],
+    'items': [
+        ('ix_items_category_id', ['category_id']),
+    ],
+    'categories': [
+        ('ix_categories_parent_id', ['parent_id']),
+    ],
+    'questions': [
+        ('ix_questions_status_created_at', ['status', 'created_at']),  # rep queue
+        ('ix_questions_auction_id', ['auction_id']),
+        ('ix_questions_user_id_created_at', ['user_id', 'created_at']),
+    ],
+    'answers': [
+        ('ix_answers_question_id_created_at', ['question_id', 'created_at']),
+    ],
+    'reviews': [
+        ('ix_reviews_seller_id_created_at', ['seller_id', 'created_at']),
+        ('ix_reviews_auction_id', ['auction_id']),
+    ],
+    'wishlists': [
+        ('ix_wishlists_user_id_item_id', ['user_id', 'item_id']),
+        ('ix_wishlists_item_id', ['item_id']),  # wishlist button on the auction page
+    ],
+    'alerts': [
+        ('ix_alerts_user_id', ['user_id']),
+    ],
+}
+
+
+def upgrade():
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, indexes in reversed(list(INDEXES.items())):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in reversed(indexes):
+                batch_op.drop_index(name)
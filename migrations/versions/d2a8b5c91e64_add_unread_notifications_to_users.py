@@ -0,0 +1,34 @@
+"""add unread notification counter to users
+
+Revision ID: d2a8b5c91e64
+Revises: c5e8a1f47b23
+Create Date: 2026-10-18 12:14:26.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a8b5c91e64'
+down_revision = 'c5e8a1f47b23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unread_notifications', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill the counter from the existing notifications
+    op.execute("""
+        UPDATE users SET unread_notifications = (
+            SELECT COUNT(*) FROM notifications
+            WHERE notifications.user_id = users.id AND notifications.is_read = 0
+        )
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('unread_notifications')
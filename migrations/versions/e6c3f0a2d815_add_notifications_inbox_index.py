@@ -0,0 +1,27 @@
+"""add notifications inbox index
+
+Revision ID: e6c3f0a2d815
+Revises: d2a8b5c91e64
+Create Date: 2026-10-18 12:52:40.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6c3f0a2d815'
+down_revision = 'd2a8b5c91e64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the inbox's keyset pages, newest first by (created_at, id)
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_id_created_at_id')
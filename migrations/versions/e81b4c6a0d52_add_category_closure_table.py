@@ -0,0 +1,48 @@
+"""add category closure table
+
+Revision ID: e81b4c6a0d52
+Revises: 5e7a0c9d2f31
+Create Date: 2026-10-18 09:10:33.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81b4c6a0d52'
+down_revision = '5e7a0c9d2f31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    closure = op.create_table('category_closure',
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('descendant_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['categories.id'], name='fk_category_closure_ancestor_id_categories', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['descendant_id'], ['categories.id'], name='fk_category_closure_descendant_id_categories', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id')
+    )
+    with op.batch_alter_table('category_closure', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_category_closure_descendant_id'), ['descendant_id'], unique=False)
+
+    # Backfill every (ancestor, descendant) pair from the existing tree
+    parents = dict(op.get_bind().execute(sa.text('SELECT id, parent_id FROM categories')).all())
+    rows = []
+    for category_id in parents:
+        ancestor, depth, seen = category_id, 0, set()
+        while ancestor is not None and ancestor not in seen:
+            seen.add(ancestor)
+            rows.append({'ancestor_id': ancestor, 'descendant_id': category_id, 'depth': depth})
+            ancestor, depth = parents.get(ancestor), depth + 1
+    if rows:
+        op.bulk_insert(closure, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('category_closure', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_category_closure_descendant_id'))
+
+    op.drop_table('category_closure')
@@ -0,0 +1,29 @@
+"""add notification repeat count and created_at index
+
+Revision ID: f4b71d9e2c36
+Revises: e6c3f0a2d815
+Create Date: 2026-10-18 13:37:08.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b71d9e2c36'
+down_revision = 'e6c3f0a2d815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('repeat_count', sa.Integer(), server_default='1', nullable=False))
+        # The retention job finds old rows by age
+        batch_op.create_index('ix_notifications_created_at', ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_created_at')
+        batch_op.drop_column('repeat_count')
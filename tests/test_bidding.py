@@ -0,0 +1,107 @@
+"""resolve_proxy_bids must end every bidding war where the step-by-step engine did.
+
+The reference below is the old per-increment loop of process_auto_bidding,
+run on integer cents: while someone other than the strongest auto-bidder
+leads, the strongest raises the price by one increment (capped at their
+limit); while the strongest leads, the runner-up does. A bid only takes
+the lead if it beats the price, and an auto-bidder whose limit no longer
+beats the price stops bidding.
+"""
+import random
+import pytest
+from app.services.bidding import AutoBidder, resolve_proxy_bids, to_cents
+
+MANUAL_BIDDER = 0
+
+
+def step_by_step(current_amount, leader_id, auto_bidders, min_increment):
+    """[(bidder_id, cents, limit)] of every bid the old engine placed, in order."""
+    price = to_cents(current_amount)
+    increment = to_cents(min_increment)
+    placed = []
+    if len(auto_bidders) < 2 or increment <= 0:
+        return placed
+    top, second = auto_bidders[0], auto_bidders[1]
+    while True:
+        bidder = top if leader_id != top.bidder_id else second
+        limit = to_cents(bidder.limit)
+        if limit <= price:
+            return placed
+        price = min(limit, price + increment)
+        leader_id = bidder.bidder_id
+        placed.append((bidder.bidder_id, price, bidder.limit))
+
+
+def outcome(current_amount, leader_id, bids):
+    """(price in cents, leader) once bids are placed; a bid leads only if it beats the price."""
+    price = to_cents(current_amount)
+    for bid in bids:
+        if to_cents(bid.amount) > price:
+            price = to_cents(bid.amount)
+            leader_id = bid.bidder_id
+    return price, leader_id
+
+
+def check(current_amount, leader_id, auto_bidders, min_increment):
+    placed = step_by_step(current_amount, leader_id, auto_bidders, min_increment)
+    bids = resolve_proxy_bids(current_amount, leader_id, auto_bidders, min_increment)
+
+    # The same outcome...
+    expected = (placed[-1][1], placed[-1][0]) if placed else (to_cents(current_amount), leader_id)
+    assert outcome(current_amount, leader_id, bids) == expected
+
+    # ...from at most two of the bids the old engine placed, in the same order, ending with its last
+    assert len(bids) <= 2
+    remaining = iter(placed)
+    for bid in bids:
+        assert (bid.bidder_id, to_cents(bid.amount), bid.limit) in remaining
+    if placed:
+        assert (bids[-1].bidder_id, to_cents(bids[-1].amount), bids[-1].limit) == placed[-1]
+
+
+@pytest.mark.parametrize('current_amount, leader_id, limits, min_increment', [
+    # A manual bid below both limits; the stronger auto-bidder wins one increment above the other
+    (12, MANUAL_BIDDER, [50, 40], 1),
+    # Equal limits: whoever reaches the shared limit first keeps the lead
+    (10, MANUAL_BIDDER, [30, 30], 1),
+    (10, 1, [30, 30], 1),
+    # The leader's limit is already exhausted; the runner-up's too, so nothing happens
+    (50, 1, [50, 40], 1),
+    # The leader is exhausted but the runner-up can still beat the price
+    (30, 1, [30, 45], 2.5),
+    # Nobody's limit beats the price
+    (60, MANUAL_BIDDER, [50, 40], 1),
+    # Limits that are not a whole number of increments above the price
+    (10, MANUAL_BIDDER, [23.37, 19.99], 0.5),
+    # A single auto-bidder never bids against the manual leader
+    (10, MANUAL_BIDDER, [50], 1),
+    (10, MANUAL_BIDDER, [50, 40], 0),
+])
+def test_known_wars(current_amount, leader_id, limits, min_increment):
+    auto_bidders = [AutoBidder(index + 1, limit) for index, limit in enumerate(limits)]
+    auto_bidders.sort(key=lambda bidder: -bidder.limit)
+    check(current_amount, leader_id, auto_bidders, min_increment)
+
+
+def test_randomized_wars():
+    rng = random.Random(20261018)
+    increments = [0.01, 0.05, 0.25, 0.5, 1, 2.5, 5, 10]
+    for _ in range(2000):
+        min_increment = rng.choice(increments)
+        current_amount = rng.randint(100, 20000) / 100
+        count = rng.randint(2, 4)
+        limits = []
+        for _ in range(count):
+            if limits and rng.random() < 0.2:
+                limits.append(rng.choice(limits))  # ties
+            elif rng.random() < 0.15:
+                limits.append(round(current_amount - rng.randint(0, min(500, int(current_amount * 100))) / 100, 2))  # exhausted
+            else:
+                limits.append(round(current_amount + rng.randint(0, 30000) / 100, 2))
+        # Highest limit first; ties keep the order the bidders joined in, as the query does
+        auto_bidders = sorted(
+            (AutoBidder(index + 1, limit) for index, limit in enumerate(limits)),
+            key=lambda bidder: -bidder.limit
+        )
+        leader_id = rng.choice([MANUAL_BIDDER] + [bidder.bidder_id for bidder in auto_bidders])
+        check(current_amount, leader_id, auto_bidders, min_increment)
@@ -0,0 +1,70 @@
+"""The main pages must not read whole tables once the tables are large.
+
+An app on a scratch SQLite file is seeded with a few thousand users,
+items, auctions, bids and notifications, and check_routes EXPLAINs every
+query the pages of app.utils.query_plans.ROUTES run.
+"""
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import insert
+from config import Config
+
+ROWS = 2000
+
+
+@pytest.fixture(scope='module')
+def app(tmp_path_factory):
+    from app import create_app, db
+
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path_factory.mktemp('plans') / 'plans.db')
+        TESTING = True
+        SERVER_NAME = 'localhost'
+        JOB_QUEUE_WORKERS = 0
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def seed(rng):
+    from app import db
+    from app.models import Bid
+    from app.models.notification import Notification
+    from app.services.search_engine import search_engine
+    from app.utils import bench_data
+
+    user_ids = bench_data.seed_users(ROWS)
+    category_ids = bench_data.seed_categories(20, rng)
+    item_ids = bench_data.seed_items(ROWS, category_ids, rng, description_words=5)
+    half = ROWS // 2
+    now = datetime.utcnow()
+    auction_ids = bench_data.seed_auctions(item_ids[:half], user_ids, now + timedelta(days=7), rng)
+    auction_ids += bench_data.seed_auctions(item_ids[half:], user_ids, now - timedelta(days=7), rng, is_active=False)
+
+    db.session.execute(insert(Bid), [
+        {'auction_id': rng.choice(auction_ids), 'bidder_id': rng.choice(user_ids[:50]), 'amount': 100.0 + n, 'created_at': now}
+        for n in range(ROWS)
+    ])
+    db.session.execute(insert(Notification), [
+        {'user_id': user_ids[n % 10], 'type': 'outbid', 'message': f'Outbid {n}', 'reference_id': rng.choice(auction_ids),
+         'is_read': n % 3 == 0, 'created_at': now - timedelta(minutes=n), 'updated_at': now - timedelta(minutes=n)}
+        for n in range(ROWS)
+    ])
+    db.session.commit()
+    search_engine.rebuild()
+
+
+def test_main_pages_read_no_whole_table(app):
+    from app.models import Auction, User
+    from app.utils import bench_data
+    from app.utils.query_plans import check_routes
+
+    seed(bench_data.new_rng(0))
+
+    user = User.query.order_by(User.id).first()
+    auction = Auction.query.order_by(Auction.id).first()
+    problems = check_routes(app, user, auction, min_rows=ROWS // 2)
+    assert [(url, table) for url, table, _ in problems] == []
@@ -0,0 +1,134 @@
+"""DatabaseRelayManager must deliver every emit to every room member exactly once, whichever worker sent it.
+
+Each worker is a separate process running its own Socket.IO server on a
+DatabaseRelayManager over one shared SQLite file. Clients are fake: they
+are entered into rooms directly and record the packets the server sends
+them instead of writing to a socket.
+"""
+import json
+import multiprocessing
+import queue
+import threading
+from collections import Counter
+import socketio
+from sqlalchemy import create_engine, event
+from app.models.socket_message import SocketMessage
+from app.services.socket_relay import DatabaseRelayManager
+
+WORKERS = 3
+CLIENTS_PER_WORKER = 4
+EMITS_PER_WORKER = 25
+TIMEOUT = 60
+
+
+def rooms_of(worker, client):
+    """Every client is in auction_1; only the clients of even workers are in auction_2."""
+    rooms = ['auction_1', f'user_{worker}_{client}']
+    if worker % 2 == 0:
+        rooms.append('auction_2')
+    return rooms
+
+
+def emits_of(worker):
+    """[(event id, room)] sent by a worker."""
+    emits = []
+    for n in range(EMITS_PER_WORKER):
+        room = ('auction_1', 'auction_2', f'user_{(worker + 1) % WORKERS}_{n % CLIENTS_PER_WORKER}')[n % 3]
+        emits.append((f'{worker}-{n}', room))
+    return emits
+
+
+def expected_events():
+    """{(worker, client): Counter of the event ids it should get}."""
+    members = {}
+    for worker in range(WORKERS):
+        for client in range(CLIENTS_PER_WORKER):
+            for room in rooms_of(worker, client):
+                members.setdefault(room, []).append((worker, client))
+    expected = {(worker, client): Counter() for worker in range(WORKERS) for client in range(CLIENTS_PER_WORKER)}
+    for worker in range(WORKERS):
+        for event_id, room in emits_of(worker):
+            for member in members[room]:
+                expected[member][event_id] += 1
+    return expected
+
+
+class RecordingServer(socketio.Server):
+    def __init__(self, **kwargs):
+        super().__init__(async_mode='threading', **kwargs)
+        self.received = []
+        self.lock = threading.Lock()
+
+    def _send_eio_packet(self, eio_sid, eio_pkt):
+        # A Socket.IO EVENT packet on the default namespace: '2' then the JSON arguments
+        name, data = json.loads(eio_pkt.data[1:])
+        with self.lock:
+            self.received.append((eio_sid, data['id']))
+
+
+def run_worker(url, worker, start, done, results):
+    manager = DatabaseRelayManager(url, poll_interval=0.01)
+    # The listener reads the last message id first; emits must not start before every worker has
+    listening = threading.Event()
+    event.listen(manager.engine, 'after_cursor_execute', lambda *args: listening.set())
+    server = RecordingServer(client_manager=manager)
+    server.manager.initialize()
+    listening.wait(TIMEOUT)
+
+    clients = {}
+    for client in range(CLIENTS_PER_WORKER):
+        eio_sid = f'{worker}:{client}'
+        sid = server.manager.connect(eio_sid, '/')
+        for room in rooms_of(worker, client):
+            server.manager.enter_room(sid, '/', room)
+        clients[eio_sid] = client
+    start.wait(TIMEOUT)
+
+    for event_id, room in emits_of(worker):
+        server.emit('relay_test', {'id': event_id}, to=room)
+
+    # Keep listening until everything addressed to this worker's clients arrived (or the time runs out)
+    wanted = sum(sum(counter.values()) for (w, _), counter in expected_events().items() if w == worker)
+    for _ in range(TIMEOUT * 20):
+        with server.lock:
+            if len(server.received) >= wanted:
+                break
+        threading.Event().wait(0.05)
+    # Give duplicates a moment to show up before reporting
+    threading.Event().wait(0.5)
+    with server.lock:
+        results.put((worker, [(clients[eio_sid], event_id) for eio_sid, event_id in server.received]))
+    done.wait(TIMEOUT)
+
+
+def test_every_room_gets_every_event_once(tmp_path):
+    url = f'sqlite:///{tmp_path / "relay.db"}'
+    SocketMessage.__table__.create(create_engine(url))
+
+    context = multiprocessing.get_context('spawn')
+    start = context.Barrier(WORKERS)
+    done = context.Barrier(WORKERS + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=run_worker, args=(url, worker, start, done, results))
+        for worker in range(WORKERS)
+    ]
+    for process in processes:
+        process.start()
+
+    received = {(worker, client): Counter() for worker in range(WORKERS) for client in range(CLIENTS_PER_WORKER)}
+    try:
+        for _ in range(WORKERS):
+            worker, events = results.get(timeout=TIMEOUT * 2)
+            for client, event_id in events:
+                received[worker, client][event_id] += 1
+        done.wait(TIMEOUT)
+    except (queue.Empty, threading.BrokenBarrierError):
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join(TIMEOUT)
+
+    assert received == expected_events()